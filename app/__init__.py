@@ -1,8 +1,9 @@
 import os
 from flask import Flask, request, redirect, url_for, render_template
-from flask_login import current_user
-from .extensions import db, migrate, login_manager, csrf
+from .extensions import db
 from .config import get_config
+from .startup import configure_template_cache
+from .database import configure_engine_options, install_engine_profile
 
 
 def register_blueprints(app: Flask) -> None:
@@ -11,16 +12,22 @@ def register_blueprints(app: Flask) -> None:
     from .schedules.routes import schedules_bp
     from .display.routes import display_bp
     from .icons.routes import icons_bp
+    from .displays.routes import displays_bp
     from .users.routes import users_bp
+    from .diagnostics.routes import diagnostics_bp
+    from .sync.routes import sync_bp
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(schedules_bp, url_prefix="/schedules")
     app.register_blueprint(display_bp, url_prefix="/display")
     app.register_blueprint(icons_bp, url_prefix="/icons")
+    app.register_blueprint(displays_bp, url_prefix="/displays")
     app.register_blueprint(users_bp, url_prefix="/users")
+    app.register_blueprint(diagnostics_bp, url_prefix="/diagnostics")
+    app.register_blueprint(sync_bp, url_prefix="/sync")
 
 
-def create_app() -> Flask:
+def create_app(test_config: dict | None = None) -> Flask:
     app = Flask(__name__, instance_relative_config=True)
 
     # Ensure instance folder exists (for SQLite default path)
@@ -30,33 +37,113 @@ def create_app() -> Flask:
         pass
 
     app.config.from_object(get_config())
+    if test_config:
+        app.config.from_mapping(test_config)
+
+    configure_template_cache(app)
 
     # Init extensions
+    configure_engine_options(app)
     db.init_app(app)
+    install_engine_profile(app)
+
+    from . import metrics
+    registry = metrics.init_app(app)
+
+    from .profiling import profiler
+    profiler.init_app(app)
+
+    from . import tracing
+    tracing.init_app(app)
+
+    from . import slow_queries
+    slow_queries.init_app(app)
+
+    from . import content
+    content.install()
+
+    from . import cache
+    shared_cache = cache.init_app(app)
+    registry.collected_counter(
+        "shared_cache_hits_total",
+        "Shared cache lookups served without the database",
+        lambda: shared_cache.hits,
+    )
+    registry.collected_counter(
+        "shared_cache_misses_total",
+        "Shared cache lookups that had to be built",
+        lambda: shared_cache.misses,
+    )
+    registry.collected_counter(
+        "shared_cache_invalidations_received_total", "Invalidations broadcast by other workers",
+        lambda: shared_cache.invalidations_received,
+    )
+
+    from . import snapshots
+    snapshots.init_app(app)
+    app.cli.add_command(snapshots.snapshot_command)
+
+    from . import edge_cache
+    edge_cache.init_app(app)
+
+    from . import transitions
+    transitions.init_app(app)
+
+    from .sync.replica import sync_pull_command
+    app.cli.add_command(sync_pull_command)
+
+    if app.config.get("APP_PROFILE") == "display":
+        init_display_profile(app)
+    else:
+        init_admin_profile(app)
+    return app
+
+
+def init_display_profile(app: Flask) -> None:
+    """Kiosk-serving nodes: the display blueprint only, with no auth, CSRF, forms or migrations."""
+    from .display.routes import display_bp
+
+    app.register_blueprint(display_bp, url_prefix="/display")
+
+    @app.route("/")
+    def index():
+        return redirect(url_for("display.sign"))
+
+
+def init_admin_profile(app: Flask) -> None:
+    from flask_login import current_user
+
+    from .extensions import csrf, login_manager, migrate
+
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
 
-    register_blueprints(app)
+    from .auth import identity
+    from .metrics import get_metrics
+    user_cache = identity.init_app(app)
+    registry = get_metrics(app)
+    registry.collected_counter(
+        "user_cache_hits_total", "Logged-in user loads served from cache", lambda: user_cache.hits
+    )
+    registry.collected_counter(
+        "user_cache_misses_total",
+        "Logged-in user loads that queried the database",
+        lambda: user_cache.misses,
+    )
 
-    @app.template_filter('hex_to_rgb')
-    def hex_to_rgb_filter(hex_color):
-        """Convert hex color to RGB tuple"""
-        hex_color = hex_color.lstrip('#')
-        if len(hex_color) == 6:
-            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        return (33, 37, 41)  # default dark gray
+    register_blueprints(app)
 
     @app.before_request
     def enforce_login_for_admin():
         # Allow public display and static assets without auth
-        if request.endpoint in ("static",):
+        if request.endpoint in ("static", "metrics_endpoint"):
             return None
         path = request.path or ""
         if path.startswith("/display"):
             return None
-        # Allow auth pages
-        if request.endpoint and request.endpoint.startswith("auth."):
+        # Allow auth pages, and the sync feed (it checks SYNC_TOKEN itself)
+        if request.endpoint and request.endpoint.startswith(("auth.", "sync.")):
             return None
         # Redirect anonymous users to login
         if not current_user.is_authenticated:
@@ -84,10 +171,11 @@ def create_app() -> Flask:
         db.session.commit()
         print(f"Admin user {email} created.")
 
+    from .seed import seed_command
+    app.cli.add_command(seed_command)
+
     @app.route("/")
     def index():
         return render_template("index.html")
 
-    return app
-
 
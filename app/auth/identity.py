@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Flask, current_app
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..cache import cache_invalidated, get_cache
+from ..extensions import db, login_manager
+from ..models import User
+
+USER_COLUMNS = ("id", "email", "password_hash", "is_admin", "created_at", "updated_at")
+
+
+class UserCache:
+    """Per-worker cache of the logged-in user's row, keyed by user id.
+
+    Flask-Login calls the user loader on every authenticated request; with the cache the
+    row is rebuilt from memory and merged into the session without a query. Entries live
+    for USER_CACHE_TTL_SECONDS. When the users blueprint edits or deletes a user, the entry
+    is dropped here and the invalidation goes out through the shared cache (CACHE_URL), so
+    every other worker drops it too, and a demoted admin loses access at once. Without
+    CACHE_URL, other workers converge within the TTL.
+    """
+
+    def __init__(self, app: Flask, ttl_seconds: float = 60):
+        self.app = app
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[int, Tuple[float, dict]] = {}
+        self._epoch = 0  # bumped on every drop, so a load racing an edit is not stored
+        self._lock = threading.Lock()
+
+    def load(self, user_id: str) -> Optional[User]:
+        try:
+            key = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        # Broadcasts reach this worker on a listener started by its first lookup
+        get_cache(self.app).listen()
+        now = time.monotonic()
+        with self._lock:
+            epoch = self._epoch
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                values = entry[1]
+            else:
+                self.misses += 1
+                values = None
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        user = db.session.get(User, key)
+        if user is not None and self.ttl_seconds > 0:
+            with self._lock:
+                if self._epoch == epoch:
+                    self._entries[key] = (
+                        now + self.ttl_seconds,
+                        {c: getattr(user, c) for c in USER_COLUMNS},
+                    )
+        return user
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the user's entry in this worker and, through the shared cache, in the others."""
+        get_cache(self.app).invalidate({User.__tablename__}, {(User.__tablename__, int(user_id))})
+
+    def drop(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop these users' entries in this worker only; all of them by default."""
+        with self._lock:
+            self._epoch += 1
+            if user_ids is None:
+                self._entries.clear()
+            else:
+                for user_id in user_ids:
+                    self._entries.pop(int(user_id), None)
+
+    def clear(self) -> None:
+        self.drop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def init_app(app: Flask) -> UserCache:
+    cache = UserCache(app, float(app.config.get("USER_CACHE_TTL_SECONDS", 60)))
+    app.extensions["user_cache"] = cache
+    login_manager.user_loader(_load_user)
+    return cache
+
+
+def get_user_cache(app: Optional[Flask] = None) -> UserCache:
+    app = app or current_app
+    return app.extensions["user_cache"]
+
+
+def _load_user(user_id: str) -> Optional[User]:
+    return get_user_cache().load(user_id)
+
+
+def _on_cache_invalidated(sender, tables=frozenset(), keys=None, **extra) -> None:
+    # Sent for this worker's invalidations and for broadcasts from the others
+    cache = sender.extensions.get("user_cache") if sender is not None else None
+    if cache is None or User.__tablename__ not in tables:
+        return
+    if keys is None:
+        cache.drop()
+    else:
+        cache.drop(row_id for table, row_id in keys if table == User.__tablename__)
+
+
+cache_invalidated.connect(_on_cache_invalidated, weak=False)
@@ -0,0 +1,530 @@
+"""Cache shared by every worker, with invalidation broadcast on commit.
+
+Per-worker caches go stale under Gunicorn: an admin write handled by one worker is
+invisible to the caches of the others. With CACHE_URL set, each app gets a ``SharedCache``:
+
+* A small in-process copy in front of a backend that every worker can reach:
+  ``file:///path`` (one host: a directory, ideally on /dev/shm), ``redis://...`` (several
+  hosts, needs the redis package) or ``memory://name`` (an in-process stand-in for tests:
+  apps built with the same name act like separate workers).
+* After a commit that changed display content (``content_changed``), the committing worker
+  drops the affected namespaces and broadcasts the changed tables and keys. Every other
+  worker drops its copies as soon as the message arrives. The file backend sends it as a
+  datagram to a Unix socket per worker, and Redis uses pub/sub, so delivery takes
+  milliseconds.
+
+Per-worker caches that are not stored in the backend, such as sign views, listen to
+``cache_invalidated``. It fires for local commits and for broadcasts from other workers.
+
+The settings row, the icon stamp and fresh weather are cached. Without CACHE_URL nothing
+is, and those lookups query the database on every request, as before.
+Entries also expire after CACHE_TTL seconds, which bounds the damage when a broadcast is lost.
+
+Each namespace has a generation token in the backend, and entries are stored under it.
+Invalidation writes a new token, so a worker that loaded a row before a commit and stores
+it afterwards writes it under the old generation, where nobody looks. Values are stored as
+JSON (with tags for dates, times and tuples), so nothing in the shared directory or in Redis
+is ever unpickled. A backend that fails is logged and skipped: lookups fall back to the
+database.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from datetime import time as dtime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from blinker import Namespace
+from flask import Flask, current_app
+from sqlalchemy.orm import make_transient_to_detached
+
+from .content import content_changed
+from .extensions import db
+from .models import Icon, SiteSettings, WeatherCache
+
+logger = logging.getLogger(__name__)
+
+_signals = Namespace()
+cache_invalidated = _signals.signal("cache-invalidated")
+
+# Namespace -> the table whose commits invalidate it
+NAMESPACE_TABLES = {
+    "settings": SiteSettings.__tablename__,
+    "icons": Icon.__tablename__,
+    "weather": WeatherCache.__tablename__,
+}
+# Datagrams and pub/sub messages stay well below every transport's limit
+MAX_MESSAGE_BYTES = 60000
+# Generation tokens outlive any entry stored under them
+GENERATION_TTL = 30 * 24 * 3600
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, dtime):
+        return {"__time__": value.isoformat()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode_tagged(obj: dict) -> Any:
+    if len(obj) == 1:
+        (tag, value), = obj.items()
+        if tag == "__datetime__":
+            return datetime.fromisoformat(value)
+        if tag == "__date__":
+            return date.fromisoformat(value)
+        if tag == "__time__":
+            return dtime.fromisoformat(value)
+        if tag == "__tuple__":
+            return tuple(value)
+    return obj
+
+
+def dumps(value: Any) -> bytes:
+    """JSON for the plain values the cache holds: rows as dicts, stamps as tuples, forecasts."""
+    return json.dumps(_encode(value), separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return json.loads(data, object_hook=_decode_tagged)
+
+
+class MemoryBackend:
+    """In-process stand-in for a networked backend; backends with the same name share it."""
+
+    _hubs: Dict[str, dict] = {}
+    _hubs_lock = threading.Lock()
+
+    def __init__(self, name: str):
+        with self._hubs_lock:
+            self.hub = self._hubs.setdefault(
+                name, {"store": {}, "subscribers": [], "lock": threading.Lock()}
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.hub["lock"]:
+            entry = self.hub["store"].get(key)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self.hub["lock"]:
+            self.hub["store"][key] = (time.time() + ttl, value)
+
+    def delete_namespace(self, namespace: str) -> None:
+        with self.hub["lock"]:
+            for key in [k for k in self.hub["store"] if k.startswith(f"{namespace}/")]:
+                del self.hub["store"][key]
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> None:
+        with self.hub["lock"]:
+            self.hub["subscribers"].append(callback)
+
+    def listen(self) -> None:
+        pass
+
+    def publish(self, message: bytes) -> None:
+        with self.hub["lock"]:
+            subscribers = list(self.hub["subscribers"])
+        for callback in subscribers:
+            callback(message)
+
+
+class FileBackend:
+    """Single host: one file per entry, and a Unix datagram socket per worker for broadcasts."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.bus = os.path.join(directory, "bus")
+        os.makedirs(self.bus, exist_ok=True)
+        self._sock: Optional[socket.socket] = None
+        self._sock_path: Optional[str] = None
+        self._callbacks: List[Callable[[bytes], None]] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        namespace, _, rest = key.partition("/")
+        return os.path.join(
+            self.directory, "data", namespace, hashlib.sha1(rest.encode("utf-8")).hexdigest()
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                expires = float(f.readline())
+                if expires < time.time():
+                    return None
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        # Directories are (re)created on demand: the master may clear the cache directory
+        # after a preloaded app built this backend
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(f"{time.time() + ttl}\n".encode("ascii"))
+            f.write(value)
+        os.replace(tmp, path)
+
+    def delete_namespace(self, namespace: str) -> None:
+        path = os.path.join(self.directory, "data", namespace)
+        # Moved aside first, so readers never see a half-deleted namespace
+        doomed = f"{path}.deleted-{uuid.uuid4().hex}"
+        try:
+            os.rename(path, doomed)
+        except OSError:
+            return
+        shutil.rmtree(doomed, ignore_errors=True)
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> None:
+        self._callbacks.append(callback)
+        self.listen()
+
+    def listen(self) -> None:
+        # Sockets and threads do not survive a fork, so each worker opens its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid() or not self._callbacks:
+                return
+            os.makedirs(self.bus, exist_ok=True)
+            self._pid = os.getpid()
+            self._sock_path = os.path.join(self.bus, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(self._sock_path)
+            threading.Thread(
+                target=self._receive, args=(self._sock,), name="cache-bus", daemon=True
+            ).start()
+
+    def _receive(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                message = sock.recv(MAX_MESSAGE_BYTES + 1024)
+            except OSError:
+                return
+            for callback in self._callbacks:
+                try:
+                    callback(message)
+                except Exception:
+                    logger.exception("Cache invalidation failed")
+
+    def publish(self, message: bytes) -> None:
+        self.listen()
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            if not os.path.isdir(self.bus):
+                return
+            for entry in os.scandir(self.bus):
+                if not entry.name.endswith(".sock") or entry.path == self._sock_path:
+                    continue
+                try:
+                    sender.sendto(message, entry.path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # A worker that exited; its socket file is left behind
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+                except BlockingIOError:
+                    logger.warning(
+                        "Cache invalidation to %s dropped: receiver is backed up", entry.name
+                    )
+        finally:
+            sender.close()
+
+
+class RedisBackend:
+    """Several hosts: entries and broadcasts go through Redis."""
+
+    def __init__(self, url: str):
+        import redis  # deferred: optional dependency, only for CACHE_URL=redis://
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = "welcome-board:invalidate"
+        self._callbacks: List[Callable[[bytes], None]] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(f"welcome-board:{key}")
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(f"welcome-board:{key}", value, px=max(1, int(ttl * 1000)))
+
+    def delete_namespace(self, namespace: str) -> None:
+        keys = list(self.client.scan_iter(match=f"welcome-board:{namespace}/*", count=500))
+        if keys:
+            self.client.delete(*keys)
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> None:
+        self._callbacks.append(callback)
+        self.listen()
+
+    def listen(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid() or not self._callbacks:
+                return
+            self._pid = os.getpid()
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: lambda m: [cb(m["data"]) for cb in self._callbacks]})
+            pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, message: bytes) -> None:
+        self.listen()
+        self.client.publish(self.channel, message)
+
+
+def make_backend(url: Optional[str]):
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend(parsed.netloc or parsed.path)
+    if parsed.scheme == "file":
+        return FileBackend(parsed.path)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
+
+
+_MISSING = object()
+
+
+class SharedCache:
+    def __init__(self, app: Flask, backend=None, ttl_seconds: float = 300):
+        self.app = app
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.origin = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self.invalidations_received = 0
+        self._local: Dict[str, Tuple[float, Any]] = {}
+        self._epochs: Dict[str, int] = {}  # bumped when a namespace is dropped here
+        self._lock = threading.Lock()
+        if backend is not None:
+            backend.subscribe(self._on_message)
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _generation(self, namespace: str) -> str:
+        token = self.backend.get(f"_generation/{namespace}")
+        return token.decode("ascii") if token else "0"
+
+    def listen(self) -> None:
+        """Receive other workers' broadcasts from now on (lookups start this too)."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.listen()
+        except Exception:
+            logger.exception("Shared cache listener failed to start")
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        value = self._get(namespace, key)[0]
+        return default if value is _MISSING else value
+
+    def _get(self, namespace: str, key: str) -> Tuple[Any, Optional[str]]:
+        """The cached value (or _MISSING) and the generation it was looked up under."""
+        if self.backend is None:
+            return _MISSING, None
+        full_key = f"{namespace}/{key}"
+        epoch = self._epoch(namespace)
+        with self._lock:
+            entry = self._local.get(full_key)
+        if entry is not None and entry[0] > time.time():
+            self.hits += 1
+            return entry[1], None
+        try:
+            self.backend.listen()
+            generation = self._generation(namespace)
+            data = self.backend.get(f"{namespace}/{generation}/{key}")
+            value = loads(data) if data is not None else _MISSING
+        except Exception:
+            logger.exception("Shared cache lookup failed; using the database")
+            return _MISSING, None
+        if value is _MISSING:
+            self.misses += 1
+            return _MISSING, generation
+        self.hits += 1
+        self._store_local(namespace, full_key, value, self.ttl_seconds, epoch)
+        return value, generation
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None,
+            generation: Optional[str] = None, epoch: Optional[int] = None) -> None:
+        """Store ``value``; given the ``generation``/``epoch`` read before building it, only if
+        still current."""
+        if self.backend is None:
+            return
+        ttl = min(ttl, self.ttl_seconds) if ttl is not None else self.ttl_seconds
+        if ttl <= 0:
+            return
+        try:
+            if generation is None:
+                generation = self._generation(namespace)
+            self.backend.set(f"{namespace}/{generation}/{key}", dumps(value), ttl)
+        except Exception:
+            logger.exception("Shared cache write failed")
+            return
+        self._store_local(namespace, f"{namespace}/{key}", value, ttl,
+                          self._epoch(namespace) if epoch is None else epoch)
+
+    def remember(
+        self, namespace: str, key: str, build: Callable[[], Any], ttl: Optional[float] = None
+    ) -> Any:
+        """Cached value, or ``build()``'s result stored for next time.
+
+        Calls ``build`` when disabled.
+        """
+        if self.backend is None:
+            return build()
+        epoch = self._epoch(namespace)
+        value, generation = self._get(namespace, key)
+        if value is _MISSING:
+            value = build()
+            if generation is not None:
+                # Under the generation read before build(): if a commit invalidated the
+                # namespace meanwhile, the possibly stale value lands where nobody reads
+                self.set(namespace, key, value, ttl, generation=generation, epoch=epoch)
+        return value
+
+    def _epoch(self, namespace: str) -> int:
+        return self._epochs.get(namespace, 0)
+
+    def _store_local(
+        self, namespace: str, full_key: str, value: Any, ttl: float, epoch: int
+    ) -> None:
+        with self._lock:
+            # Not if this worker dropped the namespace after the value was read
+            if self._epochs.get(namespace, 0) == epoch:
+                self._local[full_key] = (time.time() + ttl, value)
+
+    def _drop_local(self, namespaces: Iterable[str]) -> None:
+        prefixes = tuple(f"{namespace}/" for namespace in namespaces)
+        if not prefixes:
+            return
+        with self._lock:
+            for namespace in namespaces:
+                self._epochs[namespace] = self._epochs.get(namespace, 0) + 1
+            for key in [k for k in self._local if k.startswith(prefixes)]:
+                del self._local[key]
+
+    def invalidate(
+        self, tables: Iterable[str], keys: Optional[Iterable[tuple]] = None, broadcast: bool = True
+    ) -> None:
+        """Drop what a change to ``tables``/``keys`` made stale, here and (by default) in every
+        worker."""
+        tables = frozenset(tables)
+        keys = frozenset(tuple(k) for k in keys) if keys is not None else None
+        namespaces = [ns for ns, table in NAMESPACE_TABLES.items() if table in tables]
+        self._drop_local(namespaces)
+        if self.backend is not None and broadcast:
+            try:
+                for namespace in namespaces:
+                    self.backend.set(
+                        f"_generation/{namespace}", uuid.uuid4().hex.encode("ascii"), GENERATION_TTL
+                    )
+                    self.backend.delete_namespace(namespace)
+                self.backend.publish(self._message(tables, keys))
+            except Exception:
+                logger.exception("Cache invalidation broadcast failed")
+        cache_invalidated.send(self.app, tables=tables, keys=keys)
+
+    def _message(self, tables: frozenset, keys: Optional[frozenset]) -> bytes:
+        payload = {
+            "origin": self.origin,
+            "tables": sorted(tables),
+            "keys": sorted(keys) if keys is not None else None,
+        }
+        message = json.dumps(payload).encode("utf-8")
+        if len(message) > MAX_MESSAGE_BYTES:
+            # Too many rows to list: receivers drop everything built from these tables
+            payload["keys"] = None
+            message = json.dumps(payload).encode("utf-8")
+        return message
+
+    def _on_message(self, message: bytes) -> None:
+        payload = json.loads(message)
+        if payload.get("origin") == self.origin:
+            return
+        self.invalidations_received += 1
+        keys = payload.get("keys")
+        self.invalidate(
+            payload["tables"],
+            [tuple(k) for k in keys] if keys is not None else None,
+            broadcast=False,
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+def init_app(app: Flask) -> SharedCache:
+    backend = make_backend(app.config.get("CACHE_URL"))
+    cache = SharedCache(app, backend, float(app.config.get("CACHE_TTL", 300)))
+    app.extensions["shared_cache"] = cache
+    return cache
+
+
+def get_cache(app: Optional[Flask] = None) -> SharedCache:
+    app = app or current_app
+    return app.extensions["shared_cache"]
+
+
+def _row_values(row) -> Optional[dict]:
+    if row is None:
+        return None
+    return {attr.key: getattr(row, attr.key) for attr in row.__mapper__.column_attrs}
+
+
+def remember_row(namespace: str, key: str, model, load: Callable[[], Any]):
+    """A row from the shared cache, merged into the session without a query, or ``load()``'s
+    result."""
+    cache = get_cache()
+    if not cache.enabled:
+        return load()
+    values = cache.remember(namespace, key, lambda: _row_values(load()))
+    if values is None:
+        return None
+    row = model(**values)
+    make_transient_to_detached(row)
+    return db.session.merge(row, load=False)
+
+
+def _on_content_changed(sender, tables=frozenset(), keys=frozenset(), **extra) -> None:
+    cache = sender.extensions.get("shared_cache") if sender is not None else None
+    if cache is not None:
+        cache.invalidate(tables, keys)
+
+
+content_changed.connect(_on_content_changed, weak=False)
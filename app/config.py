@@ -6,13 +6,83 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
+    APP_PROFILE = os.getenv("APP_PROFILE", "full")  # full, or display for kiosk-serving nodes
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or f"sqlite:///{BASE_DIR}/instance/app.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # merged over the backend profile from app/database.py
+    DB_PROFILE = os.getenv("DB_PROFILE", "auto")  # auto or none
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # shared by all gunicorn workers; unset keeps metrics per process
+    METRICS_DIR = os.getenv("METRICS_DIR")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # bearer token for scrapers of /metrics
+    # serve /metrics without a token or login
+    METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0.01"))
+    PROFILER_MODE = os.getenv("PROFILER_MODE", "cprofile")  # cprofile or sample
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_DIR = os.getenv("PROFILER_DIR")  # defaults to instance/profiles
+    PROFILER_KEEP = int(os.getenv("PROFILER_KEEP", "200"))
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+    # for requests without a traceparent
+    TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")  # file or otlp
+    TRACING_FILE = os.getenv("TRACING_FILE")  # defaults to instance/traces.jsonl
+    TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT")  # e.g. http://collector:4318
+    TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "welcome-board")
+    # 0 disables the log
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+    # unset: compile templates per process
+    JINJA_BYTECODE_CACHE_DIR = os.getenv("JINJA_BYTECODE_CACHE_DIR")
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")  # unset: no static sign snapshots for nginx
+    SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "5"))  # published versions kept on disk
+    SYNC_TOKEN = os.getenv("SYNC_TOKEN")  # bearer token for /sync/changes; unset disables the feed
+    SYNC_SOURCE_URL = os.getenv("SYNC_SOURCE_URL")  # edge replicas: central server to pull from
+    SYNC_STATE_FILE = os.getenv("SYNC_STATE_FILE")  # defaults to instance/sync-revision
+    # how long a missing revision may be an open transaction
+    SYNC_GAP_SECONDS = float(os.getenv("SYNC_GAP_SECONDS", "300"))
+    # content_changes kept; 0 keeps everything
+    SYNC_RETENTION_DAYS = float(os.getenv("SYNC_RETENTION_DAYS", "30"))
+    # kiosk check-updates interval
+    POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "5"))
+    # longest idle backoff
+    POLL_MAX_INTERVAL_SECONDS = int(os.getenv("POLL_MAX_INTERVAL_SECONDS", "60"))
+    # interval doubles per idle period; 0 disables
+    POLL_IDLE_AFTER_SECONDS = int(os.getenv("POLL_IDLE_AFTER_SECONDS", "3600"))
+    # X-Request-Start queue time that sheds polls; 0 disables
+    POLL_BUSY_QUEUE_MS = float(os.getenv("POLL_BUSY_QUEUE_MS", "500"))
+    # load average per CPU that sheds polls; 0 disables
+    POLL_BUSY_LOAD = float(os.getenv("POLL_BUSY_LOAD", "0"))
+    # Retry-After sent while busy
+    POLL_BUSY_RETRY_AFTER = int(os.getenv("POLL_BUSY_RETRY_AFTER", "30"))
+    # longer schedules render the current plus this many upcoming items; 0 renders all
+    SIGN_WINDOW_ITEMS = int(os.getenv("SIGN_WINDOW_ITEMS", "25"))
+    # act at midnight and item boundaries
+    TRANSITION_SCHEDULER = os.getenv("TRANSITION_SCHEDULER", "true").lower() in ("1", "true", "yes")
+    # render tomorrow's sign this early
+    TRANSITION_PRERENDER_SECONDS = float(os.getenv("TRANSITION_PRERENDER_SECONDS", "60"))
+    # re-read schedules at least this often
+    TRANSITION_REPLAN_SECONDS = float(os.getenv("TRANSITION_REPLAN_SECONDS", "300"))
+    # file:///dev/shm/..., redis://... or memory://name; unset: no shared cache
+    CACHE_URL = os.getenv("CACHE_URL")
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))  # upper bound on any shared cache entry
+    # s-maxage for display responses; 0: proxies revalidate
+    EDGE_CACHE_TTL = int(os.getenv("EDGE_CACHE_TTL", "0"))
+    # none, stub, nginx or package.module:Class
+    EDGE_CACHE_PURGER = os.getenv("EDGE_CACHE_PURGER", "none")
+    EDGE_CACHE_PURGE_URL = os.getenv("EDGE_CACHE_PURGE_URL")  # nginx purger: e.g. http://127.0.0.1
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", str(BASE_DIR / "app" / "static" / "uploads"))
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB limit for file uploads
     TIMEZONE = os.getenv("TIMEZONE", "UTC")
     WEATHER_TTL_MINUTES = int(os.getenv("WEATHER_TTL_MINUTES", "60"))
+    WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))  # 0 disables the cache
 
 
 class DevConfig(BaseConfig):
@@ -0,0 +1,115 @@
+"""Change tracking for the content shown on displays.
+
+Two rules are applied to every ORM flush:
+
+* Any change to a schedule's items touches the schedule's ``updated_at``. Displays poll that
+  timestamp, and cached display views are keyed on it, so an item edit from any route is
+  picked up without each route remembering to bump it.
+* After a commit that changed display content, ``content_changed`` is sent with the set of
+  table names involved and the ``(table, id)`` keys of the existing rows that changed, so
+  per-worker caches can drop only what they built from those rows.
+  Weather refreshes count as display content too (the sign shows the forecast).
+
+Every flushed schedule, icon, settings or display row is also appended to ``content_changes``. The
+row ids are the revisions that edge replicas sync by (see ``app/sync``). An item change
+is logged as a change to its schedule, since schedules are synced together with their items.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Set, Tuple
+
+from blinker import Namespace
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from .models import ContentChange, Display, Icon, Schedule, ScheduleItem, SiteSettings, WeatherCache
+
+_signals = Namespace()
+content_changed = _signals.signal("content-changed")
+
+CONTENT_MODELS = (Schedule, ScheduleItem, Icon, SiteSettings, WeatherCache, Display)
+# Models logged to content_changes, by the entity name the sync feed uses
+SYNCED_ENTITIES = {Schedule: "schedule", Icon: "icon", SiteSettings: "settings", Display: "display"}
+
+
+def _changed_tables(session: Session) -> Set[str]:
+    return session.info.setdefault("content_changed_tables", set())
+
+
+def _changed_keys(session: Session) -> Set[Tuple[str, int]]:
+    return session.info.setdefault("content_changed_keys", set())
+
+
+def _before_flush(session: Session, flush_context, instances) -> None:
+    tables = _changed_tables(session)
+    keys = _changed_keys(session)
+    touched_schedules: Set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, CONTENT_MODELS):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        tables.add(obj.__tablename__)
+        if obj.id is not None:
+            keys.add((obj.__tablename__, obj.id))
+        if isinstance(obj, ScheduleItem) and obj.schedule_id is not None:
+            touched_schedules.add(obj.schedule_id)
+    if not touched_schedules:
+        return
+    now = datetime.utcnow()
+    with session.no_autoflush:
+        for schedule_id in touched_schedules:
+            schedule = session.get(Schedule, schedule_id)
+            if schedule is not None and schedule not in session.deleted:
+                schedule.updated_at = now
+                tables.add(Schedule.__tablename__)
+                keys.add((Schedule.__tablename__, schedule_id))
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes = {}
+    for deleted, objects in ((False, session.new), (False, session.dirty), (True, session.deleted)):
+        for obj in objects:
+            entity = SYNCED_ENTITIES.get(type(obj))
+            if entity is None or obj.id is None:
+                continue
+            if not deleted and obj in session.dirty and not session.is_modified(obj):
+                continue
+            changes[(entity, obj.id)] = deleted
+    if changes:
+        session.execute(
+            insert(ContentChange),
+            [
+                {
+                    "entity": entity,
+                    "entity_id": entity_id,
+                    "deleted": deleted,
+                    "changed_at": datetime.utcnow(),
+                }
+                for (entity, entity_id), deleted in sorted(changes.items())
+            ],
+        )
+
+
+def _after_commit(session: Session) -> None:
+    tables = session.info.pop("content_changed_tables", None)
+    keys = session.info.pop("content_changed_keys", None) or ()
+    if tables:
+        sender = current_app._get_current_object() if has_app_context() else None
+        content_changed.send(sender, tables=frozenset(tables), keys=frozenset(keys))
+
+
+def _after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop("content_changed_tables", None)
+    session.info.pop("content_changed_keys", None)
+
+
+def install() -> None:
+    """Register the session hooks once per process (they apply to every Session)."""
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_soft_rollback", _after_rollback)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from .extensions import db
+
+
+@dataclass
+class EngineProfile:
+    name: str
+    engine_options: Dict[str, Any] = field(default_factory=dict)
+    pragmas: Dict[str, Any] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        parts = [f"{k}={v}" for k, v in self.pragmas.items()]
+        parts += [f"{k}={v}" for k, v in self.engine_options.items() if k != "connect_args"]
+        return f"{self.name} ({', '.join(parts) or 'defaults'})"
+
+
+def sqlite_profile(config) -> EngineProfile:
+    # WAL lets the kiosk readers keep reading while an admin write commits;
+    # NORMAL sync is durable across app crashes in WAL mode and skips an fsync per commit.
+    busy_ms = int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    return EngineProfile(
+        name="sqlite",
+        engine_options={"connect_args": {"timeout": busy_ms / 1000}},
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": busy_ms,
+            "mmap_size": int(config.get("SQLITE_MMAP_BYTES", 256 * 1024 * 1024)),
+            "temp_store": "MEMORY",
+            "cache_size": -20000,  # KiB
+        },
+    )
+
+
+def postgres_profile(config) -> EngineProfile:
+    # Recycling replaces pre-ping: no extra round trip per checkout, and connections
+    # are still refreshed before server-side idle timeouts close them.
+    return EngineProfile(
+        name="postgresql",
+        engine_options={
+            "pool_size": int(config.get("DB_POOL_SIZE", 5)),
+            "max_overflow": int(config.get("DB_MAX_OVERFLOW", 10)),
+            "pool_recycle": int(config.get("DB_POOL_RECYCLE", 1800)),
+            "pool_timeout": 10,
+            "pool_use_lifo": True,
+            "pool_pre_ping": bool(config.get("DB_POOL_PRE_PING", False)),
+            "query_cache_size": 1200,  # compiled-statement cache, SQLAlchemy default is 500
+        },
+    )
+
+
+def detect_profile(app: Flask) -> EngineProfile:
+    mode = (app.config.get("DB_PROFILE") or "auto").lower()
+    if mode == "none":
+        return EngineProfile(name="none")
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        profile = sqlite_profile(app.config)
+        if not url.database or url.database == ":memory:":
+            # WAL and mmap do not apply to in-memory databases
+            profile.pragmas = {
+                k: v for k, v in profile.pragmas.items() if k not in ("journal_mode", "mmap_size")
+            }
+        return profile
+    if url.get_backend_name() == "postgresql":
+        return postgres_profile(app.config)
+    return EngineProfile(name=url.get_backend_name())
+
+
+def configure_engine_options(app: Flask) -> EngineProfile:
+    """Merge the detected profile under any explicit SQLALCHEMY_ENGINE_OPTIONS.
+
+    Call before db.init_app.
+    """
+    profile = detect_profile(app)
+    options = dict(profile.engine_options)
+    options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    app.extensions["db_profile"] = profile
+    return profile
+
+
+def install_engine_profile(app: Flask) -> None:
+    """Apply connection-level settings once the engine exists and report the profile."""
+    profile = app.extensions.get("db_profile")
+    if profile is None:
+        return
+    if profile.pragmas:
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in profile.pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    app.logger.info("Database engine profile: %s", profile.describe())
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+diagnostics_bp = Blueprint("diagnostics", __name__, template_folder="../templates/diagnostics")
+
+from . import routes  # noqa: E402,F401
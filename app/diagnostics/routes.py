@@ -0,0 +1,74 @@
+import os
+from datetime import datetime
+
+from flask import (
+    abort,
+    current_app,
+    redirect,
+    render_template,
+    request,
+    send_from_directory,
+    url_for,
+)
+from flask_login import current_user
+
+from ..profiling import profile_token
+from ..slow_queries import get_slow_queries
+from ..users.routes import admin_required
+from . import diagnostics_bp
+
+
+def _profile_dir() -> str:
+    return current_app.config.get("PROFILER_DIR") or os.path.join(
+        current_app.instance_path, "profiles"
+    )
+
+
+@diagnostics_bp.route("/profiles")
+@admin_required
+def profiles():
+    directory = _profile_dir()
+    files = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            files.append({
+                "name": name,
+                "size": os.path.getsize(path),
+                "modified": datetime.fromtimestamp(os.path.getmtime(path)),
+            })
+    files.sort(key=lambda f: f["modified"], reverse=True)
+
+    # Signed link that profiles one page load, e.g. the sign on a slow kiosk
+    target = request.args.get("path") or url_for("display.sign")
+    separator = "&" if "?" in target else "?"
+    token = profile_token(current_user.id)
+    profile_link = f"{request.host_url.rstrip('/')}{target}{separator}_profile={token}"
+    return render_template(
+        "diagnostics/profiles.html",
+        files=files,
+        target=target,
+        profile_link=profile_link,
+    )
+
+
+@diagnostics_bp.route("/profiles/<path:name>")
+@admin_required
+def download_profile(name: str):
+    if os.sep in name or name.startswith("."):
+        abort(404)
+    return send_from_directory(_profile_dir(), name, as_attachment=True)
+
+
+@diagnostics_bp.route("/slow-queries", methods=["GET", "POST"])
+@admin_required
+def slow_query_log():
+    slow_queries = get_slow_queries()
+    if request.method == "POST":
+        slow_queries.clear()
+        return redirect(url_for("diagnostics.slow_query_log"))
+    return render_template(
+        "diagnostics/slow_queries.html",
+        entries=slow_queries.recent(),
+        threshold_ms=slow_queries.threshold_ms,
+    )
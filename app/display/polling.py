@@ -0,0 +1,67 @@
+"""How long a kiosk should wait before its next check-updates poll.
+
+Kiosks that all poll every 5 seconds stay in lockstep after a power cut or a deploy and
+hit the server in synchronized spikes. Instead, check-updates tells each kiosk when to ask
+again (``poll_after``, in seconds), and the page adds ±20% jitter:
+
+* POLL_INTERVAL_SECONDS normally.
+* Doubled for every POLL_IDLE_AFTER_SECONDS without a settings, display or schedule edit,
+  up to POLL_MAX_INTERVAL_SECONDS. A sign nobody has touched all day checks about once a minute.
+
+Transitions (midnight, item starts and ends) are not folded in: the payload's
+``next_transition`` lets the page check just after one, spread over a few seconds.
+
+Under load the response also carries ``Retry-After``. The server counts as busy when
+requests wait in the queue for longer than POLL_BUSY_QUEUE_MS (from nginx's
+``X-Request-Start``), or when the load average per CPU exceeds POLL_BUSY_LOAD.
+"""
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+from flask import Request, current_app
+
+
+def poll_delay(last_changes: Iterable[Optional[datetime]]) -> int:
+    """Recommended seconds until the next poll; ``last_changes`` are UTC ``updated_at`` values."""
+    config = current_app.config
+    base = int(config.get("POLL_INTERVAL_SECONDS", 5))
+    ceiling = max(base, int(config.get("POLL_MAX_INTERVAL_SECONDS", 60)))
+    idle_after = int(config.get("POLL_IDLE_AFTER_SECONDS", 3600))
+
+    delay = base
+    stamps = [stamp for stamp in last_changes if stamp is not None]
+    if stamps and idle_after > 0:
+        idle = (datetime.utcnow() - max(stamps)).total_seconds()
+        doublings = int(idle // idle_after)
+        delay = min(ceiling, base * 2 ** min(doublings, 16))
+    return delay
+
+
+def _queue_ms(request: Request) -> Optional[float]:
+    header = request.headers.get("X-Request-Start", "")
+    try:
+        started = float(header.removeprefix("t="))
+    except ValueError:
+        return None
+    # nginx's $msec is seconds; other proxies send milliseconds or microseconds
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, (time.time() - started) * 1000)
+
+
+def busy_retry_after(request: Request) -> Optional[int]:
+    """Seconds kiosks should back off for when the server is overloaded, else None."""
+    config = current_app.config
+    queue_threshold = float(config.get("POLL_BUSY_QUEUE_MS", 500))
+    load_threshold = float(config.get("POLL_BUSY_LOAD", 0))
+    queued = _queue_ms(request)
+    busy = queue_threshold > 0 and queued is not None and queued > queue_threshold
+    if not busy and load_threshold > 0 and hasattr(os, "getloadavg"):
+        busy = os.getloadavg()[0] / (os.cpu_count() or 1) > load_threshold
+    return int(config.get("POLL_BUSY_RETRY_AFTER", 30)) if busy else None
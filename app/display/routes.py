@@ -1,61 +1,178 @@
-from flask import render_template, jsonify
+from datetime import date, datetime
+from typing import Optional, Tuple
+from flask import abort, current_app, g, render_template, jsonify, make_response, request
 from . import display_bp
-from ..models import Schedule, ScheduleItem, SiteSettings, Icon
+from .. import tracing
+from ..cache import remember_row
+from ..edge_cache import surrogate_keys
+from ..extensions import db
+from ..models import Display, Schedule, SiteSettings
 from ..services.weather import get_weather
-from datetime import date
-from sqlalchemy import desc, nullslast, or_, and_
+from ..transitions import next_midnight, next_transition, site_minute, site_today, site_zone
+from .polling import busy_retry_after, poll_delay
+from .viewmodel import build_weather, sign_view
 
 
-@display_bp.route("/")
-def sign():
-    settings = SiteSettings.query.first()
-    today = date.today()
-    
-    # Find active schedule: 
-    # - If date is provided and matches today, schedule is active (regardless of is_active flag)
-    # - If date is not provided, schedule is active based on is_active flag
-    active = Schedule.query.filter(
-        or_(
-            Schedule.date == today,
-            and_(Schedule.date == None, Schedule.is_active == True)
+MAX_ITEMS_PER_FETCH = 100
+
+
+def _display(slug: Optional[str]) -> Optional[Display]:
+    if slug is None:
+        return None
+    return Display.query.filter_by(slug=slug).first_or_404()
+
+
+def resolve(
+    display: Optional[Display], day: Optional[date] = None
+) -> Tuple[Optional[SiteSettings], Optional[Schedule]]:
+    """Settings and schedule for a display, or for the default sign when ``display`` is None.
+
+    ``day`` defaults to today in the site's timezone.
+    """
+    with tracing.span("sign.settings"):
+        settings = remember_row(
+            "settings", "site", SiteSettings, lambda: SiteSettings.query.first()
         )
-    ).order_by(nullslast(desc(Schedule.date))).first()
-    
-    items = []
-    if active:
-        items = ScheduleItem.query.filter_by(schedule_id=active.id).order_by(ScheduleItem.start_time).all()
-    weather = get_weather(settings.latitude if settings else None, settings.longitude if settings else None, (settings.timezone if settings and settings.timezone else "UTC"))
-    # Load all icons for display
-    icons = {icon.name: icon for icon in Icon.query.all()}
-    return render_template("display/sign.html", settings=settings, schedule=active, items=items, weather=weather, icons=icons)
-
-
-@display_bp.route("/check-updates")
-def check_updates():
-    """Lightweight endpoint to check if settings or schedule have been updated"""
-    settings = SiteSettings.query.first()
-    today = date.today()
-    
-    # Find active schedule: 
+
+    # Find active schedule:
+    # - A named display with an assigned schedule always shows it
     # - If date is provided and matches today, schedule is active (regardless of is_active flag)
     # - If date is not provided, schedule is active based on is_active flag
-    active = Schedule.query.filter(
-        or_(
-            Schedule.date == today,
-            and_(Schedule.date == None, Schedule.is_active == True)
+    with tracing.span("sign.schedule"):
+        schedule = None
+        if display is not None and display.schedule_id is not None:
+            schedule = db.session.get(Schedule, display.schedule_id)
+        if schedule is None:
+            schedule = Schedule.active_on(day or site_today(settings))
+    # Proxies may keep what this builds until the site's next midnight, at most
+    g.content_until = next_midnight(settings)
+    return settings, schedule
+
+
+def settings_stamp(settings: Optional[SiteSettings], display: Optional[Display]) -> Optional[str]:
+    """Kiosks reload when this changes; a display's own edits count as settings changes."""
+    stamps = [row.updated_at for row in (settings, display) if row is not None and row.updated_at]
+    return max(stamps).isoformat() if stamps else None
+
+
+@display_bp.route("/", defaults={"slug": None})
+@display_bp.route("/<slug>/")
+def sign(slug=None):
+    return render_sign(_display(slug))
+
+
+def render_sign(
+    display: Optional[Display] = None, day: Optional[date] = None, now: Optional[datetime] = None
+) -> str:
+    settings, active = resolve(display, day)
+    g.surrogate_keys = surrogate_keys(display, active)
+
+    with tracing.span("sign.view") as span:
+        view = sign_view(settings, active, display)
+        span.set_attribute("items.count", len(view.items))
+        # Rendered ahead for a later day: nothing has started yet
+        minute = (
+            -1
+            if day is not None and day > site_today(settings, now)
+            else site_minute(settings, now)
+        )
+        now_next = view.index.at(minute)
+        shown = sign_window(view, minute)
+        span.set_attribute("items.rendered", len(shown))
+    with tracing.span("sign.weather"):
+        weather = get_weather(
+            settings.latitude if settings else None,
+            settings.longitude if settings else None,
+            (settings.timezone if settings and settings.timezone else "UTC"),
         )
-    ).order_by(nullslast(desc(Schedule.date))).first()
-    
+    return render_template(
+        "display/sign.html",
+        view=view,
+        weather=build_weather(weather),
+        slug=display.slug if display else None,
+        settings_stamp=settings_stamp(settings, display),
+        now_next=now_next,
+        site_timezone=str(site_zone(settings)),
+        rows=[(i, view.items[i]) for i in shown],
+        later=len(view.items) - shown.stop,
+        window_items=current_app.config.get("SIGN_WINDOW_ITEMS", 0),
+    )
+
+
+def sign_window(view, minute: int) -> range:
+    """Positions of the items the sign renders up front: all of them, or a window around now."""
+    count = int(current_app.config.get("SIGN_WINDOW_ITEMS", 0))
+    if count <= 0 or len(view.items) <= count:
+        return range(len(view.items))
+    return view.index.window(minute, count)
+
+
+@display_bp.route("/items", defaults={"slug": None})
+@display_bp.route("/<slug>/items")
+def sign_items(slug=None):
+    """Rendered items ``start`` to ``start + count`` of the sign's schedule, for windowed signs.
+
+    ``v`` is the schedule version the page was built from; after an edit the positions no
+    longer line up, so the page gets a 409 and reloads. Not cached by shared caches (see
+    ``app/edge_cache.py``).
+    """
+    display = _display(slug)
+    settings, active = resolve(display)
+    view = sign_view(settings, active, display)
+    if request.args.get("v") != view.schedule_stamp:
+        abort(409)
+    start = max(0, request.args.get("start", 0, type=int))
+    count = min(max(0, request.args.get("count", 0, type=int)), MAX_ITEMS_PER_FETCH)
+    shown = range(start, min(start + count, len(view.items)))
+    now_next = view.index.at(site_minute(settings))
+    response = make_response(render_template(
+        "display/_items.html", rows=[(i, view.items[i]) for i in shown], now_next=now_next
+    ))
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@display_bp.route("/check-updates", defaults={"slug": None})
+@display_bp.route("/<slug>/check-updates")
+def check_updates(slug=None):
+    """Lightweight endpoint to check if settings or schedule have been updated"""
+    retry_after = busy_retry_after(request)
+    if retry_after is not None:
+        # Shed the poll before touching the database; the kiosk keeps its current page
+        response = jsonify({"poll_after": retry_after})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+    return jsonify(update_state(_display(slug)))
+
+
+@display_bp.after_request
+def add_cache_headers(response):
+    keys = g.pop("surrogate_keys", None)
+    cache = current_app.extensions.get("edge_cache")
+    until = g.pop("content_until", None)
+    return cache.tag(response, keys, until) if keys and cache else response
+
+
+def update_state(
+    display: Optional[Display] = None, day: Optional[date] = None, now: Optional[datetime] = None
+) -> dict:
+    """The change-detection payload kiosks poll; also written into published snapshots."""
+    settings, active = resolve(display, day)
+    g.surrogate_keys = surrogate_keys(display, active, sign=False)
+
     # Get timestamps for change detection
-    settings_timestamp = settings.updated_at.isoformat() if settings and settings.updated_at else None
+    settings_timestamp = settings_stamp(settings, display)
     schedule_timestamp = active.updated_at.isoformat() if active and active.updated_at else None
     schedule_id = active.id if active else None
-    
-    return jsonify({
+
+    return {
         "settings_updated_at": settings_timestamp,
         "schedule_updated_at": schedule_timestamp,
         "schedule_id": schedule_id,
-        "has_active_schedule": active is not None
-    })
-
-
+        "has_active_schedule": active is not None,
+        "poll_after": poll_delay(
+            row.updated_at for row in (settings, display, active) if row is not None
+        ),
+        "next_transition": next_transition(settings, active, now).isoformat(),
+    }
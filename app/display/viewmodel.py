@@ -0,0 +1,318 @@
+"""Ready-to-print view of the sign.
+
+Everything the sign template used to work out per render is resolved here instead: theme
+colours and background CSS, item times, and icon classes, image URLs or text glyphs. The
+result is built once per version of the content and reused by every kiosk poll that sees
+the same version. The version is read from the database (settings, display and schedule
+timestamps plus an icon stamp; settings and icons via the shared cache when one is
+configured), so every worker notices edits made through any other worker. A
+``cache_invalidated`` signal, sent for commits in this worker and broadcast from the others
+(see ``app/cache.py``), drops the views built from the changed rows straight away. Other
+displays keep theirs, so editing one room's schedule re-renders only the screens showing it.
+
+Named displays that show the same schedule with no look overrides of their own share one
+view.
+
+Each view carries the schedule's interval index (``app/services/schedule_index.py``). The sign
+uses it to mark the current, past and next items, on the server when rendering and on the page
+as the clock moves.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from flask import Flask, current_app, url_for
+from sqlalchemy import func
+
+from ..cache import cache_invalidated, get_cache
+from ..extensions import db
+from ..models import Display, Icon, Schedule, ScheduleItem, SiteSettings, WeatherCache
+from ..services.schedule_index import ScheduleIndex, schedule_index
+
+WEATHER_ICON_CLASSES = {
+    "sun": "bi-sun-fill",
+    "cloud": "bi-cloud",
+    "clouds": "bi-clouds-fill",
+    "cloud-fog": "bi-cloud-fog-fill",
+    "cloud-drizzle": "bi-cloud-drizzle-fill",
+    "cloud-rain": "bi-cloud-rain-fill",
+    "cloud-snow": "bi-snow",
+    "cloud-lightning": "bi-lightning-fill",
+}
+BUILTIN_ICON_CLASSES = {
+    "info": "bi-info-circle-fill",
+    "star": "bi-star-fill",
+    "flag": "bi-flag-fill",
+    "calendar": "bi-calendar-event-fill",
+    "clock": "bi-clock-fill",
+    "bell": "bi-bell-fill",
+    "exclamation": "bi-exclamation-triangle-fill",
+    "check": "bi-check-circle-fill",
+    "heart": "bi-heart-fill",
+    "fire": "bi-fire",
+    "trophy": "bi-trophy-fill",
+    "lightning": "bi-lightning-fill",
+    "shield": "bi-shield-fill",
+}
+BACKGROUND_CSS = {
+    # background_image_size: (background-size, background-repeat, background-position)
+    "tile": ("auto", "repeat", "top left"),
+    "stretch": ("100% 100%", "no-repeat", "center"),
+    "fit": ("contain", "no-repeat", "center"),
+}
+DEFAULT_BACKGROUND_CSS = ("cover", "no-repeat", "center")
+MAX_CACHED_VIEWS = 256
+_lock = threading.Lock()
+
+
+def hex_to_rgb(hex_color: Optional[str]) -> Tuple[int, int, int]:
+    hex_color = (hex_color or "").lstrip("#")
+    if len(hex_color) == 6:
+        try:
+            return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            pass
+    return (33, 37, 41)  # default dark gray
+
+
+def _rgba(hex_color: Optional[str], opacity: Optional[float]) -> str:
+    r, g, b = hex_to_rgb(hex_color or "#212529")
+    return f"rgba({r}, {g}, {b}, {opacity if opacity is not None else 1.0})"
+
+
+class DisplaySettings:
+    """Site settings as seen by one display: its overrides first, then the site-wide values."""
+
+    def __init__(self, site: Optional[SiteSettings], display: Display):
+        self._site = site
+        self._display = display
+        self.id = site.id if site else None
+        stamps = [s.updated_at for s in (site, display) if s is not None and s.updated_at]
+        self.updated_at = max(stamps) if stamps else None
+
+    def __getattr__(self, name):
+        if name in Display.OVERRIDES:
+            value = getattr(self._display, name)
+            if value is not None:
+                return value
+        return getattr(self._site, name) if self._site is not None else None
+
+
+def effective_settings(site: Optional[SiteSettings], display: Optional[Display]):
+    if display is None or not display.has_overrides:
+        return site
+    return DisplaySettings(site, display)
+
+
+class ThemeView:
+    __slots__ = (
+        "bg_color", "text_color", "box_rgba", "schedule_rgba", "logo_url", "logo_size",
+        "background_url", "background_size", "background_repeat", "background_position",
+        "notes_html",
+    )
+
+    def __init__(self, settings: Optional[SiteSettings]):
+        self.bg_color = (settings and settings.bg_color) or "#000000"
+        self.text_color = (settings and settings.text_color) or "#ffffff"
+        self.box_rgba = _rgba(
+            settings and settings.box_color, settings.box_opacity if settings else None
+        )
+        self.schedule_rgba = _rgba(
+            settings and settings.schedule_color, settings.schedule_opacity if settings else None
+        )
+        self.logo_url = (
+            url_for("static", filename=settings.logo_path)
+            if settings and settings.logo_path
+            else None
+        )
+        self.logo_size = (settings and settings.logo_size) or 120
+        self.background_url = (
+            url_for("static", filename=settings.background_image_path)
+            if settings and settings.background_image_path else None
+        )
+        self.background_size, self.background_repeat, self.background_position = BACKGROUND_CSS.get(
+            settings.background_image_size if settings else None, DEFAULT_BACKGROUND_CSS
+        )
+        self.notes_html = settings.notes_left_col if settings and settings.notes_left_col else None
+
+
+class IconView:
+    """One of: an image (``url``), a text glyph (``characters`` + ``font``) or a Bootstrap icon
+    (``css_class``)."""
+
+    __slots__ = ("url", "alt", "characters", "font", "css_class")
+
+    def __init__(self, url=None, alt=None, characters=None, font=None, css_class=None):
+        self.url = url
+        self.alt = alt
+        self.characters = characters
+        self.font = font
+        self.css_class = css_class
+
+
+class ItemView:
+    __slots__ = ("name", "time_range", "icon", "location", "uniform", "lead", "notes")
+
+    def __init__(self, item: ScheduleItem, icon: Optional[IconView]):
+        self.name = item.name
+        start = item.start_time.strftime("%H:%M") if item.start_time else ""
+        self.time_range = f"{start} - {item.end_time.strftime('%H:%M')}" if item.end_time else start
+        self.icon = icon
+        self.location = item.location
+        self.uniform = item.uniform
+        self.lead = item.lead
+        self.notes = item.notes
+
+
+class WeatherView:
+    __slots__ = ("label", "icon_class", "summary")
+
+    def __init__(self, key: str, slice_: Optional[dict]):
+        if not slice_:
+            self.label, self.icon_class, self.summary = key.capitalize(), None, "--"
+            return
+        self.label = slice_.get("label") or key.capitalize()
+        self.icon_class = (
+            WEATHER_ICON_CLASSES.get(slice_.get("icon"), "bi-cloud") if slice_.get("icon") else None
+        )
+        temp = slice_.get("temp_f")
+        self.summary = (
+            f"{slice_.get('summary')} • {temp:.0f}°F" if temp is not None else slice_.get("summary")
+        )
+
+
+class SignView:
+    __slots__ = ("theme", "schedule_id", "schedule_name", "items", "index", "schedule_stamp")
+
+    def __init__(
+        self,
+        schedule: Optional[Schedule],
+        items: List[ItemView],
+        theme: ThemeView,
+        index: ScheduleIndex,
+    ):
+        self.theme = theme
+        self.schedule_id = schedule.id if schedule else None
+        self.schedule_name = schedule.name if schedule and schedule.show_name else None
+        self.items = items
+        self.index = index  # positions match ``items``
+        # Timestamp the kiosk compares with check-updates (the settings one is per display)
+        self.schedule_stamp = (
+            schedule.updated_at.isoformat() if schedule and schedule.updated_at else None
+        )
+
+
+def build_weather(weather: Optional[dict]) -> List[WeatherView]:
+    return [
+        WeatherView(key, weather.get(key) if weather else None)
+        for key in ("morning", "noon", "afternoon")
+    ]
+
+
+def build_items(items: Iterable[ScheduleItem], icons: Dict[str, Icon]) -> List[ItemView]:
+    resolved: Dict[str, Optional[IconView]] = {}
+
+    def icon_view(name: Optional[str]) -> Optional[IconView]:
+        if not name:
+            return None
+        if name not in resolved:
+            custom = icons.get(name)
+            if custom is None:
+                resolved[name] = IconView(
+                    css_class=BUILTIN_ICON_CLASSES.get(name, "bi-circle-fill")
+                )
+            elif custom.image_path:
+                resolved[name] = IconView(
+                    url=url_for("static", filename=custom.image_path), alt=custom.name
+                )
+            elif custom.characters:
+                resolved[name] = IconView(characters=custom.characters, font=custom.font)
+            else:
+                resolved[name] = None  # custom icon with nothing to show
+        return resolved[name]
+
+    return [ItemView(item, icon_view(item.icon)) for item in items]
+
+
+def _icons_stamp() -> tuple:
+    return get_cache().remember(
+        "icons",
+        "stamp",
+        lambda: tuple(db.session.query(func.count(Icon.id), func.max(Icon.updated_at)).one()),
+    )
+
+
+def _cache(app: Flask) -> Dict[tuple, Tuple[SignView, FrozenSet[Tuple[str, int]]]]:
+    return app.extensions.setdefault("sign_views", {})
+
+
+def sign_view(
+    settings: Optional[SiteSettings],
+    schedule: Optional[Schedule],
+    display: Optional[Display] = None,
+) -> SignView:
+    """Return the SignView for this content version, building it on the first request that sees it.
+
+    ``display`` only matters when it overrides the look; otherwise the view is shared.
+    """
+    own_look = display if display is not None and display.has_overrides else None
+    key = (
+        settings.id if settings else None,
+        settings.updated_at if settings else None,
+        own_look.id if own_look else None,
+        own_look.updated_at if own_look else None,
+        schedule.id if schedule else None,
+        schedule.updated_at if schedule else None,
+        _icons_stamp(),
+    )
+    cache = _cache(current_app)
+    entry = cache.get(key)
+    if entry is None:
+        items: List[ScheduleItem] = []
+        if schedule is not None:
+            items = (
+                ScheduleItem.query.filter_by(schedule_id=schedule.id)
+                .order_by(ScheduleItem.start_time, ScheduleItem.id).all()
+            )
+        index = schedule_index(schedule, items) if schedule is not None else ScheduleIndex([])
+        icon_names = {item.icon for item in items if item.icon}
+        icons = (
+            {icon.name: icon for icon in Icon.query.filter(Icon.name.in_(icon_names))}
+            if icon_names
+            else {}
+        )
+        look = effective_settings(settings, own_look)
+        view = SignView(schedule, build_items(items, icons), ThemeView(look), index)
+        # Rows this view was built from, for targeted invalidation
+        deps = frozenset(
+            (model.__tablename__, row.id)
+            for model, row in ((SiteSettings, settings), (Display, own_look), (Schedule, schedule))
+            if row is not None
+        )
+        entry = (view, deps)
+        with _lock:
+            while len(cache) >= MAX_CACHED_VIEWS:
+                cache.pop(next(iter(cache)))  # oldest first
+            cache[key] = entry
+    return entry[0]
+
+
+def _drop_views(sender, tables=frozenset(), keys=None, **extra) -> None:
+    if sender is None:
+        return
+    tables = set(tables) - {WeatherCache.__tablename__}  # views never include the forecast
+    if not tables:
+        return
+    cache = _cache(sender)
+    if keys is None or Icon.__tablename__ in tables:
+        # Icons are shared by every view
+        cache.clear()
+        return
+    with _lock:
+        for key, (_view, deps) in list(cache.items()):
+            if deps & keys:
+                cache.pop(key, None)
+
+
+cache_invalidated.connect(_drop_views, weak=False)
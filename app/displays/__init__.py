@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+displays_bp = Blueprint("displays", __name__)
+
+from . import routes  # noqa: E402,F401
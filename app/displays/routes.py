@@ -0,0 +1,74 @@
+from flask import flash, redirect, render_template, url_for
+from flask_login import login_required
+
+from ..extensions import db
+from ..forms.displays import DisplayForm
+from ..models import Display, Schedule
+from . import displays_bp
+
+
+def _schedule_choices(current: Display = None):
+    # Undated schedules are the standing ones a room can be assigned
+    condition = Schedule.date == None  # noqa: E711
+    if current is not None and current.schedule_id is not None:
+        condition = db.or_(condition, Schedule.id == current.schedule_id)
+    schedules = db.session.execute(
+        db.select(Schedule.id, Schedule.name).where(condition).order_by(Schedule.name)
+    ).all()
+    return [(0, "Follow the active schedule")] + [(s.id, s.name) for s in schedules]
+
+
+def _apply(form: DisplayForm, display: Display) -> None:
+    display.name = form.name.data
+    display.slug = form.slug.data
+    display.schedule_id = form.schedule_id.data or None
+    for field in Display.OVERRIDES:
+        setattr(display, field, getattr(form, field).data or None)
+
+
+@displays_bp.route("/")
+@login_required
+def list_displays():
+    displays = Display.query.options(db.joinedload(Display.schedule)).order_by(Display.name).all()
+    return render_template("displays/index.html", displays=displays)
+
+
+@displays_bp.route("/new", methods=["GET", "POST"])
+@login_required
+def new_display():
+    form = DisplayForm()
+    form.schedule_id.choices = _schedule_choices()
+    if form.validate_on_submit():
+        display = Display()
+        _apply(form, display)
+        db.session.add(display)
+        db.session.commit()
+        flash("Display created", "success")
+        return redirect(url_for("displays.list_displays"))
+    return render_template("displays/form.html", form=form, title="New Display")
+
+
+@displays_bp.route("/<int:display_id>/edit", methods=["GET", "POST"])
+@login_required
+def edit_display(display_id: int):
+    display = db.get_or_404(Display, display_id)
+    form = DisplayForm(obj=display, display=display)
+    form.schedule_id.choices = _schedule_choices(display)
+    if form.validate_on_submit():
+        _apply(form, display)
+        db.session.commit()
+        flash("Display updated", "success")
+        return redirect(url_for("displays.list_displays"))
+    if display.schedule_id is None:
+        form.schedule_id.data = 0
+    return render_template("displays/form.html", form=form, title="Edit Display", display=display)
+
+
+@displays_bp.route("/<int:display_id>/delete", methods=["POST"])
+@login_required
+def delete_display(display_id: int):
+    display = db.get_or_404(Display, display_id)
+    db.session.delete(display)
+    db.session.commit()
+    flash("Display deleted", "success")
+    return redirect(url_for("displays.list_displays"))
@@ -0,0 +1,283 @@
+"""Caching headers for the display routes and targeted purges for the proxy in front.
+
+Each sign and check-updates response carries an ``ETag``, a ``Cache-Control`` header and
+a ``Surrogate-Key`` header that lists the content it was built from:
+
+* ``schedule-<id>``: the schedule shown
+* ``active-schedule``: the response followed ``Schedule.active_on``
+* ``settings``, ``icons``, ``weather``: the site-wide inputs (the latter two on the sign only)
+* ``display-<id>``: a named display
+
+The item fragments windowed signs fetch (``/display/items``, ``/display/<slug>/items``) are
+sent with ``no-cache`` instead. Each one is requested with its own ``start``, ``count``
+and ``v`` query string, so a purge by URL could not name them all.
+
+With EDGE_CACHE_TTL > 0, shared caches may keep a response for that long (``s-maxage``),
+but never past midnight in the site's timezone, when the active schedule changes. Browsers
+always revalidate and get a 304 when nothing changed. After a commit that changed display
+content, the matching keys go to the configured purger, so the proxy drops only the
+responses that changed. Purges run on a background thread, like snapshot publishing, so a
+save does not wait for hundreds of PURGE requests; keys queued while one runs are purged
+together in the next.
+
+* ``none``: do nothing and rely on the TTL
+* ``stub``: log and remember the purges (local development and tests)
+* ``nginx``: send ``PURGE <path>`` for every affected URL to EDGE_CACHE_PURGE_URL
+  (nginx with ngx_cache_purge, ``proxy_cache_key $request_uri``)
+* ``package.module:Class``: any class with ``purge(keys, paths)`` and a constructor taking the app
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+from flask import Flask, Response, current_app, request, url_for
+from sqlalchemy import select
+from werkzeug.utils import import_string
+
+from .content import content_changed
+from .extensions import db
+from .models import Display, Icon, Schedule, SiteSettings, WeatherCache
+from .transitions import transition_reached, utc_now
+
+logger = logging.getLogger(__name__)
+
+SITE_WIDE_KEYS = {"settings", "icons", "weather"}
+
+
+def surrogate_keys(
+    display: Optional[Display], schedule: Optional[Schedule], sign: bool = True
+) -> Set[str]:
+    keys = {"settings"}
+    if sign:
+        keys |= {"icons", "weather"}
+    if schedule is not None:
+        keys.add(f"schedule-{schedule.id}")
+    if (
+        display is None
+        or display.schedule_id is None
+        or schedule is None
+        or schedule.id != display.schedule_id
+    ):
+        keys.add("active-schedule")
+    if display is not None:
+        keys.add(f"display-{display.id}")
+    return keys
+
+
+def purge_keys(tables: Iterable[str], keys: Iterable[tuple]) -> Set[str]:
+    """Surrogate keys made stale by a commit, from the ``content_changed`` payload."""
+    out = set()
+    tables = set(tables)
+    if Schedule.__tablename__ in tables:
+        # A new, activated or re-dated schedule can change which one is active
+        out.add("active-schedule")
+    if SiteSettings.__tablename__ in tables:
+        out.add("settings")
+    if Icon.__tablename__ in tables:
+        out.add("icons")
+    if WeatherCache.__tablename__ in tables:
+        out.add("weather")
+    for table, row_id in keys:
+        if table == Schedule.__tablename__:
+            out.add(f"schedule-{row_id}")
+        elif table == Display.__tablename__:
+            out.add(f"display-{row_id}")
+    return out
+
+
+def _display_paths(slug: Optional[str]) -> List[str]:
+    return [url_for("display.sign", slug=slug), url_for("display.check_updates", slug=slug)]
+
+
+def purge_paths(keys: Set[str]) -> List[str]:
+    """Display URLs that may carry any of ``keys``, for proxies that purge by URL."""
+    if not keys:
+        return []
+    # Resolved on a connection of its own: this runs after the triggering commit
+    with db.engine.connect() as conn:
+        displays = conn.execute(select(Display.id, Display.slug, Display.schedule_id)).all()
+    slugs = set()
+    everything = bool(keys & SITE_WIDE_KEYS)
+    include_default = everything or "active-schedule" in keys
+    for display in displays:
+        if (
+            everything
+            or f"display-{display.id}" in keys
+            or f"schedule-{display.schedule_id}" in keys
+            or (display.schedule_id is None and "active-schedule" in keys)
+        ):
+            slugs.add(display.slug)
+    paths = _display_paths(None) if include_default else []
+    for slug in sorted(slugs):
+        paths.extend(_display_paths(slug))
+    return paths
+
+
+class NoopPurger:
+    url_based = False
+
+    def __init__(self, app: Flask):
+        pass
+
+    def purge(self, keys: Set[str], paths: List[str]) -> None:
+        pass
+
+
+class StubPurger:
+    url_based = True
+
+    def __init__(self, app: Flask):
+        self.purged: List[tuple] = []
+
+    def purge(self, keys: Set[str], paths: List[str]) -> None:
+        logger.info("Edge cache purge: keys=%s paths=%s", sorted(keys), paths)
+        self.purged.append((frozenset(keys), tuple(paths)))
+
+
+class NginxPurger:
+    url_based = True
+
+    def __init__(self, app: Flask):
+        self.base_url = (app.config.get("EDGE_CACHE_PURGE_URL") or "http://127.0.0.1").rstrip("/")
+        self.timeout = float(app.config.get("EDGE_CACHE_PURGE_TIMEOUT", 2))
+
+    def purge(self, keys: Set[str], paths: List[str]) -> None:
+        import requests  # deferred: only needed when a write purges
+
+        # One keep-alive connection for the whole batch
+        with requests.Session() as session:
+            for path in paths:
+                try:
+                    response = session.request(
+                        "PURGE", f"{self.base_url}{path}", timeout=self.timeout
+                    )
+                except requests.RequestException as e:
+                    logger.warning("Edge cache purge of %s failed: %s", path, e)
+                    continue
+                # 404: nothing cached for that URL
+                if response.status_code not in (200, 204, 404):
+                    logger.warning("Edge cache purge of %s returned %s", path, response.status_code)
+
+
+PURGERS = {"none": NoopPurger, "stub": StubPurger, "nginx": NginxPurger}
+
+
+class EdgeCache:
+    def __init__(self):
+        self.ttl = 0
+        self.purger = None
+        self._app: Optional[Flask] = None
+        self._queued: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.ttl = int(app.config.get("EDGE_CACHE_TTL", 0))
+        name = app.config.get("EDGE_CACHE_PURGER") or "none"
+        purger_class = PURGERS[name] if name in PURGERS else import_string(name.replace(":", "."))
+        self.purger = purger_class(app)
+        self._app = app
+
+    def _max_age(self, until: Optional[datetime]) -> int:
+        if until is None:
+            return self.ttl
+        return max(0, min(self.ttl, int((until - utc_now()).total_seconds())))
+
+    def tag(self, response: Response, keys: Set[str], until: Optional[datetime] = None) -> Response:
+        """Add caching headers to a display response and answer If-None-Match with a 304.
+
+        ``until`` (aware) is when the content changes on its own: the site's next midnight.
+        """
+        if response.status_code != 200:
+            return response
+        response.headers["Surrogate-Key"] = " ".join(sorted(keys))
+        if self.ttl > 0:
+            response.headers["Cache-Control"] = (
+                f"public, max-age=0, must-revalidate, s-maxage={self._max_age(until)}"
+            )
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        response.add_etag()
+        return response.make_conditional(request)
+
+    def purge(self, tables: Iterable[str], keys: Iterable[tuple]) -> None:
+        """Queue a purge of what a change to ``tables``/``keys`` made stale.
+
+        Failures only leave the TTL.
+        """
+        stale = purge_keys(tables, keys)
+        if not stale or self._app is None or isinstance(self.purger, NoopPurger):
+            return
+        with self._thread_lock:
+            self._queued |= stale
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="edge-cache-purger", daemon=True
+                )
+                self._thread.start()
+
+    def wait(self, timeout: float = 10.0) -> bool:
+        """Block until queued purges are done (for tests and CLI use)."""
+        deadline = time.monotonic() + timeout
+        while self._thread is not None:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def purge_now(self, stale: Set[str]) -> None:
+        try:
+            # url_for needs a request context; this runs outside requests
+            with self._app.test_request_context():
+                paths = purge_paths(stale) if getattr(self.purger, "url_based", False) else []
+            self.purger.purge(stale, paths)
+        except Exception:
+            logger.exception("Edge cache purge failed")
+
+    def _run(self) -> None:
+        while True:
+            with self._thread_lock:
+                if not self._queued:
+                    self._thread = None
+                    return
+                stale, self._queued = self._queued, set()
+            self.purge_now(stale)
+
+
+def init_app(app: Flask) -> EdgeCache:
+    cache = EdgeCache()
+    app.extensions["edge_cache"] = cache
+    cache.init_app(app)
+    return cache
+
+
+def get_edge_cache(app: Optional[Flask] = None) -> EdgeCache:
+    app = app or current_app
+    return app.extensions["edge_cache"]
+
+
+def _on_content_changed(sender, tables=frozenset(), keys=frozenset(), **extra) -> None:
+    cache = sender.extensions.get("edge_cache") if sender is not None else None
+    if cache is not None:
+        cache.purge(tables, keys)
+
+
+content_changed.connect(_on_content_changed, weak=False)
+
+
+def _on_transition_reached(sender, kind=None, schedule_id=None, **extra) -> None:
+    cache = sender.extensions.get("edge_cache") if sender is not None else None
+    if cache is None:
+        return
+    if kind == "midnight":
+        # The active schedule changes with the day
+        cache.purge({Schedule.__tablename__}, ())
+    elif kind == "item":
+        cache.purge((), {(Schedule.__tablename__, schedule_id)})
+
+
+transition_reached.connect(_on_transition_reached, weak=False)
@@ -1,13 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_login import LoginManager
-from flask_wtf import CSRFProtect
 
 db = SQLAlchemy()
-migrate = Migrate()
-login_manager = LoginManager()
-csrf = CSRFProtect()
 
-login_manager.login_view = "auth.login"
 
+def __getattr__(name):
+    # migrate, login_manager and csrf are created on first access, so the display-only
+    # profile (APP_PROFILE=display) never imports Flask-Migrate/Alembic or Flask-WTF
+    if name == "migrate":
+        from flask_migrate import Migrate
 
+        value = Migrate()
+    elif name == "login_manager":
+        from flask_login import LoginManager
+
+        value = LoginManager()
+        value.login_view = "auth.login"
+    elif name == "csrf":
+        from flask_wtf import CSRFProtect
+
+        value = CSRFProtect()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -0,0 +1,37 @@
+from flask_wtf import FlaskForm
+from wtforms import SelectField, StringField, SubmitField, TextAreaField
+from wtforms.validators import DataRequired, Length, Optional, Regexp, ValidationError
+
+from ..models import Display
+
+HEX_COLOR = Regexp(r'^#[0-9A-Fa-f]{6}$', message="Must be a valid hex color (e.g., #000000)")
+# Paths under /display/ that are not display slugs
+RESERVED_SLUGS = {"check-updates"}
+
+
+class DisplayForm(FlaskForm):
+    name = StringField("Name", validators=[DataRequired(), Length(max=255)])
+    slug = StringField("Slug", validators=[
+        DataRequired(), Length(max=64),
+        Regexp(r'^[a-z0-9][a-z0-9-]*$', message="Lowercase letters, digits and dashes only"),
+    ])
+    schedule_id = SelectField("Schedule", coerce=int, validators=[Optional()])
+    # Blank overrides fall back to the site settings
+    bg_color = StringField("Background Color", validators=[Optional(), HEX_COLOR])
+    text_color = StringField("Text Color", validators=[Optional(), HEX_COLOR])
+    box_color = StringField("Side Panel Color", validators=[Optional(), HEX_COLOR])
+    schedule_color = StringField("Schedule Box Color", validators=[Optional(), HEX_COLOR])
+    notes_left_col = TextAreaField("Left Column Notes", validators=[Optional()])
+    submit = SubmitField("Save")
+
+    def __init__(self, *args, display=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.display = display
+
+    def validate_slug(self, field):
+        if field.data in RESERVED_SLUGS:
+            raise ValidationError("This slug is reserved.")
+        if self.display and self.display.slug == field.data:
+            return
+        if Display.query.filter_by(slug=field.data).first():
+            raise ValidationError("A display with this slug already exists.")
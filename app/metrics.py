@@ -0,0 +1,350 @@
+"""Prometheus-style request metrics that aggregate across gunicorn workers.
+
+Each process keeps its counters and histograms in memory and, when METRICS_DIR is set,
+periodically writes a snapshot to ``<METRICS_DIR>/<pid>.json``. The /metrics endpoint
+sums the snapshots of every worker (including ones that have exited, so counters stay
+monotonic) and renders the text exposition format. It answers scrapers that send
+METRICS_TOKEN and signed-in admins; METRICS_PUBLIC opens it to everyone.
+"""
+from __future__ import annotations
+
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import (
+    Flask,
+    Response,
+    before_render_template,
+    current_app,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+from sqlalchemy import event
+
+from .extensions import db
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Iterable[Tuple[str, str]]) -> str:
+    if not key:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in key
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {json.dumps(key): value for key, value in self.values.items()}
+
+    @staticmethod
+    def merge(total: dict, part: dict) -> None:
+        for key, value in part.items():
+            total[key] = total.get(key, 0) + value
+
+    def render(self, merged: dict) -> List[str]:
+        lines = []
+        for key, value in sorted(merged.items()):
+            lines.append(f"{self.name}{_format_labels(json.loads(key))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            # [bucket counts..., sum, count]
+            entry = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def snapshot(self) -> dict:
+        return {json.dumps(key): list(entry) for key, entry in self.values.items()}
+
+    @staticmethod
+    def merge(total: dict, part: dict) -> None:
+        for key, entry in part.items():
+            if key in total and len(total[key]) == len(entry):
+                total[key] = [a + b for a, b in zip(total[key], entry)]
+            else:
+                total[key] = list(entry)
+
+    def render(self, merged: dict) -> List[str]:
+        lines = []
+        for key, entry in sorted(merged.items()):
+            labels = json.loads(key)
+            for bound, count in zip(self.buckets, entry):
+                le = _format_labels(labels + [["le", _format_value(bound)]])
+                lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(
+                f"{self.name}_bucket{_format_labels(labels + [['le', '+Inf']])} {entry[-1]}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {entry[-1]}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], float]] = {}
+        self.directory: Optional[str] = None
+        self.flush_interval = 1.0
+        self._last_flush = 0.0
+
+        self.requests = self.counter(
+            "http_requests_total", "Requests by endpoint, method and status"
+        )
+        self.request_seconds = self.histogram(
+            "http_request_duration_seconds", "Request latency by endpoint"
+        )
+        self.sql_statements = self.histogram(
+            "http_request_sql_statements", "SQL statements issued per request", COUNT_BUCKETS
+        )
+        self.sql_seconds = self.histogram(
+            "http_request_sql_seconds", "Time spent in SQL per request"
+        )
+        self.template_seconds = self.histogram(
+            "http_request_template_seconds", "Time spent rendering templates per request"
+        )
+        self.weather_seconds = self.histogram(
+            "http_request_weather_seconds", "Time spent in weather HTTP calls per request"
+        )
+        self.weather_calls = self.histogram(
+            "weather_http_call_seconds", "Latency of individual weather API calls"
+        )
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def collected_counter(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Register a counter whose value is read from ``read()`` whenever a snapshot is taken."""
+        self.counter(name, help_text)
+        self._collectors[name] = read
+
+    def inc(self, counter: Counter, amount: float = 1, **labels) -> None:
+        with self._lock:
+            counter.inc(amount, **labels)
+
+    def observe(self, histogram: Histogram, value: float, **labels) -> None:
+        with self._lock:
+            histogram.observe(value, **labels)
+
+    def record_weather_call(self, seconds: float) -> None:
+        """Record one weather API call and attribute it to the current request."""
+        self.observe(self.weather_calls, seconds)
+        if has_request_context():
+            g._metrics_weather_seconds = g.get("_metrics_weather_seconds", 0.0) + seconds
+
+    # -- snapshots -------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        for name, read in self._collectors.items():
+            data[name] = {json.dumps(()): read()}
+        return data
+
+    def flush(self, force: bool = False) -> None:
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp, path)
+
+    def collect(self) -> dict:
+        """Merged snapshot of every worker (or just this process without METRICS_DIR)."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush(force=True)
+        merged: dict = {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as fh:
+                    part = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for name, values in part.items():
+                metric = self._metrics.get(name)
+                merge = metric.merge if metric is not None else Counter.merge
+                merge(merged.setdefault(name, {}), values)
+        return merged
+
+    def render(self) -> str:
+        merged = self.collect()
+        lines: List[str] = []
+        for name, values in sorted(merged.items()):
+            metric = self._metrics.get(name) or Counter(name, "Collected counter")
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+    # -- Flask wiring ----------------------------------------------------
+
+    def init_app(self, app: Flask) -> None:
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        self.directory = app.config.get("METRICS_DIR") or None
+        self.flush_interval = float(app.config.get("METRICS_FLUSH_SECONDS", 1.0))
+        if self.directory:
+            atexit.register(self.flush, True)
+
+        @app.before_request
+        def start_request_metrics():
+            g._metrics_start = time.perf_counter()
+            g._metrics_sql_count = 0
+            g._metrics_sql_seconds = 0.0
+            g._metrics_template_seconds = 0.0
+            g._metrics_weather_seconds = 0.0
+
+        @app.after_request
+        def record_request_metrics(response):
+            started = g.pop("_metrics_start", None)
+            if started is None:
+                return response
+            endpoint = request.endpoint or "unmatched"
+            with self._lock:
+                self.requests.inc(
+                    endpoint=endpoint, method=request.method, status=response.status_code
+                )
+                self.request_seconds.observe(time.perf_counter() - started, endpoint=endpoint)
+                self.sql_statements.observe(g.get("_metrics_sql_count", 0), endpoint=endpoint)
+                self.sql_seconds.observe(g.get("_metrics_sql_seconds", 0.0), endpoint=endpoint)
+                self.template_seconds.observe(
+                    g.get("_metrics_template_seconds", 0.0), endpoint=endpoint
+                )
+                self.weather_seconds.observe(
+                    g.get("_metrics_weather_seconds", 0.0), endpoint=endpoint
+                )
+            self.flush()
+            return response
+
+        def on_before_render(sender, template, context, **extra):
+            g._metrics_template_start = time.perf_counter()
+
+        def on_rendered(sender, template, context, **extra):
+            started = g.pop("_metrics_template_start", None)
+            if started is not None:
+                g._metrics_template_seconds = (
+                    g.get("_metrics_template_seconds", 0.0) + time.perf_counter() - started
+                )
+
+        before_render_template.connect(on_before_render, app, weak=False)
+        template_rendered.connect(on_rendered, app, weak=False)
+
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("_metrics_query_start")
+            if not starts or not has_request_context():
+                if starts:
+                    starts.pop()
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            g._metrics_sql_count = g.get("_metrics_sql_count", 0) + 1
+            g._metrics_sql_seconds = g.get("_metrics_sql_seconds", 0.0) + elapsed
+
+        @app.route("/metrics")
+        def metrics_endpoint():
+            status = self._refusal(app)
+            if status is not None:
+                message = "Forbidden\n" if status == 403 else "Unauthorized\n"
+                return Response(message, status=status, mimetype="text/plain")
+            return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    @staticmethod
+    def _refusal(app: Flask) -> Optional[int]:
+        """None when the caller may read /metrics, else 401 or 403 (signed in, not an admin).
+
+        Scrapers send METRICS_TOKEN; signed-in admins may look. METRICS_PUBLIC opens it to all.
+        """
+        if app.config.get("METRICS_PUBLIC"):
+            return None
+        token = app.config.get("METRICS_TOKEN")
+        sent = request.headers.get("Authorization", "")
+        if token and hmac.compare_digest(sent, f"Bearer {token}"):
+            return None
+        if getattr(app, "login_manager", None) is None:
+            return 401  # the display profile has no logins
+        from flask_login import current_user
+
+        if not current_user.is_authenticated:
+            return 401
+        return None if current_user.is_admin else 403
+
+
+def init_app(app: Flask) -> Metrics:
+    metrics = Metrics()
+    app.extensions["metrics"] = metrics
+    metrics.init_app(app)
+    return metrics
+
+
+def get_metrics(app: Optional[Flask] = None) -> Metrics:
+    app = app or current_app
+    return app.extensions["metrics"]
@@ -1,8 +1,9 @@
+import datetime as dt
 from datetime import datetime, timedelta
 from typing import Optional
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from .extensions import db, login_manager
+from .extensions import db
 
 
 class TimestampMixin:
@@ -24,22 +25,66 @@ class User(UserMixin, TimestampMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 
-@login_manager.user_loader
-def load_user(user_id: str) -> Optional["User"]:
-    return User.query.get(int(user_id))
-
-
 class Schedule(TimestampMixin, db.Model):
     __tablename__ = "schedules"
+    # Mirrors migrations/versions/add_composite_indexes.py
+    # (Postgres orders the date DESC NULLS LAST there)
+    __table_args__ = (
+        db.Index("ix_schedules_date_is_active", "date", "is_active"),
+        db.Index(
+            "ix_schedules_active_undated",
+            "is_active",
+            sqlite_where=db.text("date IS NULL"),
+            postgresql_where=db.text("date IS NULL"),
+        ),
+        # At most one active schedule; see migrations/versions/add_single_active_schedule_index.py
+        db.Index(
+            "ix_schedules_single_active",
+            "is_active",
+            unique=True,
+            sqlite_where=db.text("is_active = 1"),
+            postgresql_where=db.text("is_active"),
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
-    date = db.Column(db.Date, nullable=True, index=True)  # Optional: if provided, schedule is only active on that date
+    name = db.Column(db.String(255), nullable=False, index=True)
+    # Optional: if provided, schedule is only active on that date
+    date = db.Column(db.Date, nullable=True)
     is_active = db.Column(db.Boolean, default=False, nullable=False)
     show_name = db.Column(db.Boolean, default=True, nullable=False)  # Whether to display name on sign
     created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
 
     created_by_user = db.relationship("User", backref=db.backref("schedules", lazy=True))
 
+    # dt.date: a bare ``date`` in this class body is the date column above
+    @classmethod
+    def active_on(cls, day: dt.date) -> Optional["Schedule"]:
+        """Return the schedule shown on the sign for ``day``.
+
+        A schedule dated ``day`` wins regardless of its is_active flag; otherwise the undated
+        schedule flagged active is used. Two index lookups rather than one OR query, which
+        the database can only answer by sorting the matches.
+        """
+        dated = cls.query.filter(cls.date == day).first()
+        if dated is not None:
+            return dated
+        return cls.query.filter(cls.date == None, cls.is_active == True).first()  # noqa: E711,E712
+
+    def activate(self) -> None:
+        """Make this the single active schedule.
+
+        Only the previously active row (found through the partial unique index) and this one
+        are written, so other schedules keep their updated_at.
+        """
+        with db.session.no_autoflush:
+            previous = Schedule.query.filter(Schedule.is_active == True).all()  # noqa: E712
+        for other in previous:
+            if other is not self:
+                other.is_active = False
+        # The old row must be cleared before this one is set or the unique index trips
+        db.session.flush()
+        self.is_active = True
+
 
 class Icon(TimestampMixin, db.Model):
     __tablename__ = "icons"
@@ -56,8 +101,11 @@ class Icon(TimestampMixin, db.Model):
 
 class ScheduleItem(TimestampMixin, db.Model):
     __tablename__ = "schedule_items"
+    __table_args__ = (
+        db.Index("ix_schedule_items_schedule_id_start_time", "schedule_id", "start_time"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    schedule_id = db.Column(db.Integer, db.ForeignKey("schedules.id"), nullable=False, index=True)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedules.id"), nullable=False)
     name = db.Column(db.String(255), nullable=True)
     start_time = db.Column(db.Time, nullable=False)
     duration_minutes = db.Column(db.Integer, nullable=True)
@@ -106,3 +154,43 @@ class WeatherCache(TimestampMixin, db.Model):
     fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
 
+
+
+class Display(TimestampMixin, db.Model):
+    """A named screen (``/display/<slug>/``) with its own schedule and optional look overrides."""
+    __tablename__ = "displays"
+    # SiteSettings columns a display may override; NULL means "use the site setting"
+    OVERRIDES = ("bg_color", "text_color", "box_color", "schedule_color", "notes_left_col")
+
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    # NULL follows the site-wide active schedule (Schedule.active_on)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedules.id"), nullable=True)
+    bg_color = db.Column(db.String(7), nullable=True)
+    text_color = db.Column(db.String(7), nullable=True)
+    box_color = db.Column(db.String(7), nullable=True)
+    schedule_color = db.Column(db.String(7), nullable=True)
+    notes_left_col = db.Column(db.Text, nullable=True)
+
+    # Deleting a schedule unassigns it from its displays
+    schedule = db.relationship("Schedule", backref=db.backref("displays", lazy=True))
+
+    @property
+    def has_overrides(self) -> bool:
+        return any(getattr(self, field) is not None for field in self.OVERRIDES)
+
+
+class ContentChange(db.Model):
+    """One row per display-content write; ``id`` is the revision the edge sync feed pages by."""
+    __tablename__ = "content_changes"
+    # AUTOINCREMENT so SQLite never reuses a revision number
+    __table_args__ = (
+        db.Index("ix_content_changes_entity", "entity", "entity_id"),
+        {"sqlite_autoincrement": True},
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)  # schedule, icon or settings
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted = db.Column(db.Boolean, default=False, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,147 @@
+"""Opt-in per-request profiling.
+
+A request is profiled when PROFILER_ENABLED is set and it falls inside PROFILER_SAMPLE_RATE,
+or when it carries a ``_profile`` query parameter signed for an admin (see
+``profile_token``). Output goes to PROFILER_DIR as cProfile ``.prof`` files or, in
+``sample`` mode, as collapsed stacks (``.collapsed``) that flamegraph.pl and speedscope read.
+"""
+from __future__ import annotations
+
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from flask import Flask, current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+TOKEN_SALT = "request-profile"
+
+
+def profile_token(user_id: int) -> str:
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=TOKEN_SALT)
+    return serializer.dumps({"u": user_id})
+
+
+def _token_valid(token: str) -> bool:
+    serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=TOKEN_SALT)
+    try:
+        serializer.loads(token, max_age=int(current_app.config.get("PROFILER_TOKEN_MAX_AGE", 3600)))
+    except BadSignature:
+        return False
+    return True
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _mtime(path: str) -> float:
+    # Another worker may prune the same file between listdir() and here
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0
+
+
+class RequestProfiler:
+    def init_app(self, app: Flask) -> None:
+        app.before_request(self._start)
+        app.teardown_request(self._finish)
+
+    def _should_profile(self) -> bool:
+        config = current_app.config
+        token = request.args.get("_profile")
+        if token:
+            return _token_valid(token)
+        if not config.get("PROFILER_ENABLED"):
+            return False
+        return random.random() < float(config.get("PROFILER_SAMPLE_RATE", 0.01))
+
+    def _start(self) -> None:
+        if not self._should_profile():
+            return
+        mode = current_app.config.get("PROFILER_MODE", "cprofile")
+        g._profile_started = time.perf_counter()
+        if mode == "sample":
+            interval = float(current_app.config.get("PROFILER_INTERVAL_MS", 5)) / 1000
+            sampler = StackSampler(threading.get_ident(), interval)
+            sampler.start()
+            g._profiler = sampler
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            g._profiler = profiler
+
+    def _finish(self, exc: Optional[BaseException]) -> None:
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return
+        elapsed_ms = (time.perf_counter() - g.pop("_profile_started")) * 1000
+        directory = current_app.config.get("PROFILER_DIR") or os.path.join(
+            current_app.instance_path, "profiles"
+        )
+        os.makedirs(directory, exist_ok=True)
+        endpoint = re.sub(r"[^A-Za-z0-9_.-]", "_", request.endpoint or "unmatched")
+        base = os.path.join(
+            directory,
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{elapsed_ms:.0f}ms-{os.getpid()}",
+        )
+        if isinstance(profiler, StackSampler):
+            profiler.stop()
+            with open(f"{base}.collapsed", "w") as fh:
+                fh.write(profiler.collapsed())
+        else:
+            profiler.disable()
+            profiler.dump_stats(f"{base}.prof")
+        self._prune(directory, int(current_app.config.get("PROFILER_KEEP", 200)))
+
+    @staticmethod
+    def _prune(directory: str, keep: int) -> None:
+        files = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory)),
+            key=_mtime,
+        )
+        for path in (files[:-keep] if keep else []):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+profiler = RequestProfiler()
@@ -1,14 +1,28 @@
-from flask import render_template, redirect, url_for, request, flash, current_app, send_file, Response
+from flask import (
+    render_template,
+    redirect,
+    url_for,
+    request,
+    flash,
+    current_app,
+    send_file,
+    Response,
+    jsonify,
+)
 from flask_login import login_required, current_user
 from . import schedules_bp
 from ..extensions import db
 from ..models import Schedule, ScheduleItem, SiteSettings
-from ..forms.schedules import ScheduleForm, ScheduleItemForm
+from ..forms.schedules import ScheduleForm, ScheduleItemForm, get_icon_choices
 from ..forms.settings import SettingsForm
+from ..services.schedule_items import (
+    BatchValidationError,
+    apply_item_batch,
+    end_time_for,
+    serialize_item,
+)
 import os
 from werkzeug.utils import secure_filename
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime, time
 from io import BytesIO
 from sqlalchemy import desc, nullslast
@@ -26,16 +40,16 @@ def list_schedules():
 def new_schedule():
     form = ScheduleForm()
     if form.validate_on_submit():
-        if form.is_active.data:
-            Schedule.query.update({Schedule.is_active: False})
         sched = Schedule(
             name=form.name.data, 
             date=form.date.data, 
-            is_active=form.is_active.data,
+            is_active=False,
             show_name=form.show_name.data if form.show_name.data is not None else True,
             created_by=current_user.id
         )
         db.session.add(sched)
+        if form.is_active.data:
+            sched.activate()
         db.session.commit()
         flash("Schedule created", "success")
         return redirect(url_for("schedules.edit_schedule", schedule_id=sched.id))
@@ -49,13 +63,35 @@ def edit_schedule(schedule_id: int):
     form = ScheduleForm(obj=sched)
     if form.validate_on_submit():
         if form.is_active.data and not sched.is_active:
-            Schedule.query.update({Schedule.is_active: False})
+            sched.activate()
         form.populate_obj(sched)
         db.session.commit()
         flash("Schedule updated", "success")
         return redirect(url_for("schedules.list_schedules"))
     items = ScheduleItem.query.filter_by(schedule_id=schedule_id).order_by(ScheduleItem.start_time).all()
-    return render_template("schedules/schedule_form.html", form=form, title="Edit Schedule", schedule=sched, items=items)
+    return render_template(
+        "schedules/schedule_form.html",
+        form=form,
+        title="Edit Schedule",
+        schedule=sched,
+        items=items,
+        items_json=[serialize_item(item) for item in items],
+        icon_choices=get_icon_choices(),
+    )
+
+
+@schedules_bp.route("/<int:schedule_id>/items/batch", methods=["POST"])
+@login_required
+def batch_items(schedule_id: int):
+    """Apply a JSON batch of item creates, updates, deletes and reorders in one commit"""
+    sched = Schedule.query.get_or_404(schedule_id)
+    payload = request.get_json(silent=True)
+    try:
+        result = apply_item_batch(sched, payload)
+    except BatchValidationError as e:
+        db.session.rollback()
+        return jsonify({"errors": e.errors}), 400
+    return jsonify(result)
 
 
 @schedules_bp.route("/<int:schedule_id>/duplicate", methods=["POST"])
@@ -65,9 +101,17 @@ def duplicate_schedule(schedule_id: int):
     
     # Create new schedule with " (Copy)" suffix
     new_name = f"{original.name} (Copy)"
-    # If the copy name already exists, append a number
+    # If the copy name already exists, append a number. Every "<name> (Copy…" sorts between
+    # the prefix and the prefix with its last character bumped, so one index range scan
+    # finds all existing copies.
+    prefix = new_name[:-1]
+    taken = {
+        name for (name,) in db.session.query(Schedule.name).filter(
+            Schedule.name >= prefix, Schedule.name < prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        )
+    }
     counter = 1
-    while Schedule.query.filter_by(name=new_name).first():
+    while new_name in taken:
         counter += 1
         new_name = f"{original.name} (Copy {counter})"
     
@@ -81,26 +125,34 @@ def duplicate_schedule(schedule_id: int):
     db.session.add(new_schedule)
     db.session.flush()  # Get the new schedule ID
     
-    # Copy all schedule items
-    original_items = ScheduleItem.query.filter_by(schedule_id=schedule_id).order_by(ScheduleItem.start_time).all()
-    for item in original_items:
-        new_item = ScheduleItem(
-            schedule_id=new_schedule.id,
-            name=item.name,
-            start_time=item.start_time,
-            duration_minutes=item.duration_minutes,
-            end_time=item.end_time,
-            location=item.location,
-            uniform=item.uniform,
-            lead=item.lead,
-            notes=item.notes,
-            icon=item.icon
-        )
-        db.session.add(new_item)
+    # Copy all schedule items in one bulk INSERT rather than one statement per row
+    columns = (
+        "name",
+        "start_time",
+        "duration_minutes",
+        "end_time",
+        "location",
+        "uniform",
+        "lead",
+        "notes",
+        "icon",
+    )
+    original_items = (
+        ScheduleItem.query.filter_by(schedule_id=schedule_id)
+        .order_by(ScheduleItem.start_time)
+        .all()
+    )
+    if original_items:
+        # render_nulls keeps rows with different empty columns in the same INSERT batch
+        db.session.execute(db.insert(ScheduleItem).execution_options(render_nulls=True), [
+            dict({column: getattr(item, column) for column in columns}, schedule_id=new_schedule.id)
+            for item in original_items
+        ])
     
+    new_schedule_id, new_schedule_name = new_schedule.id, new_schedule.name
     db.session.commit()
-    flash(f"Schedule duplicated as '{new_schedule.name}'", "success")
-    return redirect(url_for("schedules.edit_schedule", schedule_id=new_schedule.id))
+    flash(f"Schedule duplicated as '{new_schedule_name}'", "success")
+    return redirect(url_for("schedules.edit_schedule", schedule_id=new_schedule_id))
 
 
 @schedules_bp.route("/<int:schedule_id>/delete", methods=["POST"])
@@ -216,6 +268,10 @@ def settings():
 @schedules_bp.route("/<int:schedule_id>/export", methods=["GET"])
 @login_required
 def export_schedule(schedule_id: int):
+    # openpyxl is imported on first use; display-only workers never load it
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+
     schedule = Schedule.query.get_or_404(schedule_id)
     items = ScheduleItem.query.filter_by(schedule_id=schedule_id).order_by(ScheduleItem.start_time).all()
     
@@ -300,6 +356,8 @@ def import_schedule():
             flash("Invalid file type. Please upload an Excel file (.xlsx or .xls)", "error")
             return redirect(url_for("schedules.import_schedule"))
         
+        from openpyxl import load_workbook
+
         try:
             wb = load_workbook(file, data_only=True)
             ws = wb.active
@@ -324,17 +382,16 @@ def import_schedule():
                             schedule_date = None
             
             # Create schedule
-            if is_active:
-                Schedule.query.update({Schedule.is_active: False})
-            
             schedule = Schedule(
                 name=schedule_name,
                 date=schedule_date,
-                is_active=is_active,
+                is_active=False,
                 show_name=show_name,
                 created_by=current_user.id
             )
             db.session.add(schedule)
+            if is_active:
+                schedule.activate()
             db.session.flush()  # Get the ID
             
             # Read items (starting from row 7, after headers)
@@ -349,7 +406,7 @@ def import_schedule():
             notes_idx = headers.index("Notes") if "Notes" in headers else None
             icon_idx = headers.index("Icon") if "Icon" in headers else None
             
-            items_imported = 0
+            rows = []
             for row in ws.iter_rows(min_row=7, values_only=False):
                 # Skip empty rows
                 if not any(cell.value for cell in row):
@@ -394,25 +451,25 @@ def import_schedule():
                     except:
                         pass
                 
-                item = ScheduleItem(
+                rows.append(dict(
                     schedule_id=schedule.id,
                     name=row[name_idx].value if name_idx is not None and row[name_idx].value else None,
                     start_time=start_time,
-                    end_time=end_time,
+                    end_time=end_time or (end_time_for(start_time, duration) if duration else None),
                     duration_minutes=duration,
                     location=row[location_idx].value if location_idx is not None and row[location_idx].value else None,
                     uniform=row[uniform_idx].value if uniform_idx is not None and row[uniform_idx].value else None,
                     lead=row[lead_idx].value if lead_idx is not None and row[lead_idx].value else None,
                     notes=row[notes_idx].value if notes_idx is not None and row[notes_idx].value else None,
                     icon=row[icon_idx].value if icon_idx is not None and row[icon_idx].value else None,
-                )
-                
-                if not item.end_time and item.duration_minutes:
-                    item.compute_end_time()
-                
-                db.session.add(item)
-                items_imported += 1
+                ))
             
+            # One bulk INSERT for the items, as in duplicate_schedule
+            if rows:
+                db.session.execute(
+                    db.insert(ScheduleItem).execution_options(render_nulls=True), rows
+                )
+            items_imported = len(rows)
             db.session.commit()
             flash(f"Schedule imported successfully. {items_imported} items added.", "success")
             return redirect(url_for("schedules.edit_schedule", schedule_id=schedule.id))
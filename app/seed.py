@@ -0,0 +1,338 @@
+"""Synthetic data for scale testing (``flask seed``).
+
+Rows are generated in plain dicts and written with bulk INSERTs in batches, which SQLAlchemy
+turns into multi-row VALUES statements on both SQLite and Postgres (``render_nulls`` keeps
+rows with different empty columns in the same statement). That keeps a
+million-item dataset to a few minutes instead of hours of per-object ORM flushes.
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import struct
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, select
+
+from .extensions import db
+from .models import Icon, Schedule, ScheduleItem, SiteSettings, User, WeatherCache
+from .services.schedule_items import end_time_for
+
+EVENT_NAMES = (
+    "Morning Briefing", "Shift Change", "Training Block", "Safety Stand-down", "Family Day",
+    "Open House", "Inspection", "Muster", "Community Outreach", "Orientation", "Drill Night",
+)
+ITEM_NAMES = (
+    "Roll Call", "Briefing", "Breakfast", "Lunch", "Dinner", "PT", "Equipment Check", "Classroom",
+    "Hands-on Training", "Apparatus Checks", "Station Maintenance", "Debrief", "Guest Speaker",
+    "Tour", "Awards", "Open Floor", "Cleanup", "Free Time",
+)
+LOCATIONS = (
+    "Main Hall",
+    "Apparatus Bay",
+    "Classroom A",
+    "Classroom B",
+    "Training Ground",
+    "Kitchen",
+    "Gym",
+    "Parking Lot",
+)
+UNIFORMS = ("Class A", "Class B", "PT Gear", "Turnouts", "Civilian")
+LEADS = ("Capt. Rivera", "Lt. Chen", "Sgt. Okafor", "Chief Adams", "FF Patel", "EMT Novak")
+NOTES = (
+    "Bring radios",
+    "Hydrate",
+    "Sign-in sheet at door",
+    "Weather permitting",
+    "Photos will be taken",
+)
+DURATIONS = (10, 15, 15, 30, 30, 30, 45, 60, 60, 90, 120, None)
+FONTS = ("Arial", "Georgia", "Segoe UI Emoji", "Courier New")
+CHARACTERS = ("★", "☀", "⚑", "✚", "☕", "♜", "⚙", "✈", "☎", "♫")
+WEATHER = (
+    ("sun", "Clear"),
+    ("cloud", "Partly cloudy"),
+    ("clouds", "Overcast"),
+    ("cloud-rain", "Rain"),
+)
+
+
+def _batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _placeholder_png(path: str) -> None:
+    """Write a 1x1 PNG so seeded image icons render instead of showing broken images."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    raw = b"\x00\xff\x99\x00\xff"
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+    png += chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(png)
+
+
+def _next_id(model) -> int:
+    # Counts collide once rows have been deleted; ids only grow
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def seed_database(
+    schedules: int = 3650,
+    undated_share: float = 0.05,
+    items_per_schedule: int = 12,
+    icons: int = 100,
+    image_icon_share: float = 0.25,
+    users: int = 20,
+    weather_rows: int = 365,
+    user_password: str = "password",
+    batch_size: int = 5000,
+    seed: Optional[int] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, object]:
+    """Bulk-insert a realistic dataset and return the row counts plus the new schedule ids.
+
+    Dated schedules fall on consecutive days centred on today, so there is history, a
+    schedule for today and upcoming ones. Item counts vary around ``items_per_schedule``.
+    Names are numbered from the highest existing id, and dated schedules skip days that
+    already have one, so seeding an already seeded database adds more data instead of
+    colliding on unique columns or giving a day two schedules.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    report = progress or (lambda message: None)
+    counts: Dict[str, object] = {}
+
+    if SiteSettings.query.first() is None:
+        db.session.add(SiteSettings(latitude=38.8977, longitude=-77.0365, timezone="UTC"))
+
+    # Icons: text icons plus image icons sharing one placeholder file
+    icon_offset = _next_id(Icon)
+    image_icons = int(icons * image_icon_share)
+    image_path = None
+    if image_icons:
+        upload_folder = current_app.config["UPLOAD_FOLDER"]
+        target = os.path.join(upload_folder, "seed-icon.png")
+        if not os.path.exists(target):
+            _placeholder_png(target)
+        static = os.path.join(current_app.root_path, "static")
+        image_path = os.path.relpath(target, static).replace("\\", "/")
+    icon_rows = []
+    for n in range(icons):
+        row = {
+            "name": f"icon-{icon_offset + n}",
+            "enabled": rng.random() > 0.05,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if n < image_icons:
+            row["image_path"] = image_path
+        else:
+            row.update(characters=rng.choice(CHARACTERS), font=rng.choice(FONTS))
+        icon_rows.append(row)
+    for batch in _batched(icon_rows, batch_size):
+        db.session.execute(insert(Icon).execution_options(render_nulls=True), batch)
+    icon_names = [row["name"] for row in icon_rows] or [None]
+    counts["icons"] = len(icon_rows)
+    report(f"icons: {len(icon_rows)}")
+
+    # Users share one password hash; hashing is deliberately slow
+    user_offset = _next_id(User)
+    probe = User(email="seed@example.com")
+    probe.set_password(user_password)
+    user_rows = [
+        {
+            "email": f"user{user_offset + n}@example.com",
+            "password_hash": probe.password_hash,
+            "is_admin": n % 5 == 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for n in range(users)
+    ]
+    user_ids: List[Optional[int]] = [None]
+    for batch in _batched(user_rows, batch_size):
+        user_ids.extend(
+            db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), batch)
+        )
+    counts["users"] = len(user_rows)
+    report(f"users: {len(user_rows)}")
+
+    # Schedules: consecutive dated days centred on today, plus undated templates.
+    # Only one schedule may be active (see ix_schedules_single_active).
+    undated = int(schedules * undated_share)
+    dated = schedules - undated
+    first_day = date.today() - timedelta(days=dated // 2)
+    activate_one = undated > 0 and not db.session.scalar(
+        select(Schedule.id).where(Schedule.is_active).limit(1)
+    )
+    schedule_offset = _next_id(Schedule)
+    schedule_rows = []
+    for n in range(schedules):
+        schedule_rows.append({
+            "name": f"{rng.choice(EVENT_NAMES)} #{schedule_offset + n}",
+            "date": None,
+            "is_active": False,
+            "show_name": rng.random() > 0.1,
+            "created_by": rng.choice(user_ids),
+            "created_at": now,
+            "updated_at": now,
+        })
+    # Spread the undated templates evenly and date the rest in order, on days without a schedule
+    undated_slots = (
+        set(range(0, schedules, max(1, schedules // undated))[:undated]) if undated else set()
+    )
+    taken = set(db.session.scalars(select(Schedule.date).where(Schedule.date >= first_day)))
+    day = first_day
+    for n, row in enumerate(schedule_rows):
+        if n in undated_slots:
+            continue
+        while day in taken:
+            day += timedelta(days=1)
+        row["date"] = day
+        day += timedelta(days=1)
+    if activate_one:
+        schedule_rows[max(undated_slots)]["is_active"] = True
+    schedule_ids: List[int] = []
+    for batch in _batched(schedule_rows, batch_size):
+        schedule_ids.extend(
+            db.session.scalars(
+                insert(Schedule)
+                .execution_options(render_nulls=True)
+                .returning(Schedule.id, sort_by_parameter_order=True),
+                batch,
+            )
+        )
+    counts["schedules"] = len(schedule_ids)
+    report(f"schedules: {len(schedule_ids)} ({undated} undated)")
+
+    def item_rows() -> Iterator[dict]:
+        low, high = max(1, items_per_schedule // 2), max(1, items_per_schedule * 3 // 2)
+        for schedule_id in schedule_ids:
+            count = rng.randint(low, high) if items_per_schedule else 0
+            minute = rng.choice((6, 7, 8)) * 60
+            for _ in range(count):
+                duration = rng.choice(DURATIONS)
+                start = time(minute // 60 % 24, minute % 60)
+                yield {
+                    "schedule_id": schedule_id,
+                    "name": rng.choice(ITEM_NAMES),
+                    "start_time": start,
+                    "duration_minutes": duration,
+                    "end_time": end_time_for(start, duration or 20),
+                    "location": rng.choice(LOCATIONS),
+                    "uniform": rng.choice(UNIFORMS) if rng.random() > 0.3 else None,
+                    "lead": rng.choice(LEADS) if rng.random() > 0.4 else None,
+                    "notes": rng.choice(NOTES) if rng.random() > 0.7 else None,
+                    "icon": rng.choice(icon_names) if rng.random() > 0.2 else None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                minute = min(minute + (duration or 20) + rng.choice((0, 0, 5, 15)), 23 * 60 + 45)
+
+    item_count = 0
+    for batch in _batched(item_rows(), batch_size):
+        db.session.execute(insert(ScheduleItem).execution_options(render_nulls=True), batch)
+        item_count += len(batch)
+        if item_count % (batch_size * 20) < batch_size:
+            report(f"schedule items: {item_count}")
+    counts["schedule_items"] = item_count
+    report(f"schedule items: {item_count}")
+
+    # Weather cache rows for past days at a handful of locations
+    weather_offset = _next_id(WeatherCache)
+    weather = []
+    for n in range(weather_rows):
+        slices = {}
+        for key in ("morning", "noon", "afternoon"):
+            icon, summary = rng.choice(WEATHER)
+            slices[key] = {
+                "label": key.capitalize(),
+                "icon": icon,
+                "summary": summary,
+                "temp_f": round(rng.uniform(20, 95), 1),
+            }
+        weather.append({
+            "date_key": f"seed{weather_offset + n:028x}"[-32:],
+            "morning_json": json.dumps(slices["morning"]),
+            "noon_json": json.dumps(slices["noon"]),
+            "afternoon_json": json.dumps(slices["afternoon"]),
+            "fetched_at": now - timedelta(days=n + 1),
+            "created_at": now,
+            "updated_at": now,
+        })
+    for batch in _batched(weather, batch_size):
+        db.session.execute(insert(WeatherCache).execution_options(render_nulls=True), batch)
+    counts["weather_cache"] = len(weather)
+
+    db.session.commit()
+    # Fresh planner statistics so the new volume is reflected in query plans
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+    counts["schedule_ids"] = schedule_ids
+    return counts
+
+
+@click.command("seed")
+@click.option(
+    "--schedules",
+    default=3650,
+    show_default=True,
+    help="Schedules to create (dated ones are one per day).",
+)
+@click.option(
+    "--undated-share", default=0.05, show_default=True, help="Share of schedules without a date."
+)
+@click.option(
+    "--items",
+    "items_per_schedule",
+    default=12,
+    show_default=True,
+    help="Average items per schedule.",
+)
+@click.option("--icons", default=100, show_default=True)
+@click.option(
+    "--image-icon-share", default=0.25, show_default=True, help="Share of icons that use an image."
+)
+@click.option("--users", default=20, show_default=True)
+@click.option(
+    "--weather", "weather_rows", default=365, show_default=True, help="Weather cache rows."
+)
+@click.option(
+    "--password",
+    "user_password",
+    default="password",
+    show_default=True,
+    help="Password for seeded users.",
+)
+@click.option("--batch-size", default=5000, show_default=True, help="Rows per INSERT batch.")
+@click.option("--seed", type=int, default=None, help="Random seed for a reproducible dataset.")
+@with_appcontext
+def seed_command(**options):
+    """Generate synthetic schedules, items, icons, users and weather rows for scale testing."""
+    started = datetime.utcnow()
+    counts = seed_database(progress=click.echo, **options)
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    total = sum(v for k, v in counts.items() if isinstance(v, int))
+    click.echo(f"Seeded {total:,} rows in {elapsed:.1f}s")
@@ -0,0 +1,177 @@
+"""Interval index over a schedule's items, for "what is on now and next".
+
+Items are kept in display order (by start time) as minute-of-day intervals. An item's
+end is its ``end_time``, else ``start_time + duration_minutes``, else the next later start
+(the last item runs to midnight). Items that end past midnight are cut off there.
+
+Lookups are binary searches over the sorted starts, over a running maximum of the ends
+and over the sorted ends, so a 300-item day costs a few comparisons rather than a scan:
+
+* ``current(minute)``: the items running at ``minute``
+* ``next(minute)``: the first item starting after ``minute``
+* ``window(minute, count)``: the current items and the ``count`` after them
+* ``past_count(minute)``: how many items have ended
+* ``at(minute)``: all of the above, for rendering the sign
+
+``compact()`` is the same index for the page, which runs the same searches in JavaScript
+as the clock ticks. One index is built per schedule version and shared by the sign view and
+the transition scheduler.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import datetime, time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Schedule, ScheduleItem
+
+MINUTES_PER_DAY = 24 * 60
+MAX_CACHED_INDEXES = 256
+
+
+def minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+class NowNext:
+    """Where the day is at ``minute``: items before ``first`` have ended, ``current`` are
+    running."""
+
+    __slots__ = ("minute", "first", "current", "next", "_ends")
+
+    def __init__(
+        self, minute: int, first: int, current: List[int], next_: Optional[int], ends: List[int]
+    ):
+        self.minute = minute
+        self.first = first
+        self.current = frozenset(current)
+        self.next = next_
+        self._ends = ends
+
+    def css(self, i: int) -> str:
+        """Classes for item ``i`` on the sign."""
+        if i in self.current:
+            state = "is-now"
+        elif i < self.first or self._ends[i] <= self.minute:
+            state = "is-past"
+        else:
+            state = ""
+        return f"{state} is-next".strip() if i == self.next else state
+
+
+class ScheduleIndex:
+    __slots__ = ("starts", "ends", "_reach", "_sorted_ends", "_boundaries")
+
+    def __init__(self, intervals: Sequence[Tuple[int, int]]):
+        """``intervals`` are ``(start, end)`` minutes, sorted by start."""
+        self.starts = [start for start, _end in intervals]
+        self.ends = [end for _start, end in intervals]
+        # _reach[i]: the latest end among items 0..i; it only grows, so it can be bisected
+        self._reach: List[int] = []
+        latest = -1
+        for end in self.ends:
+            latest = max(latest, end)
+            self._reach.append(latest)
+        self._sorted_ends = sorted(self.ends)
+        self._boundaries = sorted(
+            set(self.starts) | {end for end in self.ends if end < MINUTES_PER_DAY}
+        )
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Tuple[time, Optional[time], Optional[int]]]
+    ) -> "ScheduleIndex":
+        """Build from ``(start_time, end_time, duration_minutes)`` rows sorted by start time."""
+        rows = list(rows)
+        starts = [minute_of_day(row[0]) for row in rows]
+        intervals = []
+        for i, (start_time, end_time, duration) in enumerate(rows):
+            start = starts[i]
+            if end_time is not None:
+                end = minute_of_day(end_time)
+                if end <= start:  # runs past midnight
+                    end = MINUTES_PER_DAY
+            elif duration:
+                end = min(start + duration, MINUTES_PER_DAY)
+            else:
+                later = bisect_right(starts, start, i + 1)
+                end = starts[later] if later < len(starts) else MINUTES_PER_DAY
+            intervals.append((start, max(end, start)))
+        return cls(intervals)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def current(self, minute: int) -> List[int]:
+        """Indexes of the items running at ``minute`` (start <= minute < end)."""
+        first = bisect_right(self._reach, minute)  # items before it have all ended
+        last = bisect_right(self.starts, minute)  # items from it on have not started
+        return [i for i in range(first, last) if self.ends[i] > minute]
+
+    def next(self, minute: int) -> Optional[int]:
+        """Index of the first item starting after ``minute``."""
+        i = bisect_right(self.starts, minute)
+        return i if i < len(self.starts) else None
+
+    def window(self, minute: int, count: int) -> range:
+        """The current items and the ``count`` items after them, in display order."""
+        first = bisect_right(self._reach, minute)
+        upcoming = bisect_right(self.starts, minute)
+        return range(first, min(len(self.starts), upcoming + count))
+
+    def past_count(self, minute: int) -> int:
+        return bisect_right(self._sorted_ends, minute)
+
+    def at(self, minute: int) -> NowNext:
+        return NowNext(
+            minute,
+            bisect_right(self._reach, minute),
+            self.current(minute),
+            self.next(minute),
+            self.ends,
+        )
+
+    def boundaries(self) -> List[int]:
+        """Sorted minutes at which the current or next item changes."""
+        return self._boundaries
+
+    def next_boundary(self, minute: int) -> Optional[int]:
+        i = bisect_right(self._boundaries, minute)
+        return self._boundaries[i] if i < len(self._boundaries) else None
+
+    def compact(self) -> Dict[str, list]:
+        """Starts and ends in display order, plus the running maximum of the ends, for the page."""
+        return {"s": self.starts, "e": self.ends, "r": self._reach}
+
+
+def _cache() -> Dict[Tuple[int, datetime], ScheduleIndex]:
+    return current_app.extensions.setdefault("schedule_indexes", {})
+
+
+def schedule_index(
+    schedule: Schedule, items: Optional[Sequence[ScheduleItem]] = None
+) -> ScheduleIndex:
+    """The index for this version of ``schedule``; pass its items, sorted, to skip the query."""
+    cache = _cache()
+    key = (schedule.id, schedule.updated_at)
+    index = cache.get(key)
+    if index is None:
+        if items is not None:
+            rows = [(item.start_time, item.end_time, item.duration_minutes) for item in items]
+        else:
+            rows = db.session.execute(
+                select(
+                    ScheduleItem.start_time, ScheduleItem.end_time, ScheduleItem.duration_minutes
+                )
+                .where(ScheduleItem.schedule_id == schedule.id)
+                .order_by(ScheduleItem.start_time, ScheduleItem.id)
+            ).all()
+        index = ScheduleIndex.from_rows(rows)
+        while len(cache) >= MAX_CACHED_INDEXES:
+            cache.pop(next(iter(cache)))
+        cache[key] = index
+    return index
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional
+
+from ..extensions import db
+from ..forms.schedules import get_icon_choices
+from ..models import Schedule, ScheduleItem
+
+TEXT_FIELDS = ("name", "location", "uniform", "lead", "notes")
+MAX_DURATION_MINUTES = 24 * 60
+
+
+class BatchValidationError(Exception):
+    """Raised when a batch payload fails validation; nothing has been written."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__("Invalid batch")
+        self.errors = errors
+
+
+def end_time_for(start: Optional[time], duration_minutes: Optional[int]) -> Optional[time]:
+    # Pure arithmetic version of ScheduleItem.compute_end_time for bulk use
+    if start is None or duration_minutes is None:
+        return None
+    minutes = (start.hour * 60 + start.minute + duration_minutes) % (24 * 60)
+    return time(minutes // 60, minutes % 60)
+
+
+def compute_end_times(items: List[ScheduleItem]) -> None:
+    for item in items:
+        end = end_time_for(item.start_time, item.duration_minutes)
+        if end is not None:
+            item.end_time = end
+
+
+def serialize_item(item: ScheduleItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "name": item.name,
+        "start_time": item.start_time.strftime("%H:%M") if item.start_time else None,
+        "end_time": item.end_time.strftime("%H:%M") if item.end_time else None,
+        "duration_minutes": item.duration_minutes,
+        "location": item.location,
+        "uniform": item.uniform,
+        "lead": item.lead,
+        "notes": item.notes,
+        "icon": item.icon,
+    }
+
+
+def _parse_fields(
+    raw: Dict[str, Any], icon_names: set, require_start: bool
+) -> tuple[Dict[str, Any], Dict[str, str]]:
+    """Validate one item dict, returning (clean values, field errors)."""
+    clean: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+
+    if "start_time" in raw or require_start:
+        value = raw.get("start_time")
+        if not value:
+            errors["start_time"] = "Start time is required"
+        else:
+            try:
+                clean["start_time"] = datetime.strptime(str(value), "%H:%M").time()
+            except ValueError:
+                errors["start_time"] = "Start time must be HH:MM"
+
+    if "duration_minutes" in raw:
+        value = raw.get("duration_minutes")
+        if value in (None, ""):
+            clean["duration_minutes"] = None
+        else:
+            try:
+                minutes = int(value)
+            except (TypeError, ValueError):
+                errors["duration_minutes"] = "Duration must be a whole number"
+            else:
+                if not 1 <= minutes <= MAX_DURATION_MINUTES:
+                    errors["duration_minutes"] = (
+                        f"Duration must be between 1 and {MAX_DURATION_MINUTES}"
+                    )
+                else:
+                    clean["duration_minutes"] = minutes
+
+    for field in TEXT_FIELDS:
+        if field in raw:
+            value = raw.get(field)
+            clean[field] = (str(value).strip() or None) if value is not None else None
+
+    if "icon" in raw:
+        value = raw.get("icon") or None
+        if value is not None and value not in icon_names:
+            errors["icon"] = f"Unknown icon '{value}'"
+        else:
+            clean["icon"] = value
+
+    return clean, errors
+
+
+def _apply(item: ScheduleItem, values: Dict[str, Any]) -> None:
+    old_start = item.start_time
+    for field, value in values.items():
+        setattr(item, field, value)
+    # The end time is derived from the duration, so clearing the duration clears it too
+    if "duration_minutes" in values and values["duration_minutes"] is None:
+        item.end_time = None
+    # Items without a duration keep their span when their start time moves
+    if (
+        item.duration_minutes is None
+        and item.end_time
+        and old_start
+        and item.start_time != old_start
+    ):
+        end = datetime.combine(datetime.min, item.end_time)
+        span = end - datetime.combine(datetime.min, old_start)
+        item.end_time = (datetime.combine(datetime.min, item.start_time) + span).time()
+
+
+def apply_item_batch(schedule: Schedule, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply creates, updates, deletes and a reorder to a schedule's items in one transaction.
+
+    Payload keys (all optional):
+      create:  [{client_id, start_time, duration_minutes, name, location, uniform, lead,
+                 notes, icon}]
+      update:  [{id, <any create field>}]
+      delete:  [id, ...]
+      reorder: [id, ...]  existing start-time slots are reassigned to the items in this order
+
+    Everything is validated before anything is written; on failure BatchValidationError
+    carries the full list of errors. A batch that changes nothing does not commit, so it
+    leaves the schedule's timestamp (and every kiosk) alone.
+    """
+    if not isinstance(payload, dict):
+        raise BatchValidationError([{"message": "Payload must be a JSON object"}])
+
+    creates = payload.get("create") or []
+    updates = payload.get("update") or []
+    deletes = payload.get("delete") or []
+    reorder = payload.get("reorder") or []
+    errors: List[Dict[str, Any]] = []
+    for key, value in (
+        ("create", creates),
+        ("update", updates),
+        ("delete", deletes),
+        ("reorder", reorder),
+    ):
+        if not isinstance(value, list):
+            errors.append({"op": key, "message": f"'{key}' must be a list"})
+    if errors:
+        raise BatchValidationError(errors)
+
+    # One query for the whole schedule; everything else is validated in memory
+    existing = {
+        item.id: item for item in ScheduleItem.query.filter_by(schedule_id=schedule.id).all()
+    }
+    icon_names = {value for value, _label in get_icon_choices() if value}
+
+    delete_ids = set()
+    for index, item_id in enumerate(deletes):
+        if not isinstance(item_id, int) or item_id not in existing:
+            errors.append(
+                {
+                    "op": "delete",
+                    "index": index,
+                    "id": item_id,
+                    "message": "Item not found in this schedule",
+                }
+            )
+        else:
+            delete_ids.add(item_id)
+
+    parsed_creates = []
+    for index, raw in enumerate(creates):
+        if not isinstance(raw, dict):
+            errors.append({"op": "create", "index": index, "message": "Item must be an object"})
+            continue
+        values, field_errors = _parse_fields(raw, icon_names, require_start=True)
+        for field, message in field_errors.items():
+            errors.append(
+                {
+                    "op": "create",
+                    "index": index,
+                    "client_id": raw.get("client_id"),
+                    "field": field,
+                    "message": message,
+                }
+            )
+        parsed_creates.append((raw.get("client_id"), values))
+
+    parsed_updates = []
+    for index, raw in enumerate(updates):
+        if not isinstance(raw, dict):
+            errors.append({"op": "update", "index": index, "message": "Item must be an object"})
+            continue
+        item_id = raw.get("id")
+        if not isinstance(item_id, int) or item_id not in existing:
+            errors.append(
+                {
+                    "op": "update",
+                    "index": index,
+                    "id": item_id,
+                    "message": "Item not found in this schedule",
+                }
+            )
+            continue
+        if item_id in delete_ids:
+            errors.append(
+                {
+                    "op": "update",
+                    "index": index,
+                    "id": item_id,
+                    "message": "Item is also being deleted",
+                }
+            )
+            continue
+        values, field_errors = _parse_fields(raw, icon_names, require_start=False)
+        for field, message in field_errors.items():
+            errors.append(
+                {"op": "update", "index": index, "id": item_id, "field": field, "message": message}
+            )
+        parsed_updates.append((existing[item_id], values))
+
+    if reorder:
+        remaining = set(existing) - delete_ids
+        if (
+            not all(isinstance(item_id, int) for item_id in reorder)
+            or len(set(reorder)) != len(reorder)
+            or not set(reorder) <= remaining
+        ):
+            errors.append(
+                {"op": "reorder", "message": "Reorder must list each remaining item at most once"}
+            )
+
+    if errors:
+        raise BatchValidationError(errors)
+
+    touched: List[ScheduleItem] = []
+    for item, values in parsed_updates:
+        _apply(item, values)
+        touched.append(item)
+
+    created: Dict[str, ScheduleItem] = {}
+    for index, (client_id, values) in enumerate(parsed_creates):
+        item = ScheduleItem(schedule_id=schedule.id)
+        _apply(item, values)
+        db.session.add(item)
+        touched.append(item)
+        created[str(client_id) if client_id is not None else f"new-{index}"] = item
+
+    if reorder:
+        ordered = [existing[item_id] for item_id in reorder]
+        slots = sorted(item.start_time for item in ordered)
+        for item, slot in zip(ordered, slots):
+            _apply(item, {"start_time": slot})
+        touched.extend(ordered)
+
+    compute_end_times(touched)
+
+    for item_id in delete_ids:
+        db.session.delete(existing[item_id])
+
+    # Real item changes move the schedule's timestamp at flush (see app/content.py)
+    if created or delete_ids or any(db.session.is_modified(item) for item in touched):
+        db.session.commit()
+
+    items = (
+        ScheduleItem.query.filter_by(schedule_id=schedule.id)
+        .order_by(ScheduleItem.start_time)
+        .all()
+    )
+    return {
+        "items": [serialize_item(item) for item in items],
+        "created": {client_id: item.id for client_id, item in created.items()},
+        "deleted": sorted(delete_ids),
+    }
@@ -3,9 +3,12 @@ import json
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, Any
-import requests
+import time
 from flask import current_app
+from .. import tracing
+from ..cache import get_cache
 from ..extensions import db
+from ..metrics import get_metrics
 from ..models import WeatherCache
 import hashlib
 
@@ -60,23 +63,35 @@ def fetch_open_meteo(lat: float, lon: float, tz: str) -> Dict[str, WeatherSlice]
         "hourly": "temperature_2m,weathercode",
         "timezone": tz or "UTC",
     }
+    import requests  # deferred: only needed on a cache miss
+
+    url = current_app.config.get("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+    started = time.perf_counter()
     try:
-        r = requests.get("https://api.open-meteo.com/v1/forecast", params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        with tracing.span("weather.http", **{"http.url": url}) as span:
+            r = requests.get(url, params=params, timeout=10)
+            span.set_attribute("http.status_code", r.status_code)
+            r.raise_for_status()
+            data = r.json()
     except Exception:
+        get_metrics().record_weather_call(time.perf_counter() - started)
         # Graceful fallback if network/API fails
         return {
             "morning": WeatherSlice("Morning", "cloud", "Unavailable"),
             "noon": WeatherSlice("Noon", "cloud", "Unavailable"),
             "afternoon": WeatherSlice("Afternoon", "cloud", "Unavailable"),
         }
+    get_metrics().record_weather_call(time.perf_counter() - started)
+    return parse_forecast(data, datetime.now())
+
+
+def parse_forecast(data: Dict[str, Any], now: datetime) -> Dict[str, WeatherSlice]:
+    """Pick today's morning/noon/afternoon slices out of an Open-Meteo hourly response."""
     hours = data.get("hourly", {})
     times = hours.get("time", [])
     temps = hours.get("temperature_2m", [])
     codes = hours.get("weathercode", [])
 
-    now = datetime.now()
     slot_hours = _slots(now)
     out: Dict[str, WeatherSlice] = {}
     for key, hour in slot_hours.items():
@@ -93,17 +108,31 @@ def fetch_open_meteo(lat: float, lon: float, tz: str) -> Dict[str, WeatherSlice]
     return out
 
 
-def get_weather(lat: float, lon: float, tz: str) -> Dict[str, Any]:
+def weather_cache_key(lat: float, lon: float, tz: str) -> str:
     # Cache by location+timezone+date using md5 to fit 32-char column
     today = datetime.utcnow().strftime("%Y-%m-%d")
     if lat is None or lon is None:
-        cache_key = today  # do not lock cache to empty location; will avoid persisting below
-    else:
-        raw = f"{round(lat,4)},{round(lon,4)},{tz or 'UTC'},{today}"
-        cache_key = hashlib.md5(raw.encode("utf-8")).hexdigest()
+        return today  # do not lock cache to empty location; get_weather avoids persisting it
+    raw = f"{round(lat,4)},{round(lon,4)},{tz or 'UTC'},{today}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def get_weather(lat: float, lon: float, tz: str) -> Dict[str, Any]:
+    cache_key = weather_cache_key(lat, lon, tz)
     ttl_minutes = int(current_app.config.get("WEATHER_TTL_MINUTES", 60))
-    cache: WeatherCache | None = WeatherCache.query.filter_by(date_key=cache_key).first()
-    if cache and cache.fetched_at and (datetime.utcnow() - cache.fetched_at) < timedelta(minutes=ttl_minutes):
+    shared = get_cache()
+    cached = shared.get("weather", cache_key)
+    if cached is not None:
+        return cached
+    with tracing.span("weather.cache_lookup") as span:
+        cache: WeatherCache | None = WeatherCache.query.filter_by(date_key=cache_key).first()
+        fresh = bool(
+            cache
+            and cache.fetched_at
+            and (datetime.utcnow() - cache.fetched_at) < timedelta(minutes=ttl_minutes)
+        )
+        span.set_attribute("weather.cache_hit", fresh)
+    if fresh:
         try:
             result = {
                 "morning": json.loads(cache.morning_json) if cache.morning_json else None,
@@ -117,6 +146,8 @@ def get_weather(lat: float, lon: float, tz: str) -> Dict[str, Any]:
                         result[key]["temp_f"] = round(result[key]["temp_c"] * 9 / 5 + 32, 1)
                     else:
                         result[key]["temp_f"] = None
+            age = (datetime.utcnow() - cache.fetched_at).total_seconds()
+            shared.set("weather", cache_key, result, ttl=ttl_minutes * 60 - age)
             return result
         except Exception:
             pass
@@ -141,6 +172,8 @@ def get_weather(lat: float, lon: float, tz: str) -> Dict[str, Any]:
         cache.afternoon_json = json.dumps(payload.get("afternoon"))
         cache.fetched_at = datetime.utcnow()
         db.session.commit()
+        # After the commit, whose invalidation clears the weather namespace everywhere
+        shared.set("weather", cache_key, payload, ttl=ttl_minutes * 60)
     return payload
 
 
@@ -0,0 +1,150 @@
+"""Slow-query log.
+
+Engine hooks time every statement. Statements slower than SLOW_QUERY_THRESHOLD_MS are
+logged with their parameters and the endpoint that issued them, and kept in a per-worker
+ring buffer shown on the Diagnostics page. The query plan (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN on Postgres) is captured once per distinct statement shape.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from flask import Flask, current_app, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(
+    r"\((?:\s*(?:\?|%\([^)]+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%\([^)]+\)s|:\w+|\$\d+)\s*\)"
+)
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def statement_shape(statement: str) -> str:
+    """Collapse whitespace and bind-parameter lists so equivalent statements share a plan."""
+    return IN_LIST_RE.sub("(?)", " ".join(statement.split()))
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold_ms = 100.0
+        self.entries: Deque[dict] = deque(maxlen=200)
+        self.plans: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.threshold_ms = float(app.config.get("SLOW_QUERY_THRESHOLD_MS", 100))
+        if self.threshold_ms <= 0:
+            return
+        self.entries = deque(maxlen=int(app.config.get("SLOW_QUERY_BUFFER", 200)))
+        self.plans = {}
+
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("_slow_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("_slow_query_start")
+            if not starts:
+                return
+            elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self.record(conn, cursor, statement, parameters, executemany, elapsed_ms)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            conn = exception_context.connection
+            starts = conn.info.get("_slow_query_start") if conn is not None else None
+            if starts:
+                starts.pop()
+
+    def record(self, conn, cursor, statement, parameters, executemany, elapsed_ms: float) -> None:
+        shape = statement_shape(statement)
+        key = hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+        if key not in self.plans and not executemany:
+            plan = self._explain(conn, cursor, statement, parameters)
+            if plan is not None:
+                with self._lock:
+                    self.plans.setdefault(key, plan)
+        endpoint = request.endpoint if has_request_context() else None
+        entry = {
+            "at": datetime.utcnow(),
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": shape,
+            "parameters": repr(parameters)[:500],
+            "endpoint": endpoint,
+            "path": request.path if has_request_context() else None,
+            "shape": key,
+        }
+        with self._lock:
+            self.entries.append(entry)
+        logger.warning(
+            "Slow query %.1f ms [%s] %s params=%s",
+            elapsed_ms, endpoint or "-", shape[:300], entry["parameters"],
+        )
+
+    @staticmethod
+    def _explain(conn, cursor, statement: str, parameters) -> Optional[str]:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        sqlite = conn.dialect.name == "sqlite"
+        prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+        # A fresh DBAPI cursor keeps the original cursor's result set intact. It shares the
+        # request's transaction, and on Postgres a failed statement aborts that transaction,
+        # so the EXPLAIN runs inside a savepoint that is rolled back if it fails.
+        explain_cursor = cursor.connection.cursor()
+        try:
+            if not sqlite:
+                explain_cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            try:
+                explain_cursor.execute(prefix + statement, parameters)
+                rows = explain_cursor.fetchall()
+            except Exception as e:
+                if not sqlite:
+                    explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                    explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+                return f"(EXPLAIN failed: {e})"
+            if not sqlite:
+                explain_cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        except Exception as e:
+            # No transaction to protect (autocommit): nothing else to undo
+            return f"(EXPLAIN failed: {e})"
+        finally:
+            explain_cursor.close()
+        return "\n".join(str(row[-1]) if sqlite else str(row[0]) for row in rows)
+
+    def recent(self) -> List[dict]:
+        with self._lock:
+            entries = list(self.entries)
+        return [dict(entry, plan=self.plans.get(entry["shape"])) for entry in reversed(entries)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.plans.clear()
+
+
+def init_app(app: Flask) -> SlowQueryLog:
+    log = SlowQueryLog()
+    app.extensions["slow_queries"] = log
+    log.init_app(app)
+    return log
+
+
+def get_slow_queries(app: Optional[Flask] = None) -> SlowQueryLog:
+    app = app or current_app
+    return app.extensions["slow_queries"]
@@ -0,0 +1,299 @@
+"""Static snapshots of the sign, served by nginx without reaching Python.
+
+With SNAPSHOT_DIR set, the sign page and its check-updates payload are rendered to files
+whenever display content changes (an admin write or a weather refresh, via
+``content_changed``). Each version is written to its own directory under ``versions/``
+and published by atomically repointing the ``current`` symlink, so nginx never serves a
+half-written file and keeps serving the last version while the app restarts.
+
+The check-updates payload on disk leaves out ``poll_after`` and ``next_transition``. Both
+are worked out from the time of the render and would be stale long before the next publish.
+Kiosks served from disk fall back to their own poll interval.
+
+Each publish records the ``content_changes`` revision its render read, in ``.revision``.
+Workers publish independently, so a slow render can finish after a newer one. Under a lock
+shared by all processes, ``current`` is never pointed at a version rendered from an older
+revision than the one already published.
+
+Publishing runs on a background thread per worker, because the commit that triggers it
+is still finishing. Bursts of changes collapse into one publish. ``flask snapshot``
+publishes on demand; ``--every`` keeps republishing, which keeps the weather current
+when no one is editing. The transition scheduler (``app/transitions.py``) prepares the
+next day's version before midnight; its ``transition_reached`` signal has it published at
+midnight, and the sign republished at each item boundary.
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from .content import content_changed
+from .extensions import db
+from .models import SiteSettings
+from .transitions import site_today, transition_reached
+
+logger = logging.getLogger(__name__)
+
+PAGE_FILE = "index.html"
+STATE_FILE = "check-updates.json"
+REVISION_FILE = ".revision"
+LOCK_FILE = ".lock"
+# check-updates fields that depend on the time of the request
+TIMED_STATE_FIELDS = ("poll_after", "next_transition")
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class SnapshotPublisher:
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self.keep = 5
+        self._app: Optional[Flask] = None
+        self._pending = False
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.published = 0
+        self._prepared: Optional[tuple] = None
+
+    def init_app(self, app: Flask) -> None:
+        self.directory = app.config.get("SNAPSHOT_DIR") or None
+        if not self.directory:
+            return
+        self.keep = max(2, int(app.config.get("SNAPSHOT_KEEP", 5)))
+        self._app = app
+        os.makedirs(os.path.join(self.directory, "versions"), exist_ok=True)
+
+    def render(
+        self, app: Flask, day: Optional[date] = None, now: Optional[datetime] = None
+    ) -> tuple[bytes, bytes]:
+        """Render the sign page and its check-updates payload as served by the display routes.
+
+        ``day`` and ``now`` render ahead of time; by default, as of now.
+        """
+        from .display.routes import render_sign, update_state
+
+        with app.test_request_context("/display/"):
+            try:
+                page = render_sign(day=day, now=now).encode("utf-8")
+                payload = update_state(day=day, now=now)
+                for field in TIMED_STATE_FIELDS:
+                    payload.pop(field, None)
+                state = json.dumps(payload, sort_keys=True).encode("utf-8")
+            finally:
+                db.session.remove()
+        return page, state
+
+    def current_version(self) -> Optional[str]:
+        try:
+            return os.path.basename(os.readlink(os.path.join(self.directory, "current")))
+        except OSError:
+            return None
+
+    def published_revision(self) -> int:
+        try:
+            with open(os.path.join(self.directory, REVISION_FILE)) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return 0
+
+    def publish(self, app: Optional[Flask] = None) -> str:
+        """Render and publish a snapshot now. Returns the current version.
+
+        Unchanged content is not rewritten.
+        """
+        from .sync.feed import latest_revision
+
+        app = app or current_app._get_current_object()
+        with app.app_context():
+            # Read before rendering: the render sees this revision or a newer one
+            revision = latest_revision()
+        page, state = self.render(app)
+        version = self._write(page, state)
+        self._switch(version, revision)
+        return self.current_version()
+
+    def _write(self, page: bytes, state: bytes) -> str:
+        version = hashlib.sha1(page + b"\0" + state).hexdigest()[:16]
+        versions = os.path.join(self.directory, "versions")
+        target = os.path.join(versions, version)
+        with self._lock:
+            if not os.path.isdir(target):
+                staging = tempfile.mkdtemp(prefix=".staging-", dir=versions)
+                _write(os.path.join(staging, PAGE_FILE), page)
+                _write(os.path.join(staging, STATE_FILE), state)
+                os.chmod(staging, 0o755)
+                try:
+                    os.rename(staging, target)
+                except OSError:  # another worker published the same version first
+                    shutil.rmtree(staging, ignore_errors=True)
+        return version
+
+    def _switch(self, version: str, revision: int) -> bool:
+        """Point ``current`` at ``version``, rendered at ``revision``, unless a newer render is
+        published."""
+        with self._lock, open(os.path.join(self.directory, LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # other workers and `flask snapshot` switch too
+            if revision < self.published_revision():
+                logger.info("Skipped sign snapshot %s: revision %s is older than the published one",
+                            version, revision)
+                return False
+            record = os.path.join(self.directory, f"{REVISION_FILE}-{os.getpid()}")
+            with open(record, "w") as f:
+                f.write(str(revision))
+            os.replace(record, os.path.join(self.directory, REVISION_FILE))
+            if version == self.current_version():
+                return True
+            link = os.path.join(self.directory, f".current-{os.getpid()}")
+            if os.path.lexists(link):
+                os.unlink(link)
+            os.symlink(os.path.join("versions", version), link)
+            os.replace(link, os.path.join(self.directory, "current"))
+            self.published += 1
+            self._prune(os.path.join(self.directory, "versions"), version)
+        logger.info("Published sign snapshot %s", version)
+        return True
+
+    def prepare(self, app: Flask, day: date, now: datetime) -> str:
+        """Write the version for ``day`` as of ``now`` without publishing it.
+
+        See ``activate_prepared``.
+        """
+        from .sync.feed import latest_revision
+
+        # Any worker's edit adds a content_changes row, so this detects edits made after it
+        revision = latest_revision()
+        page, state = self.render(app, day=day, now=now)
+        version = self._write(page, state)
+        # Newest on disk, so a publish before midnight does not prune it
+        os.utime(os.path.join(self.directory, "versions", version))
+        self._prepared = (day, version, revision)
+        return version
+
+    def activate_prepared(self, day: date) -> bool:
+        """Publish the version prepared for ``day``, unless content changed since.
+
+        Returns whether it did.
+        """
+        from .sync.feed import latest_revision
+
+        prepared, self._prepared = self._prepared, None
+        if prepared is None or prepared[0] != day or prepared[2] != latest_revision():
+            return False
+        if not os.path.isdir(os.path.join(self.directory, "versions", prepared[1])):
+            return False
+        return self._switch(prepared[1], prepared[2])
+
+    def _prune(self, versions: str, current: str) -> None:
+        # Older versions stay around briefly for responses nginx is still sending
+        entries = [
+            e for e in os.scandir(versions)
+            if e.is_dir() and not e.name.startswith(".") and e.name != current
+        ]
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in entries[self.keep - 1:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def request(self) -> None:
+        """Publish soon on the background thread; requests made while it is busy coalesce."""
+        if self._app is None:
+            return
+        with self._thread_lock:
+            self._pending = True
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="snapshot-publisher", daemon=True
+                )
+                self._thread.start()
+
+    def wait(self, timeout: float = 10.0) -> bool:
+        """Block until queued publishes are done (for tests and CLI use)."""
+        deadline = time.monotonic() + timeout
+        while self._thread is not None:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._thread_lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+                self._pending = False
+            try:
+                with self._app.app_context():
+                    self.publish(self._app)
+            except Exception:
+                logger.exception("Sign snapshot publish failed")
+
+
+def init_app(app: Flask) -> SnapshotPublisher:
+    publisher = SnapshotPublisher()
+    app.extensions["snapshots"] = publisher
+    publisher.init_app(app)
+    return publisher
+
+
+def get_snapshots(app: Optional[Flask] = None) -> SnapshotPublisher:
+    """The app's publisher; its ``directory`` is None when SNAPSHOT_DIR is not set."""
+    app = app or current_app
+    return app.extensions["snapshots"]
+
+
+def _on_content_changed(sender, tables=frozenset(), **extra) -> None:
+    publisher = sender.extensions.get("snapshots") if sender is not None else None
+    if publisher is not None:
+        publisher.request()
+
+
+content_changed.connect(_on_content_changed, weak=False)
+
+
+def _on_transition_reached(sender, kind=None, at=None, **extra) -> None:
+    publisher = sender.extensions.get("snapshots") if sender is not None else None
+    if publisher is None or not publisher.directory or kind == "prerender":
+        return
+    if kind == "midnight":
+        publisher.activate_prepared(site_today(SiteSettings.query.first(), at))
+    # At midnight, a fresh render follows with the new day's forecast
+    publisher.request()
+
+
+transition_reached.connect(_on_transition_reached, weak=False)
+
+
+@click.command("snapshot")
+@click.option("--every", type=float, default=None, metavar="SECONDS",
+              help="Keep republishing at this interval (for midnight rollover and weather).")
+@with_appcontext
+def snapshot_command(every: Optional[float]):
+    """Publish the sign and check-updates payload to SNAPSHOT_DIR."""
+    snapshots = get_snapshots()
+    if not snapshots.directory:
+        raise click.ClickException("SNAPSHOT_DIR is not set")
+    app = current_app._get_current_object()
+    while True:
+        click.echo(f"Published {snapshots.publish(app)} to {snapshots.directory}")
+        if not every:
+            return
+        time.sleep(every)
@@ -0,0 +1,85 @@
+"""Worker startup: persistent template bytecode and pre-fork warming.
+
+With JINJA_BYTECODE_CACHE_DIR set, compiled templates are written to disk and later
+processes load them instead of recompiling. With Gunicorn's preload_app (GUNICORN_PRELOAD),
+``warm`` runs once in the master before the workers fork. It imports the modules that
+would otherwise load on the first request, compiles every template and builds the sign
+view. The workers then share that memory copy-on-write. ``after_fork`` makes each worker
+open its own database connections.
+"""
+from __future__ import annotations
+
+import gc
+import importlib
+import os
+import time
+from typing import Dict
+
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+from .extensions import db
+
+# Imported lazily by request handlers; pulled in up front when warming a preloaded master
+WARM_IMPORTS = ("requests",)
+
+
+def configure_template_cache(app: Flask) -> None:
+    directory = app.config.get("JINJA_BYTECODE_CACHE_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    # jinja_env is created lazily, so this must run before the first template is loaded
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(directory)}
+
+
+def warm(app: Flask, imports=WARM_IMPORTS) -> Dict[str, float]:
+    """Load everything a worker would otherwise build on its first requests.
+
+    Returns timings in ms.
+    """
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    for module in imports:
+        importlib.import_module(module)
+    timings["imports"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    prefix = "display/" if app.config.get("APP_PROFILE") == "display" else ""
+    for name in app.jinja_env.list_templates(
+        filter_func=lambda n: n.startswith(prefix) and n.endswith(".html")
+    ):
+        app.jinja_env.get_template(name)
+    timings["templates"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    from .display.viewmodel import sign_view
+    from .models import Schedule, SiteSettings
+    from .transitions import site_today
+
+    with app.test_request_context("/display/"):
+        try:
+            settings = SiteSettings.query.first()
+            sign_view(settings, Schedule.active_on(site_today(settings)))
+        except Exception as e:  # e.g. a database that has not been migrated yet
+            app.logger.warning("Sign view not warmed: %s", e)
+        finally:
+            db.session.remove()
+        # Connections must not be shared with the forked workers
+        db.engine.dispose()
+    timings["sign_view"] = (time.perf_counter() - started) * 1000
+
+    # Keep everything allocated so far out of the cyclic GC, whose bookkeeping writes
+    # would otherwise copy the shared pages into every worker
+    gc.collect()
+    gc.freeze()
+    app.logger.info(
+        "Warmed app before fork: %s", ", ".join(f"{k} {v:.0f} ms" for k, v in timings.items())
+    )
+    return timings
+
+
+def after_fork(app: Flask) -> None:
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+sync_bp = Blueprint("sync", __name__)
+
+from . import routes  # noqa: E402,F401
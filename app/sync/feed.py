@@ -0,0 +1,184 @@
+"""Change feed for edge replicas.
+
+``changes_since(revision)`` returns the current state of every schedule (with its items),
+icon, settings and display row changed after ``revision``, oldest first. The revision
+numbers are the ids in ``content_changes``. A replica that has no revision yet (``None``), or one
+newer than this server has issued (the database was replaced), gets a reset: everything
+it needs, to replace its data with.
+
+Replicas only render the sign, so schedules dated before yesterday (in the site's
+timezone) are left out. A schedule that moves out of that window is sent as deleted.
+
+Postgres can commit revisions out of order: revision 7 can become visible before
+revision 6. A page therefore stops below the first missing id, and a replica never pages past
+a transaction that is still open. A missing id is also what a rolled-back transaction
+leaves, so a gap is only waited for while the row after it is younger than
+SYNC_GAP_SECONDS. A transaction that runs longer than that can still be skipped.
+
+Rows older than SYNC_RETENTION_DAYS are pruned at midnight (``prune_changes``). The newest
+row is always kept. A replica whose revision is older than the oldest row kept gets a
+reset.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, or_, select
+
+from ..extensions import db
+from ..models import ContentChange, Display, Icon, Schedule, ScheduleItem, SiteSettings
+from ..transitions import site_today
+
+# Displays first, so a reset clears them before the schedules they point at
+MODELS = {"display": Display, "schedule": Schedule, "icon": Icon, "settings": SiteSettings}
+# Replicas have no users table
+SKIPPED_COLUMNS = {"schedule": {"created_by"}}
+
+
+def _value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def serialize(entity: str, row) -> dict:
+    skipped = SKIPPED_COLUMNS.get(entity, ())
+    return {
+        c.name: _value(getattr(row, c.key)) for c in row.__table__.columns if c.name not in skipped
+    }
+
+
+def horizon() -> date:
+    """Oldest schedule date replicas keep: yesterday, where the sign is."""
+    return site_today(SiteSettings.query.first()) - timedelta(days=1)
+
+
+def _load(entity: str, ids: Iterable[int]) -> Dict[int, dict]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    model = MODELS[entity]
+    rows = model.query.filter(model.id.in_(ids)).all()
+    if entity == "schedule":
+        oldest = horizon()
+        rows = [row for row in rows if row.date is None or row.date >= oldest]
+    out = {row.id: serialize(entity, row) for row in rows}
+    if entity == "schedule" and out:
+        for data in out.values():
+            data["items"] = []
+        items = (
+            ScheduleItem.query.filter(ScheduleItem.schedule_id.in_(list(out)))
+            .order_by(ScheduleItem.start_time, ScheduleItem.id)
+        )
+        for item in items:
+            out[item.schedule_id]["items"].append(serialize("item", item))
+    return out
+
+
+def latest_revision() -> int:
+    return db.session.scalar(select(func.max(ContentChange.id))) or 0
+
+
+def visible_revision(revision: int, gap_seconds: float = 0) -> int:
+    """The largest id above ``revision`` with no id below it that may still be committed."""
+    recent = datetime.utcnow() - timedelta(seconds=gap_seconds)
+    after = ContentChange.__table__.alias("after")
+
+    def first_above(floor: int):
+        return db.session.execute(
+            select(ContentChange.id, ContentChange.changed_at)
+            .where(ContentChange.id > floor)
+            .order_by(ContentChange.id)
+            .limit(1)
+        ).first()
+
+    floor = revision
+    while True:
+        row = first_above(floor)
+        if row is not None and row.id == floor + 1:
+            # The end of the unbroken run of ids above floor, then the row after its gap
+            end = db.session.scalar(
+                select(func.min(ContentChange.id)).where(
+                    ContentChange.id > floor,
+                    ~select(after.c.id).where(after.c.id == ContentChange.id + 1).exists(),
+                )
+            )
+            row = first_above(end)
+        else:
+            end = floor
+        if row is None or row.changed_at > recent:
+            return end
+        # The gap is older than any transaction still worth waiting for
+        floor = row.id - 1
+
+
+def prune_changes(retention_days: float) -> int:
+    """Delete rows older than ``retention_days``, keeping the newest. Returns the number deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    # Up to the first row kept, so what remains is an unbroken tail of the log
+    keep = db.session.scalar(
+        select(func.min(ContentChange.id)).where(ContentChange.changed_at >= cutoff)
+    )
+    keep = min(keep, latest_revision()) if keep is not None else latest_revision()
+    deleted = db.session.execute(delete(ContentChange).where(ContentChange.id < keep)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def _reset() -> List[dict]:
+    changes = []
+    for entity in ("settings", "icon", "schedule", "display"):
+        model = MODELS[entity]
+        query = select(model.id)
+        if entity == "schedule":
+            query = query.where(or_(Schedule.date == None, Schedule.date >= horizon()))  # noqa: E711
+        ids = list(db.session.scalars(query.order_by(model.id)))
+        rows = _load(entity, ids)
+        changes.extend(
+            {"entity": entity, "id": i, "deleted": False, "data": rows[i]} for i in ids if i in rows
+        )
+    return changes
+
+
+def changes_since(revision: Optional[int], limit: int = 200, gap_seconds: float = 0) -> dict:
+    """One page of the feed. Pass the returned ``revision`` back to get the next page."""
+    oldest, latest = db.session.execute(
+        select(func.min(ContentChange.id), func.max(ContentChange.id))
+    ).one()
+    if revision is None or revision > (latest or 0) or revision < (oldest or 0) - 1:
+        # Rows past the first gap are re-sent by the next incremental page
+        return {
+            "revision": visible_revision(0, gap_seconds),
+            "reset": True,
+            "more": False,
+            "changes": _reset(),
+        }
+
+    ceiling = visible_revision(revision, gap_seconds)
+    newest = func.max(ContentChange.id).label("revision")
+    rows = db.session.execute(
+        select(ContentChange.entity, ContentChange.entity_id, newest)
+        .where(ContentChange.id > revision, ContentChange.id <= ceiling)
+        .group_by(ContentChange.entity, ContentChange.entity_id)
+        .order_by(newest)
+        .limit(limit + 1)
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    next_revision = rows[-1].revision if more else ceiling
+
+    loaded: Dict[str, Dict[int, dict]] = {}
+    for entity in MODELS:
+        loaded[entity] = _load(entity, (row.entity_id for row in rows if row.entity == entity))
+    changes = []
+    for row in rows:
+        data: Optional[dict] = loaded.get(row.entity, {}).get(row.entity_id)
+        changes.append({
+            "revision": row.revision,
+            "entity": row.entity,
+            "id": row.entity_id,
+            "deleted": data is None,
+            "data": data,
+        })
+    return {"revision": next_revision, "reset": False, "more": more, "changes": changes}
@@ -0,0 +1,221 @@
+"""Edge replica: keep a local database in step with a central server's change feed.
+
+A display node at a site with a slow WAN link runs ``flask sync-pull`` against its own
+(usually SQLite) database and serves kiosks from it, typically with APP_PROFILE=display.
+Each pull asks the central ``/sync/changes`` endpoint for what changed since the last
+applied revision and writes it with Core statements, keeping the central ids and
+timestamps. Uploaded images referenced by icons and settings are downloaded once.
+Only the revision number is stored locally, in SYNC_STATE_FILE, and it is written after
+the data commits. A crash in between just re-applies the same, idempotent, page.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time as time_module
+from datetime import date, datetime, time
+from typing import Iterable, Optional, Set
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Date, DateTime, Time, delete, insert, update
+from werkzeug.security import safe_join
+
+from ..extensions import db
+from ..models import Schedule, ScheduleItem
+from .feed import MODELS, horizon
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {Date: date.fromisoformat, DateTime: datetime.fromisoformat, Time: time.fromisoformat}
+
+
+def _row(model, data: dict) -> dict:
+    out = {}
+    for column in model.__table__.columns:
+        if column.name not in data:
+            continue
+        value = data[column.name]
+        parser = PARSERS.get(type(column.type))
+        out[column.name] = parser(value) if parser and value is not None else value
+    return out
+
+
+def _upsert(model, row: dict) -> None:
+    table = model.__table__
+    values = {k: v for k, v in row.items() if k != "id"}
+    if not db.session.execute(
+        update(table).where(table.c.id == row["id"]).values(**values)
+    ).rowcount:
+        db.session.execute(insert(table).values(**row))
+
+
+def _delete_schedule(schedule_id: int) -> None:
+    db.session.execute(
+        delete(ScheduleItem.__table__).where(ScheduleItem.schedule_id == schedule_id)
+    )
+    db.session.execute(delete(Schedule.__table__).where(Schedule.id == schedule_id))
+
+
+def apply_changes(page: dict) -> int:
+    """Apply one feed page to the local database and commit. Returns the number of changes."""
+    if page.get("reset"):
+        db.session.execute(delete(ScheduleItem.__table__))
+        for model in MODELS.values():
+            db.session.execute(delete(model.__table__))
+    for change in page["changes"]:
+        model = MODELS.get(change["entity"])
+        if model is None:
+            continue
+        if change["deleted"]:
+            if model is Schedule:
+                _delete_schedule(change["id"])
+            else:
+                db.session.execute(delete(model.__table__).where(model.id == change["id"]))
+            continue
+        data = dict(change["data"])
+        items = data.pop("items", None)
+        row = _row(model, data)
+        if model is Schedule and row.get("is_active"):
+            # The central server activated this one, so any other active row is stale
+            db.session.execute(
+                update(Schedule.__table__).where(Schedule.id != row["id"]).values(is_active=False)
+            )
+        _upsert(model, row)
+        if items is not None:
+            db.session.execute(
+                delete(ScheduleItem.__table__).where(ScheduleItem.schedule_id == row["id"])
+            )
+            if items:
+                db.session.execute(
+                    insert(ScheduleItem.__table__), [_row(ScheduleItem, item) for item in items]
+                )
+    # Schedules that fell out of the feed's window are never sent again
+    stale = db.session.scalars(db.select(Schedule.id).where(Schedule.date < horizon())).all()
+    for schedule_id in stale:
+        _delete_schedule(schedule_id)
+    db.session.commit()
+    return len(page["changes"])
+
+
+def asset_paths(changes: Iterable[dict]) -> Set[str]:
+    """Static file paths (relative to /static) referenced by icons and settings in ``changes``."""
+    paths = set()
+    for change in changes:
+        data = change.get("data") or {}
+        for key in ("image_path", "logo_path", "background_image_path"):
+            if data.get(key):
+                paths.add(data[key])
+    return paths
+
+
+class Replica:
+    def __init__(self, app: Flask, source: str, token: str, state_file: str, http=None):
+        import requests  # deferred: only edge nodes pull
+
+        self.app = app
+        self.source = source.rstrip("/")
+        self.state_file = state_file
+        self.http = http or requests.Session()
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # (table, id) pairs applied by the last pull, for purging edge caches
+        self.changed: Set[tuple] = set()
+
+    @property
+    def revision(self) -> Optional[int]:
+        try:
+            with open(self.state_file) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, revision: int) -> None:
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(revision))
+        os.replace(tmp, self.state_file)
+
+    def _fetch_assets(self, paths: Iterable[str]) -> None:
+        for path in sorted(paths):
+            # The path comes from the central server; never write outside the static folder
+            target = safe_join(self.app.static_folder, path)
+            if target is None or os.path.exists(target):
+                continue
+            response = self.http.get(f"{self.source}/static/{path}", timeout=30)
+            if response.status_code != 200:
+                logger.warning("Sync: could not download %s (%s)", path, response.status_code)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(response.content)
+
+    def pull(self) -> int:
+        """Apply every page available now. Returns the number of changes applied."""
+        applied = 0
+        self.changed = set()
+        while True:
+            params = {} if self.revision is None else {"since": self.revision}
+            response = self.http.get(
+                f"{self.source}/sync/changes", params=params, headers=self.headers, timeout=60
+            )
+            response.raise_for_status()
+            page = response.json()
+            self._fetch_assets(asset_paths(page["changes"]))
+            with self.app.app_context():
+                applied += apply_changes(page)
+            self.changed |= {
+                (MODELS[c["entity"]].__tablename__, c["id"])
+                for c in page["changes"]
+                if c["entity"] in MODELS
+            }
+            self._save(page["revision"])
+            if not page["more"]:
+                return applied
+
+
+@click.command("sync-pull")
+@click.option("--source", default=None, help="Central server URL (default: SYNC_SOURCE_URL).")
+@click.option(
+    "--every", type=float, default=None, metavar="SECONDS", help="Keep pulling at this interval."
+)
+@with_appcontext
+def sync_pull_command(source: Optional[str], every: Optional[float]):
+    """Pull display content changes from the central server into this node's database."""
+    app = current_app._get_current_object()
+    source = source or app.config.get("SYNC_SOURCE_URL")
+    token = app.config.get("SYNC_TOKEN")
+    if not source or not token:
+        raise click.ClickException("Set SYNC_SOURCE_URL (or --source) and SYNC_TOKEN")
+    # A replica database is disposable, so it is created here rather than migrated
+    db.create_all()
+    state_file = app.config.get("SYNC_STATE_FILE") or os.path.join(
+        app.instance_path, "sync-revision"
+    )
+    replica = Replica(app, source, token, state_file)
+    from ..cache import get_cache
+    from ..edge_cache import get_edge_cache
+    from ..snapshots import get_snapshots
+
+    edge_cache, snapshots = get_edge_cache(app), get_snapshots(app)
+
+    while True:
+        try:
+            applied = replica.pull()
+            if applied:
+                click.echo(f"Applied {applied} change(s), now at revision {replica.revision}")
+                if snapshots.directory:
+                    snapshots.publish(app)
+                # Core writes skip the content_changed signal,
+                # so tell the workers and the proxy here
+                tables = {table for table, _ in replica.changed}
+                get_cache(app).invalidate(tables, replica.changed)
+                edge_cache.purge(tables, replica.changed)
+                edge_cache.wait()
+        except Exception as e:  # keep serving the last good data through WAN outages
+            if not every:
+                raise
+            logger.warning("Sync pull failed: %s", e)
+        if not every:
+            return
+        time_module.sleep(every)
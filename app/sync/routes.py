@@ -0,0 +1,22 @@
+import hmac
+
+from flask import abort, current_app, jsonify, request
+
+from . import sync_bp
+from .feed import changes_since
+
+
+@sync_bp.route("/changes")
+def changes():
+    """Display content changed since ``?since=<revision>``; omit ``since`` for a full reset."""
+    token = current_app.config.get("SYNC_TOKEN")
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"error": "unauthorized"}), 401
+    since = request.args.get("since", type=int)
+    limit = min(max(request.args.get("limit", 200, type=int), 1), 1000)
+    page = changes_since(
+        since, limit=limit, gap_seconds=current_app.config.get("SYNC_GAP_SECONDS", 300)
+    )
+    return jsonify(page)
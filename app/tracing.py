@@ -0,0 +1,390 @@
+"""Built-in request tracing with W3C trace-context propagation.
+
+Spans are opened for each request, every SQL statement, template renders and the weather
+service, and can be added anywhere with ``tracing.span("name")``. An incoming
+``traceparent`` header makes the request span a child of the caller's span, and the
+response carries the request's own ``traceparent`` so clients can correlate.
+
+Finished spans are batched and exported either to a JSON-lines file or to an
+OTLP/HTTP JSON collector (``<endpoint>/v1/traces``). Spans still queued when the process
+exits are exported by an ``atexit`` hook. With tracing off every call is a no-op.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, before_render_template, current_app, g, request, template_rendered
+from sqlalchemy import event
+
+from .extensions import db
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Span:
+    __slots__ = (
+        "tracer", "trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.processor.submit(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as fh:
+            for span in spans:
+                fh.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OTLPHttpExporter:
+    """Posts spans as OTLP/JSON, accepted by the OpenTelemetry Collector, Jaeger and Tempo."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+
+    @staticmethod
+    def _value(value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _span(self, span: Span) -> dict:
+        server = span.parent_id is None or span.attributes.get("span.kind") == "server"
+        return {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": 2 if server else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": self._value(v)} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        import requests
+
+        service = {"key": "service.name", "value": {"stringValue": self.service_name}}
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [service]},
+            "scopeSpans": [{
+                "scope": {"name": "app.tracing"},
+                "spans": [self._span(span) for span in spans],
+            }],
+        }]}
+        requests.post(self.url, json=body, timeout=5)
+
+
+class BatchProcessor:
+    """Hands finished spans to the exporter from a background thread."""
+
+    def __init__(self, exporter=None, interval: float = 2.0, max_batch: int = 512):
+        self.exporter = exporter
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def submit(self, span: Span) -> None:
+        if self.exporter is None:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            return  # drop rather than slow requests down
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="trace-exporter", daemon=True
+                    )
+                    self._thread.start()
+
+    def _drain(self) -> List[Span]:
+        spans = []
+        while len(spans) < self.max_batch:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def flush(self) -> None:
+        while True:
+            spans = self._drain()
+            if not spans:
+                return
+            try:
+                self.exporter.export(spans)
+            except Exception:
+                pass  # a missing collector must never break the app
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the exporter thread and export what is still queued."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.processor = BatchProcessor()
+
+    # -- span API --------------------------------------------------------
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        parent = parent or _current_span.get()
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Any]:
+        """Open a child of the current span; a no-op when tracing is off or unsampled."""
+        if not self.enabled or _current_span.get() is None:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    # -- request lifecycle -----------------------------------------------
+
+    @staticmethod
+    def _parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+        match = TRACEPARENT_RE.match((header or "").strip().lower())
+        if not match or match.group(1) == "0" * 32:
+            return None
+        return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+    def _start_request(self) -> None:
+        incoming = self._parse_traceparent(request.headers.get("traceparent"))
+        if incoming:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if not sampled:
+            return
+        span = Span(
+            self,
+            f"{request.method} {request.url_rule or request.path}",
+            trace_id,
+            parent_id,
+            {
+                "span.kind": "server",
+                "http.method": request.method,
+                "http.target": request.full_path.rstrip("?"),
+                "http.route": str(request.url_rule) if request.url_rule else None,
+                "flask.endpoint": request.endpoint,
+            },
+        )
+        g._trace_span = span
+        g._trace_token = _current_span.set(span)
+
+    def _finish_response(self, response):
+        span = g.get("_trace_span")
+        if span is not None:
+            span.set_attribute("http.status_code", response.status_code)
+            response.headers["traceparent"] = span.traceparent
+        return response
+
+    def _end_request(self, exc: Optional[BaseException]) -> None:
+        span = g.pop("_trace_span", None)
+        if span is None:
+            return
+        if exc is not None:
+            span.error = f"{type(exc).__name__}: {exc}"
+        _current_span.reset(g.pop("_trace_token"))
+        span.end()
+
+    # -- Flask wiring ----------------------------------------------------
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = bool(app.config.get("TRACING_ENABLED"))
+        if not self.enabled:
+            return
+        self.sample_rate = float(app.config.get("TRACING_SAMPLE_RATE", 1.0))
+        exporter_name = app.config.get("TRACING_EXPORTER", "file")
+        if exporter_name == "otlp" and app.config.get("TRACING_OTLP_ENDPOINT"):
+            exporter = OTLPHttpExporter(
+                app.config["TRACING_OTLP_ENDPOINT"],
+                app.config.get("TRACING_SERVICE_NAME", "welcome-board"),
+            )
+        else:
+            exporter = FileExporter(
+                app.config.get("TRACING_FILE") or os.path.join(app.instance_path, "traces.jsonl")
+            )
+        self.processor = BatchProcessor(
+            exporter, float(app.config.get("TRACING_EXPORT_INTERVAL", 2.0))
+        )
+        # The exporter thread is a daemon: without this, the last batch dies with the worker
+        atexit.register(self.processor.shutdown)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_response)
+        app.teardown_request(self._end_request)
+
+        def on_before_render(sender, template, context, **extra):
+            if _current_span.get() is None:
+                return
+            span = self.start_span(
+                "render " + (template.name or "template"), **{"template.name": template.name}
+            )
+            g._trace_template = (span, _current_span.set(span))
+
+        def on_rendered(sender, template, context, **extra):
+            pending = g.pop("_trace_template", None)
+            if pending:
+                span, token = pending
+                _current_span.reset(token)
+                span.end()
+
+        before_render_template.connect(on_before_render, app, weak=False)
+        template_rendered.connect(on_rendered, app, weak=False)
+
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _current_span.get() is None:
+                return
+            span = self.start_span("db.query", **{
+                "db.system": conn.dialect.name,
+                "db.statement": " ".join(statement.split())[:500],
+            })
+            conn.info.setdefault("_trace_spans", []).append(span)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            spans = conn.info.get("_trace_spans")
+            if spans:
+                spans.pop().end()
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            conn = exception_context.connection
+            spans = conn.info.get("_trace_spans") if conn is not None else None
+            if spans:
+                span = spans.pop()
+                span.error = str(exception_context.original_exception)
+                span.end()
+
+
+def init_app(app: Flask) -> Tracer:
+    tracer = Tracer()
+    app.extensions["tracer"] = tracer
+    tracer.init_app(app)
+    return tracer
+
+
+def get_tracer(app: Optional[Flask] = None) -> Tracer:
+    app = app or current_app
+    return app.extensions["tracer"]
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Open a child of the current span, with the tracer of the request that started it."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    with parent.tracer.span(name, **attributes) as child:
+        yield child
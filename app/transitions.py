@@ -0,0 +1,256 @@
+"""The instants at which the sign changes without anyone editing, and a scheduler that acts on them.
+
+The sign's content depends on the clock in two ways. At local midnight in
+``SiteSettings.timezone``, the next day's dated schedule takes over. At each item's start
+and end, the current and next items move on. ``next_transition`` returns the soonest of
+these for a schedule. check-updates sends it to kiosks, so they check right after it
+instead of waiting for their next poll.
+
+``TransitionScheduler`` runs on a background thread in one worker per host, chosen with a
+file lock, and wakes at each instant:
+
+* TRANSITION_PRERENDER_SECONDS before midnight, it builds tomorrow's sign view and writes
+  tomorrow's snapshot (without publishing it).
+* At midnight, it prunes the sync change log to SYNC_RETENTION_DAYS.
+
+Every instant is then sent as ``transition_reached``. At midnight the snapshot publisher
+(``app/snapshots.py``) publishes the prepared snapshot, so the switch is instant, and the
+edge cache (``app/edge_cache.py``) purges every sign that follows the active schedule. At an
+item boundary they republish the snapshot and purge that schedule's signs. The scheduler
+replans when content changes (``cache_invalidated``) and at least every
+TRANSITION_REPLAN_SECONDS.
+"""
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from blinker import Namespace
+from flask import Flask, current_app
+from sqlalchemy import select
+
+from .cache import cache_invalidated
+from .extensions import db
+from .models import Display, Schedule, SiteSettings
+from .services.schedule_index import schedule_index
+
+logger = logging.getLogger(__name__)
+
+_signals = Namespace()
+transition_reached = _signals.signal("transition-reached")
+
+
+class Transition(NamedTuple):
+    at: datetime  # aware, UTC
+    kind: str  # "prerender", "midnight" or "item"
+    schedule_id: Optional[int] = None
+
+
+def site_zone(settings: Optional[SiteSettings]):
+    name = settings.timezone if settings is not None and settings.timezone else "UTC"
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown timezone %r in site settings, using UTC", name)
+        return timezone.utc
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def site_today(settings: Optional[SiteSettings], now: Optional[datetime] = None) -> date:
+    """The date the sign shows, in the site's timezone."""
+    return (now or utc_now()).astimezone(site_zone(settings)).date()
+
+
+def site_minute(settings: Optional[SiteSettings], now: Optional[datetime] = None) -> int:
+    """Minutes since local midnight, as used by the schedule index."""
+    local = (now or utc_now()).astimezone(site_zone(settings))
+    return local.hour * 60 + local.minute
+
+
+def next_midnight(settings: Optional[SiteSettings], now: Optional[datetime] = None) -> datetime:
+    now = now or utc_now()
+    zone = site_zone(settings)
+    tomorrow = now.astimezone(zone).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, time.min, tzinfo=zone).astimezone(timezone.utc)
+
+
+def item_transitions(
+    settings: Optional[SiteSettings], schedule: Schedule, now: datetime
+) -> List[datetime]:
+    """Item boundaries still to come today, as aware UTC datetimes."""
+    zone = site_zone(settings)
+    local = now.astimezone(zone)
+    out = []
+    for minute in schedule_index(schedule).boundaries():
+        at = datetime.combine(local.date(), time(minute // 60, minute % 60), tzinfo=zone)
+        if at > local:
+            out.append(at.astimezone(timezone.utc))
+    return out
+
+
+def next_transition(
+    settings: Optional[SiteSettings], schedule: Optional[Schedule], now: Optional[datetime] = None
+) -> datetime:
+    """The next instant the sign for ``schedule`` changes on its own."""
+    now = now or utc_now()
+    midnight = next_midnight(settings, now)
+    if schedule is None:
+        return midnight
+    upcoming = item_transitions(settings, schedule, now)
+    return min(upcoming[0], midnight) if upcoming else midnight
+
+
+class TransitionScheduler:
+    def __init__(self):
+        self.enabled = False
+        self.prerender_seconds = 60
+        self.replan_seconds = 300
+        self.lock_file: Optional[str] = None
+        self.fired = 0
+        self._app: Optional[Flask] = None
+        self._pid: Optional[int] = None
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = bool(app.config.get("TRANSITION_SCHEDULER", True)) and not app.testing
+        self.prerender_seconds = float(app.config.get("TRANSITION_PRERENDER_SECONDS", 60))
+        self.replan_seconds = float(app.config.get("TRANSITION_REPLAN_SECONDS", 300))
+        self.lock_file = app.config.get("TRANSITION_LOCK_FILE") or os.path.join(
+            app.instance_path, "transitions.lock"
+        )
+        self._app = app
+        if self.enabled:
+            # Started from the first request, so each forked worker gets its own thread
+            app.before_request(self.start)
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="transition-scheduler", daemon=True).start()
+
+    def plan(self, now: Optional[datetime] = None) -> List[Transition]:
+        """Upcoming instants, soonest first, for the active schedule and those assigned to
+        displays."""
+        now = now or utc_now()
+        settings = SiteSettings.query.first()
+        midnight = next_midnight(settings, now)
+        events = [Transition(midnight, "midnight")]
+        prerender = midnight - timedelta(seconds=self.prerender_seconds)
+        if prerender > now:
+            events.append(Transition(prerender, "prerender"))
+        schedules = {}
+        active = Schedule.active_on(site_today(settings, now))
+        if active is not None:
+            schedules[active.id] = active
+        assigned = db.session.scalars(
+            select(Display.schedule_id).where(Display.schedule_id != None).distinct()  # noqa: E711
+        )
+        for schedule in Schedule.query.filter(Schedule.id.in_(list(assigned))):
+            schedules[schedule.id] = schedule
+        for schedule in schedules.values():
+            events.extend(
+                Transition(at, "item", schedule.id)
+                for at in item_transitions(settings, schedule, now)[:1]
+            )
+        return sorted(events, key=lambda event: event.at)
+
+    def fire(self, event: Transition) -> None:
+        """Act on one instant (needs an app context)."""
+        from .sync.feed import prune_changes
+
+        app = current_app._get_current_object()
+        if event.kind == "prerender":
+            self.prerender(app, event.at)
+        elif event.kind == "midnight":
+            retention = app.config.get("SYNC_RETENTION_DAYS", 30)
+            if retention:
+                prune_changes(retention)
+        self.fired += 1
+        transition_reached.send(app, kind=event.kind, at=event.at, schedule_id=event.schedule_id)
+
+    def prerender(self, app: Flask, at: datetime) -> None:
+        """Build tomorrow's sign ahead of the switch at the midnight after ``at``."""
+        from .display.viewmodel import sign_view
+        from .snapshots import get_snapshots
+
+        snapshots = get_snapshots(app)
+        settings = SiteSettings.query.first()
+        tomorrow = site_today(settings, next_midnight(settings, at))
+        sign_view(settings, Schedule.active_on(tomorrow))
+        if snapshots.directory:
+            snapshots.prepare(app, tomorrow, now=next_midnight(settings, at))
+
+    def _acquire_leadership(self):
+        os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+        handle = open(self.lock_file, "a")
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle  # held for the life of the process
+            except OSError:
+                self._wake.wait(self.replan_seconds)
+                self._wake.clear()
+
+    def _run(self) -> None:
+        app = self._app
+        self._leader = self._acquire_leadership()
+        logger.info("Transition scheduler running in worker %s", os.getpid())
+        while True:
+            try:
+                with app.app_context():
+                    try:
+                        events = self.plan()
+                    finally:
+                        db.session.remove()
+                due = [event for event in events if event.at == events[0].at]
+                wait = (due[0].at - utc_now()).total_seconds()
+                if wait > 0:
+                    woke = self._wake.wait(min(wait, self.replan_seconds))
+                    self._wake.clear()
+                    if wait > self.replan_seconds or (woke and due[0].at > utc_now()):
+                        # Content changed or the wait was long: plan again with fresh data
+                        continue
+                with app.app_context():
+                    try:
+                        for event in due:
+                            self.fire(event)
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.exception("Transition scheduler failed; retrying")
+                self._wake.wait(self.replan_seconds)
+                self._wake.clear()
+
+
+def init_app(app: Flask) -> TransitionScheduler:
+    scheduler = TransitionScheduler()
+    app.extensions["transitions"] = scheduler
+    scheduler.init_app(app)
+    return scheduler
+
+
+def get_transitions(app: Optional[Flask] = None) -> TransitionScheduler:
+    app = app or current_app
+    return app.extensions["transitions"]
+
+
+def _on_cache_invalidated(sender, tables=frozenset(), **extra) -> None:
+    scheduler = sender.extensions.get("transitions") if sender is not None else None
+    if scheduler is not None:
+        scheduler._wake.set()
+
+
+cache_invalidated.connect(_on_cache_invalidated, weak=False)
@@ -4,6 +4,7 @@ from . import users_bp
 from ..extensions import db
 from ..models import User
 from ..forms.users import UserForm
+from ..auth.identity import get_user_cache
 
 
 def admin_required(f):
@@ -66,6 +67,7 @@ def edit_user(user_id):
             user.set_password(form.password.data)
         
         db.session.commit()
+        get_user_cache().invalidate(user.id)
         flash(f"User {user.email} updated successfully", "success")
         return redirect(url_for("users.list_users"))
     return render_template("users/form.html", form=form, title="Edit User", user=user)
@@ -83,6 +85,7 @@ def delete_user(user_id):
     email = user.email
     db.session.delete(user)
     db.session.commit()
+    get_user_cache().invalidate(user_id)
     flash(f"User {email} deleted successfully", "success")
     return redirect(url_for("users.list_users"))
 
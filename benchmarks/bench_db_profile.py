@@ -0,0 +1,134 @@
+"""Compare SQLite throughput with and without the tuned engine profile.
+
+Reader threads play kiosks rendering the sign's queries while writer threads play admins
+saving schedule items. Each run uses a fresh database file.
+
+    python -m benchmarks.bench_db_profile --seconds 10 --readers 8 --writers 2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from datetime import time as dtime
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.extensions import db
+from app.models import Schedule, ScheduleItem, SiteSettings
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(profile: str, seconds: float, readers: int, writers: int, workdir: Path) -> dict:
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir / f'bench-{profile}.db'}",
+        "DB_PROFILE": profile,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(SiteSettings())
+        sched = Schedule(name="Bench", is_active=True)
+        db.session.add(sched)
+        db.session.flush()
+        for n in range(100):
+            db.session.add(
+                ScheduleItem(schedule_id=sched.id, start_time=dtime(n % 24, 0), duration_minutes=30)
+            )
+        db.session.commit()
+        schedule_id = sched.id
+
+    stop = time.monotonic() + seconds
+    results = {"read": [], "write": [], "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        latencies, errors = [], 0
+        with app.app_context():
+            while time.monotonic() < stop:
+                started = time.perf_counter()
+                try:
+                    SiteSettings.query.first()
+                    active = Schedule.active_on(date.today())
+                    ScheduleItem.query.filter_by(schedule_id=active.id).order_by(ScheduleItem.start_time).all()
+                    db.session.rollback()
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    db.session.rollback()
+                    errors += 1
+        with lock:
+            results["read"].extend(latencies)
+            results["errors"] += errors
+
+    def writer():
+        latencies, errors, n = [], 0, 0
+        with app.app_context():
+            while time.monotonic() < stop:
+                started = time.perf_counter()
+                try:
+                    item = (
+                        ScheduleItem.query.filter_by(schedule_id=schedule_id)
+                        .offset(n % 100)
+                        .first()
+                    )
+                    item.notes = f"edit {n}"
+                    db.session.commit()
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    db.session.rollback()
+                    errors += 1
+                n += 1
+        with lock:
+            results["write"].extend(latencies)
+            results["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with app.app_context():
+        db.engine.dispose()
+
+    def summary(latencies):
+        return {
+            "ops_per_sec": round(len(latencies) / seconds, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2) if latencies else None,
+        }
+
+    return {
+        "profile": app.extensions["db_profile"].describe(),
+        "reads": summary(results["read"]),
+        "writes": summary(results["write"]),
+        "errors": results["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        report = {
+            p: run(p, args.seconds, args.readers, args.writers, Path(tmp)) for p in ("none", "auto")
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
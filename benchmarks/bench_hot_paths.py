@@ -0,0 +1,308 @@
+"""Micro-benchmarks for the hot paths, with JSON results that can be compared between commits.
+
+Everything runs offline against a fresh SQLite database: the weather cache is pre-filled
+and forecast parsing is fed a canned Open-Meteo response.
+
+    python -m benchmarks.bench_hot_paths --output bench.json
+    python -m benchmarks.bench_hot_paths --compare bench.json          # exit 1 on regression
+    python -m benchmarks.bench_hot_paths --quick --only sign_render    # smoke run
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from datetime import time as dtime
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import sqlalchemy
+
+from app import create_app
+from app.extensions import db
+from app.models import Icon, Schedule, ScheduleItem, SiteSettings, User, WeatherCache
+from app.services.weather import get_weather, parse_forecast, weather_cache_key
+
+LAT, LON, TZ = 38.8977, -77.0365, "America/New_York"
+SIGN_SIZES = (10, 100, 1000)
+EXCEL_ROWS = 10_000
+QUICK_SCALE = 100  # --quick divides row counts by this
+
+
+def measure(
+    fn: Callable[[], object], min_rounds: int = 5, min_seconds: float = 1.0
+) -> Dict[str, float]:
+    """Time fn until both min_rounds and min_seconds are reached (after one warm-up call)."""
+    fn()
+    timings: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(timings) < min_rounds or time.perf_counter() - started < min_seconds:
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+            gc.collect(0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    return {
+        "rounds": len(timings),
+        "min_ms": round(timings[0] * 1000, 3),
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+    }
+
+
+def _items(schedule_id: int, count: int, now: datetime) -> List[dict]:
+    rows = []
+    for n in range(count):
+        minutes = (n * 7) % (24 * 60)
+        rows.append({
+            "schedule_id": schedule_id,
+            "name": f"Item {n}",
+            "start_time": dtime(minutes // 60, minutes % 60),
+            "end_time": dtime((minutes + 30) % (24 * 60) // 60, (minutes + 30) % 60),
+            "duration_minutes": 30,
+            "location": "Main Hall",
+            "uniform": "Class B",
+            "lead": "Duty Officer",
+            "notes": "Bring radios",
+            "icon": f"icon-{n % 20}",
+            "created_at": now,
+            "updated_at": now,
+        })
+    return rows
+
+
+def forecast_payload(days: int = 7) -> dict:
+    """A canned Open-Meteo hourly response covering today and the following days."""
+    start = datetime.combine(date.today(), dtime())
+    hours = [start + timedelta(hours=n) for n in range(24 * days)]
+    return {
+        "hourly": {
+            "time": [h.strftime("%Y-%m-%dT%H:%M") for h in hours],
+            "temperature_2m": [round(12 + (n % 24) * 0.4, 1) for n in range(len(hours))],
+            "weathercode": [(0, 2, 3, 61, 80)[n % 5] for n in range(len(hours))],
+        }
+    }
+
+
+class Suite:
+    def __init__(self, workdir: Path, quick: bool = False):
+        self.quick = quick
+        self.sign_sizes = (
+            tuple(max(1, n // QUICK_SCALE) for n in SIGN_SIZES) if quick else SIGN_SIZES
+        )
+        self.excel_rows = EXCEL_ROWS // QUICK_SCALE if quick else EXCEL_ROWS
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir / 'bench.db'}",
+            "WTF_CSRF_ENABLED": False,
+            "METRICS_ENABLED": False,
+            "SLOW_QUERY_THRESHOLD_MS": 0,
+            "UPLOAD_FOLDER": str(workdir / "uploads"),
+        })
+        self.schedules: Dict[str, int] = {}
+        self._seed()
+        self.client = self.app.test_client()
+        self.client.post("/auth/login", data={"email": "bench@example.com", "password": "bench"})
+        self.export_bytes = self.client.get(f"/schedules/{self.schedules['excel']}/export").data
+
+    def _seed(self) -> None:
+        now = datetime.utcnow()
+        with self.app.app_context():
+            db.create_all()
+            user = User(email="bench@example.com", is_admin=True)
+            user.set_password("bench")
+            db.session.add(user)
+            db.session.add(SiteSettings(latitude=LAT, longitude=LON, timezone=TZ))
+            db.session.execute(
+                db.insert(Icon),
+                [
+                    {
+                        "name": f"icon-{n}",
+                        "enabled": True,
+                        "characters": "★",
+                        "font": "Arial",
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for n in range(20)
+                ],
+            )
+            cached = {
+                k: {"label": k.capitalize(), "icon": "sun", "summary": "Clear", "temp_f": 70.0}
+                for k in ("morning", "noon", "afternoon")
+            }
+            db.session.add(WeatherCache(
+                date_key=weather_cache_key(LAT, LON, TZ),
+                morning_json=json.dumps(cached["morning"]),
+                noon_json=json.dumps(cached["noon"]),
+                afternoon_json=json.dumps(cached["afternoon"]),
+                fetched_at=now,
+            ))
+            names = [f"sign-{n}" for n in self.sign_sizes] + ["excel"]
+            for name in names:
+                schedule = Schedule(name=name, is_active=False)
+                db.session.add(schedule)
+                db.session.flush()
+                self.schedules[name] = schedule.id
+            for n in self.sign_sizes:
+                db.session.execute(
+                    db.insert(ScheduleItem), _items(self.schedules[f"sign-{n}"], n, now)
+                )
+            db.session.execute(
+                db.insert(ScheduleItem), _items(self.schedules["excel"], self.excel_rows, now)
+            )
+            db.session.commit()
+
+    def _activate(self, name: str) -> None:
+        with self.app.app_context():
+            db.session.get(Schedule, self.schedules[name]).activate()
+            db.session.commit()
+
+    def _get(self, url: str) -> Callable[[], object]:
+        def call():
+            response = self.client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return call
+
+    def cases(self) -> Dict[str, Callable[[], Dict[str, float]]]:
+        cases: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+        for n in self.sign_sizes:
+            def sign_render(n=n):
+                self._activate(f"sign-{n}")
+                return measure(self._get("/display/"))
+            cases[f"sign_render_{n}_items"] = sign_render
+
+        cases["check_updates"] = lambda: measure(self._get("/display/check-updates"))
+
+        def weather_cache_hit():
+            with self.app.app_context():
+                return measure(lambda: get_weather(LAT, LON, TZ), min_rounds=50)
+        cases["get_weather_cache_hit"] = weather_cache_hit
+
+        def forecast_parse():
+            payload, now = forecast_payload(), datetime.now()
+            return measure(lambda: parse_forecast(payload, now), min_rounds=200)
+        cases["fetch_open_meteo_parse"] = forecast_parse
+
+        cases[f"export_schedule_{self.excel_rows}_rows"] = lambda: measure(
+            self._get(f"/schedules/{self.schedules['excel']}/export"), min_rounds=3
+        )
+
+        def import_schedule():
+            def call():
+                response = self.client.post(
+                    "/schedules/import",
+                    data={"file": (BytesIO(self.export_bytes), "bench.xlsx")},
+                    content_type="multipart/form-data",
+                )
+                assert response.status_code == 302, response.status_code
+            return measure(call, min_rounds=3)
+        cases[f"import_schedule_{self.excel_rows}_rows"] = import_schedule
+
+        largest = f"sign-{self.sign_sizes[-1]}"
+
+        def duplicate():
+            def call():
+                response = self.client.post(f"/schedules/{self.schedules[largest]}/duplicate")
+                assert response.status_code == 302, response.status_code
+            return measure(call)
+        cases[f"duplicate_schedule_{self.sign_sizes[-1]}_items"] = duplicate
+        return cases
+
+    def close(self) -> None:
+        with self.app.app_context():
+            db.engine.dispose()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(only: Optional[str] = None, quick: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        suite = Suite(Path(tmp), quick=quick)
+        try:
+            results = {}
+            for name, case in suite.cases().items():
+                if only and only not in name:
+                    continue
+                results[name] = case()
+                print(f"{name:40s} median {results[name]['median_ms']:>10.3f} ms", file=sys.stderr)
+        finally:
+            suite.close()
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "machine": platform.machine(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Return one line per benchmark whose median slowed down by more than threshold (0.2 = 20%)."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("median_ms"):
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{name}: {before['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms"
+                f" (+{change:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON report to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed median slowdown (default 0.2)"
+    )
+    parser.add_argument("--only", help="run benchmarks whose name contains this string")
+    parser.add_argument("--quick", action="store_true", help="small data sets, for smoke runs")
+    args = parser.parse_args(argv)
+
+    report = run(only=args.only, quick=args.quick)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
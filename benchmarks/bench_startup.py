@@ -0,0 +1,230 @@
+"""Worker startup benchmark with a time budget.
+
+Each trial is a fresh interpreter that imports the app, calls create_app() and serves its
+first sign render. It records the time for each phase, peak RSS, and whether the lazily
+imported heavy modules stayed unloaded. Trials run cold (no template bytecode cache) and
+warm (bytecode cache already on disk), and once more with APP_PROFILE=display, the
+kiosk-serving profile that leaves out the admin blueprints, auth, CSRF, forms and
+migrations. With --gunicorn the tool also compares the
+proportional memory (PSS, Linux only) of a Gunicorn fleet with and without preload_app.
+
+    python -m benchmarks.bench_startup --trials 5 --budget-ms 1500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.loadtest import StubWeatherServer, _free_port, _wait_until_up, seed_scratch_database
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("openpyxl", "requests")
+# Only the full (admin) profile needs these
+ADMIN_MODULES = ("flask_migrate", "alembic", "flask_wtf", "wtforms")
+
+TRIAL = r"""
+import json, resource, sys, time
+
+def peak_rss_mb():
+    # ru_maxrss survives exec, so it would report the (larger) benchmark parent
+    try:
+        with open("/proc/self/status") as fh:
+            return next(int(l.split()[1]) for l in fh if l.startswith("VmHWM:")) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+loaded = [m for m in %(lazy)r if m in sys.modules]
+admin = [m for m in %(admin)r if m in sys.modules]
+modules = len(sys.modules)
+rss = peak_rss_mb()
+response = app.test_client().get("/display/check-updates")
+response = app.test_client().get("/display/")
+assert response.status_code == 200, response.status_code
+rendered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_render_ms": (rendered - created) * 1000,
+    "total_ms": (rendered - started) * 1000,
+    "rss_after_create_app_mb": rss,
+    "max_rss_mb": peak_rss_mb(),
+    "modules_loaded": modules,
+    "heavy_modules_at_startup": loaded,
+    "admin_modules_at_startup": admin,
+}))
+"""
+
+
+def trial(env: Dict[str, str], code: str = TRIAL) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", code % {"lazy": LAZY_MODULES, "admin": ADMIN_MODULES}],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def summarize(runs: List[dict]) -> dict:
+    out = {}
+    for key in (
+        "import_ms",
+        "create_app_ms",
+        "first_render_ms",
+        "total_ms",
+        "rss_after_create_app_mb",
+        "max_rss_mb",
+        "modules_loaded",
+    ):
+        values = [run[key] for run in runs]
+        out[key] = round(statistics.median(values), 1)
+    for key in ("heavy_modules_at_startup", "admin_modules_at_startup"):
+        out[key] = sorted({m for run in runs for m in run[key]})
+    return out
+
+
+def _pss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as fh:
+            return [int(p) for p in fh.read().split()]
+    except OSError:
+        return []
+
+
+def gunicorn_memory(env: Dict[str, str], workers: int, preload: bool) -> dict:
+    import requests
+
+    port = _free_port()
+    env = dict(
+        env,
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_PRELOAD="true" if preload else "false",
+        GUNICORN_LOG_LEVEL="warning",
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+         "--access-logfile", "/dev/null", "wsgi:app"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        _wait_until_up(base_url, process)
+        ready_ms = (time.perf_counter() - started) * 1000
+        # Every worker renders the sign a few times, as in service
+        for _ in range(workers * 10):
+            requests.get(f"{base_url}/display/", timeout=10)
+        pids = [process.pid] + _children(process.pid)
+        return {
+            "preload": preload,
+            "workers": workers,
+            "ready_ms": round(ready_ms, 1),
+            "total_pss_mb": round(sum(_pss_kb(pid) for pid in pids) / 1024, 1),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run(trials: int, gunicorn_workers: Optional[int]) -> dict:
+    report: Dict[str, object] = {}
+    with tempfile.TemporaryDirectory() as tmp, StubWeatherServer() as weather:
+        tmp_path = Path(tmp)
+        database_url = f"sqlite:///{tmp_path / 'startup.db'}"
+        seed_scratch_database(database_url)
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            WEATHER_API_URL=weather.url,
+            FLASK_ENV="production",
+            METRICS_DIR=str(tmp_path / "metrics"),
+            PYTHONDONTWRITEBYTECODE="",
+        )
+        env.pop("JINJA_BYTECODE_CACHE_DIR", None)
+        report["cold"] = summarize([trial(env) for _ in range(trials)])
+
+        cached_env = dict(env, JINJA_BYTECODE_CACHE_DIR=str(tmp_path / "jinja-cache"))
+        trial(cached_env)  # fills the cache
+        report["bytecode_cache"] = summarize([trial(cached_env) for _ in range(trials)])
+
+        display_env = dict(cached_env, APP_PROFILE="display")
+        report["display_profile"] = summarize([trial(display_env) for _ in range(trials)])
+        report["display_profile_savings"] = {
+            key: round(report["bytecode_cache"][key] - report["display_profile"][key], 1)
+            for key in (
+                "import_ms",
+                "create_app_ms",
+                "total_ms",
+                "rss_after_create_app_mb",
+                "max_rss_mb",
+                "modules_loaded",
+            )
+        }
+
+        if gunicorn_workers:
+            report["gunicorn"] = [
+                gunicorn_memory(cached_env, gunicorn_workers, preload) for preload in (False, True)
+            ] + [dict(gunicorn_memory(display_env, gunicorn_workers, True), profile="display")]
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=1500,
+        help="fail if import + create_app + first render (bytecode cache) exceeds this",
+    )
+    parser.add_argument(
+        "--gunicorn",
+        type=int,
+        metavar="WORKERS",
+        help="also compare fleet PSS with and without preload",
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    report = run(args.trials, args.gunicorn)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    failures = []
+    warm = report["bytecode_cache"]
+    if warm["total_ms"] > args.budget_ms:
+        failures.append(f"startup took {warm['total_ms']} ms (budget {args.budget_ms:.0f} ms)")
+    if warm["heavy_modules_at_startup"]:
+        failures.append(f"imported at startup: {', '.join(warm['heavy_modules_at_startup'])}")
+    admin_modules = report["display_profile"]["admin_modules_at_startup"]
+    if admin_modules:
+        failures.append(f"display profile imported: {', '.join(admin_modules)}")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
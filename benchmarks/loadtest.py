@@ -0,0 +1,436 @@
+"""Fleet load test: hundreds of kiosks polling the sign while admins edit schedule items.
+
+Each simulated display loads /display/, then polls /display/check-updates on the kiosk's
+real cadence (the server's ``poll_after`` with ±20% jitter) and reloads the sign whenever
+the poll reports a change. Each simulated admin logs in and saves item edits through the
+batch API, which makes every display reload. Latency percentiles, throughput and error
+rates are reported per request kind for every scenario.
+
+Against an instance you started yourself (point its WEATHER_API_URL at a stub, e.g.
+``python -m benchmarks.loadtest --stub-weather-only``):
+
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --displays 100,300 --admins 2 \\
+        --admin-email admin@example.com --admin-password secret
+
+Or let the tool start Gunicorn on a seeded scratch database with a stubbed weather server,
+sweeping worker counts:
+
+    python -m benchmarks.loadtest --spawn --workers 1,2,4 --displays 100,300,600 --admins 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from datetime import time as dtime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmarks.bench_hot_paths import forecast_payload
+
+ROOT = Path(__file__).resolve().parent.parent
+POLL_INTERVAL = 5.0  # matches POLL_INTERVAL_SECONDS, the kiosk's base cadence in display/sign.html
+FIRST_POLL_DELAY = 2.0
+# check-updates fields whose change makes the kiosk reload the sign
+RELOAD_KEYS = ("settings_updated_at", "schedule_id", "schedule_updated_at")
+CSRF_INPUT_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+CSRF_JS_RE = re.compile(r"const csrfToken = \"([^\"]*)\"")
+ITEMS_JS_RE = re.compile(r"load\((\[.*\])\);")  # the item grid's data on the edit page
+LOADTEST_EMAIL = "loadtest@example.com"
+LOADTEST_PASSWORD = "loadtest"
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Recorder:
+    """Thread-safe latency and error collection, keyed by request kind."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def request(
+        self, session: requests.Session, kind: str, method: str, url: str, **kwargs
+    ) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=30, allow_redirects=False, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if ok:
+                self.latencies[kind].append(elapsed)
+            else:
+                self.errors[kind] += 1
+        return response if ok else None
+
+    def summary(self, seconds: float) -> Dict[str, dict]:
+        out = {}
+        for kind in sorted(set(self.latencies) | set(self.errors)):
+            latencies, errors = self.latencies[kind], self.errors[kind]
+            total = len(latencies) + errors
+            out[kind] = {
+                "requests": total,
+                "rps": round(total / seconds, 2),
+                "error_rate": round(errors / total, 4) if total else 0.0,
+                **{
+                    f"p{pct}_ms": (
+                        round(_percentile(latencies, pct) * 1000, 1) if latencies else None
+                    )
+                    for pct in (50, 95, 99)
+                },
+            }
+        return out
+
+
+def display_loop(
+    base_url: str, recorder: Recorder, stop: threading.Event, poll_interval: float
+) -> None:
+    session = requests.Session()
+    poll_url = f"{base_url}/display/check-updates"
+    # Kiosks are not powered on in lock step
+    if stop.wait(random.uniform(0, poll_interval)):
+        return
+    state = None
+    while not stop.is_set():
+        if state is None:
+            if recorder.request(session, "display", "GET", f"{base_url}/display/") is None:
+                stop.wait(poll_interval)
+                continue
+            response = recorder.request(session, "check_updates", "GET", poll_url)
+            state = response.json() if response is not None else {}
+            if stop.wait(FIRST_POLL_DELAY * poll_interval / POLL_INTERVAL):
+                return
+        response = recorder.request(session, "check_updates", "GET", poll_url)
+        delay = poll_interval
+        if response is not None:
+            data = response.json()
+            if any(data.get(key) != state.get(key) for key in RELOAD_KEYS):
+                state = None  # the kiosk reloads the page
+                continue
+            delay = data.get("poll_after", POLL_INTERVAL) * poll_interval / POLL_INTERVAL
+        stop.wait(delay * random.uniform(0.8, 1.2))
+
+
+def admin_loop(
+    base_url: str,
+    recorder: Recorder,
+    stop: threading.Event,
+    email: str,
+    password: str,
+    think_time: float,
+) -> None:
+    session = requests.Session()
+    login_page = recorder.request(session, "admin_login", "GET", f"{base_url}/auth/login")
+    token = CSRF_INPUT_RE.search(login_page.text) if login_page is not None else None
+    recorder.request(session, "admin_login", "POST", f"{base_url}/auth/login", data={
+        "email": email, "password": password, "csrf_token": token.group(1) if token else "",
+    })
+    edit = 0
+    while not stop.is_set():
+        # Recorded apart from the kiosks' polls, so their latency stats stay the fleet's own
+        status = recorder.request(
+            session, "admin_check_updates", "GET", f"{base_url}/display/check-updates"
+        )
+        schedule_id = status.json().get("schedule_id") if status is not None else None
+        if not schedule_id:
+            stop.wait(think_time)
+            continue
+        page = recorder.request(
+            session, "admin_edit_page", "GET", f"{base_url}/schedules/{schedule_id}/edit"
+        )
+        match = CSRF_JS_RE.search(page.text) if page is not None else None
+        headers = {"X-CSRFToken": match.group(1) if match else ""}
+        batch_url = f"{base_url}/schedules/{schedule_id}/items/batch"
+        # Read the items from the page, as the grid does; only the save below is a write
+        listing = ITEMS_JS_RE.search(page.text) if page is not None else None
+        items = json.loads(listing.group(1)) if listing else []
+        if items:
+            edit += 1
+            changed = random.sample(items, min(3, len(items)))
+            updates = [{"id": item["id"], "notes": f"load test edit {edit}"} for item in changed]
+            recorder.request(
+                session, "admin_batch", "POST", batch_url, headers=headers, json={"update": updates}
+            )
+        stop.wait(random.uniform(0.5, 1.5) * think_time)
+
+
+def run_scenario(
+    base_url: str,
+    displays: int,
+    admins: int,
+    seconds: float,
+    admin_email: str = LOADTEST_EMAIL,
+    admin_password: str = LOADTEST_PASSWORD,
+    poll_interval: float = POLL_INTERVAL,
+    think_time: float = 5.0,
+) -> dict:
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=display_loop, args=(base_url, recorder, stop, poll_interval), daemon=True
+        )
+        for _ in range(displays)
+    ]
+    threads += [
+        threading.Thread(
+            target=admin_loop,
+            args=(base_url, recorder, stop, admin_email, admin_password, think_time),
+            daemon=True,
+        )
+        for _ in range(admins)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=35)
+    elapsed = time.monotonic() - started
+    return {
+        "displays": displays,
+        "admins": admins,
+        "seconds": round(elapsed, 1),
+        "requests": recorder.summary(elapsed),
+    }
+
+
+class StubWeatherServer:
+    """Serves a canned Open-Meteo forecast locally so load tests never reach the real API."""
+
+    def __init__(self, latency_ms: float = 0, port: int = 0):
+        payload = json.dumps(forecast_payload()).encode("utf-8")
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.calls += 1
+                if latency_ms:
+                    time.sleep(latency_ms / 1000)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.calls = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/forecast"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def seed_scratch_database(database_url: str, items: int = 40) -> None:
+    """Schema, a login for the simulated admins, site settings with a location and an active
+    schedule."""
+    from app import create_app
+    from app.extensions import db
+    from app.models import Schedule, ScheduleItem, SiteSettings, User
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+    with app.app_context():
+        db.create_all()
+        user = User(email=LOADTEST_EMAIL, is_admin=True)
+        user.set_password(LOADTEST_PASSWORD)
+        db.session.add(user)
+        db.session.add(
+            SiteSettings(latitude=38.8977, longitude=-77.0365, timezone="America/New_York")
+        )
+        schedule = Schedule(name="Load test", is_active=True)
+        db.session.add(schedule)
+        db.session.flush()
+        now = datetime.utcnow()
+        db.session.execute(db.insert(ScheduleItem), [
+            {
+                "schedule_id": schedule.id,
+                "name": f"Item {n}",
+                "start_time": dtime(6 + n * 15 // 60, n * 15 % 60),
+                "duration_minutes": 15,
+                "location": "Main Hall",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for n in range(items)
+        ])
+        db.session.commit()
+        db.engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(base_url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            requests.get(f"{base_url}/display/check-updates", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not come up within {timeout:.0f}s")
+
+
+def spawn_and_run(args, weather_url: str) -> List[dict]:
+    reports = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = args.database_url or f"sqlite:///{Path(tmp) / 'loadtest.db'}"
+            if not args.database_url:
+                seed_scratch_database(database_url)
+            port = _free_port()
+            env = dict(
+                os.environ,
+                DATABASE_URL=database_url,
+                WEATHER_API_URL=weather_url,
+                GUNICORN_WORKERS=str(workers),
+                GUNICORN_LOG_LEVEL="warning",
+                METRICS_DIR=str(Path(tmp) / "metrics"),
+                FLASK_ENV="production",
+            )
+            process = subprocess.Popen(
+                [
+                    sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                    "--bind", f"127.0.0.1:{port}", "--access-logfile", "/dev/null", "wsgi:app",
+                ],
+                cwd=ROOT, env=env,
+            )
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                _wait_until_up(base_url, process)
+                for displays in args.displays:
+                    report = run_scenario(
+                        base_url, displays, args.admins, args.duration, think_time=args.admin_think
+                    )
+                    report["workers"] = workers
+                    reports.append(report)
+                    print_report(report)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    return reports
+
+
+def print_report(report: dict) -> None:
+    workers = report.get("workers", "?")
+    print(
+        f"\nworkers={workers} displays={report['displays']} admins={report['admins']} "
+        f"seconds={report['seconds']}",
+        file=sys.stderr,
+    )
+    header = ("reqs", "rps", "err%", "p50ms", "p95ms", "p99ms")
+    print(f"  {'kind':16s} " + " ".join(f"{name:>8s}" for name in header), file=sys.stderr)
+    for kind, row in report["requests"].items():
+        cells = [
+            f"{row[k]:>8.1f}" if row[k] is not None else f"{'-':>8s}"
+            for k in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"  {kind:16s} {row['requests']:>8d} {row['rps']:>8.2f} "
+            f"{row['error_rate'] * 100:>8.2f} " + " ".join(cells),
+            file=sys.stderr,
+        )
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="load-test an already running instance")
+    target.add_argument(
+        "--spawn", action="store_true", help="start gunicorn on a seeded scratch database"
+    )
+    target.add_argument(
+        "--stub-weather-only", action="store_true", help="only run the stub weather server"
+    )
+    parser.add_argument(
+        "--workers", type=_int_list, default=[2], help="GUNICORN_WORKERS values to sweep (--spawn)"
+    )
+    parser.add_argument(
+        "--displays", type=_int_list, default=[50], help="display counts to sweep, e.g. 100,300"
+    )
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=60, help="seconds per scenario")
+    parser.add_argument(
+        "--admin-think", type=float, default=5, help="average seconds between admin saves"
+    )
+    parser.add_argument("--admin-email", default=LOADTEST_EMAIL)
+    parser.add_argument("--admin-password", default=LOADTEST_PASSWORD)
+    parser.add_argument(
+        "--database-url", help="(--spawn) use this database instead of a seeded scratch SQLite file"
+    )
+    parser.add_argument(
+        "--weather-latency-ms", type=float, default=150, help="stub weather response delay"
+    )
+    parser.add_argument("--weather-port", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    with StubWeatherServer(args.weather_latency_ms, args.weather_port) as weather:
+        if args.stub_weather_only:
+            print(f"WEATHER_API_URL={weather.url}", flush=True)
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                return 0
+        if args.spawn:
+            reports = spawn_and_run(args, weather.url)
+        else:
+            reports = []
+            for displays in args.displays:
+                report = run_scenario(
+                    args.base_url.rstrip("/"), displays, args.admins, args.duration,
+                    args.admin_email, args.admin_password, think_time=args.admin_think,
+                )
+                reports.append(report)
+                print_report(report)
+        result = {"scenarios": reports, "weather_calls": weather.calls}
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,52 @@
 import os
+import shutil
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Shared memory where there is some (Linux); macOS and some container runtimes have no
+# /dev/shm, so fall back to the instance folder there
+if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+    SHARED_DIR = "/dev/shm"
+else:
+    SHARED_DIR = os.path.join(ROOT, "instance")
 
 bind = "0.0.0.0:8000"
 workers = int(os.getenv("GUNICORN_WORKERS", "2"))
 timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
 keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "2"))
-worker_tmp_dir = "/dev/shm"
+if SHARED_DIR == "/dev/shm":
+    worker_tmp_dir = SHARED_DIR  # heartbeat files; gunicorn's default temp dir otherwise
 accesslog = "-"
 errorlog = "-"
 loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+# Load and warm the app once in the master so workers share it copy-on-write (see app/startup.py)
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# Workers write metric snapshots here and /metrics sums them (see app/metrics.py)
+os.environ.setdefault("METRICS_DIR", os.path.join(SHARED_DIR, "welcome-board-metrics"))
+# Compiled templates survive restarts, so new workers skip Jinja compilation
+os.environ.setdefault("JINJA_BYTECODE_CACHE_DIR", os.path.join(ROOT, "instance", "jinja-cache"))
+
+# Workers share cached settings, icons and weather here and broadcast invalidations
+# (see app/cache.py)
+os.environ.setdefault("CACHE_URL", "file://" + os.path.join(SHARED_DIR, "welcome-board-cache"))
+
+
+def on_starting(server):
+    # Start every master process with empty counters and an empty cache. With preload_app
+    # the app (and its cache backend) already exists by now; the backend recreates its
+    # directories when a worker first uses them.
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+    if os.environ["CACHE_URL"].startswith("file://"):
+        shutil.rmtree(os.environ["CACHE_URL"][len("file://"):], ignore_errors=True)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from app.startup import warm
+        warm(server.app.wsgi())
 
 
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app.startup import after_fork
+        after_fork(server.app.wsgi())
@@ -0,0 +1,60 @@
+"""Add composite and partial indexes for the display and schedule queries
+
+Revision ID: add_composite_indexes
+Revises: make_schedule_date_optional
+Create Date: 2026-10-19 09:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_composite_indexes'
+down_revision = 'make_schedule_date_optional'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # (date, is_active) answers both halves of the active-schedule lookup and, read
+    # backwards, the nulls-last date ordering of the schedule list.
+    if bind.dialect.name == 'postgresql':
+        # Postgres sorts NULLs first on a descending scan unless the index says otherwise
+        op.create_index(
+            'ix_schedules_date_is_active',
+            'schedules',
+            [sa.text('date DESC NULLS LAST'), 'is_active'],
+        )
+    else:
+        op.create_index('ix_schedules_date_is_active', 'schedules', ['date', 'is_active'])
+    op.drop_index('ix_schedules_date', table_name='schedules')
+
+    # Undated schedules are only ever read when active; keep that lookup tiny
+    op.create_index(
+        'ix_schedules_active_undated',
+        'schedules',
+        ['is_active'],
+        sqlite_where=sa.text('date IS NULL'),
+        postgresql_where=sa.text('date IS NULL'),
+    )
+
+    # Duplicating a schedule probes for a free "(Copy n)" name
+    op.create_index('ix_schedules_name', 'schedules', ['name'])
+
+    # Items are always fetched per schedule in start-time order
+    op.create_index(
+        'ix_schedule_items_schedule_id_start_time',
+        'schedule_items',
+        ['schedule_id', 'start_time'],
+    )
+    op.drop_index('ix_schedule_items_schedule_id', table_name='schedule_items')
+
+
+def downgrade():
+    op.create_index('ix_schedule_items_schedule_id', 'schedule_items', ['schedule_id'])
+    op.drop_index('ix_schedule_items_schedule_id_start_time', table_name='schedule_items')
+    op.drop_index('ix_schedules_name', table_name='schedules')
+    op.drop_index('ix_schedules_active_undated', table_name='schedules')
+    op.create_index('ix_schedules_date', 'schedules', ['date'])
+    op.drop_index('ix_schedules_date_is_active', table_name='schedules')
@@ -0,0 +1,33 @@
+"""Add content_changes, the revision log behind the edge sync feed
+
+Revision ID: add_content_changes
+Revises: add_single_active_schedule_index
+Create Date: 2026-10-19 18:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_content_changes'
+down_revision = 'add_single_active_schedule_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'content_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_content_changes_entity', 'content_changes', ['entity', 'entity_id'])
+
+
+def downgrade():
+    op.drop_index('ix_content_changes_entity', table_name='content_changes')
+    op.drop_table('content_changes')
@@ -0,0 +1,39 @@
+"""Add displays: named screens with their own schedule and look overrides
+
+Revision ID: add_displays
+Revises: add_content_changes
+Create Date: 2026-10-19 19:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_displays'
+down_revision = 'add_content_changes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'displays',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(length=64), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=True),
+        sa.Column('bg_color', sa.String(length=7), nullable=True),
+        sa.Column('text_color', sa.String(length=7), nullable=True),
+        sa.Column('box_color', sa.String(length=7), nullable=True),
+        sa.Column('schedule_color', sa.String(length=7), nullable=True),
+        sa.Column('notes_left_col', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_displays_slug', 'displays', ['slug'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_displays_slug', table_name='displays')
+    op.drop_table('displays')
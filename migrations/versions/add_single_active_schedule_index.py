@@ -0,0 +1,44 @@
+"""Enforce a single active schedule with a partial unique index
+
+Revision ID: add_single_active_schedule_index
+Revises: add_composite_indexes
+Create Date: 2026-10-19 10:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = 'add_single_active_schedule_index'
+down_revision = 'add_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # Keep only the most recently updated active schedule before adding the constraint
+    keep = bind.execute(
+        text(
+            "SELECT id FROM schedules WHERE is_active = :active"
+            " ORDER BY updated_at DESC, id DESC LIMIT 1"
+        ),
+        {"active": True},
+    ).scalar()
+    if keep is not None:
+        bind.execute(text(
+            "UPDATE schedules SET is_active = :inactive WHERE is_active = :active AND id != :keep"
+        ), {"active": True, "inactive": False, "keep": keep})
+
+    op.create_index(
+        'ix_schedules_single_active',
+        'schedules',
+        ['is_active'],
+        unique=True,
+        sqlite_where=sa.text('is_active = 1'),
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_schedules_single_active', table_name='schedules')
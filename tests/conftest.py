@@ -0,0 +1,133 @@
+import os
+from datetime import time
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Point TEST_DATABASE_URL at a scratch Postgres database to run the suite there
+    database_url = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tmp_path / 'test.db'}"
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "WTF_CSRF_ENABLED": False,
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+    })
+    with app.app_context():
+        db.create_all()
+        admin = User(email="admin@example.com", is_admin=True)
+        admin.set_password("password")
+        db.session.add(admin)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+
+@pytest.fixture
+def make_app(app):
+    """Build another app on the test database, as a second worker would.
+
+    ``make_app(SNAPSHOT_DIR=...)`` adds or overrides settings.
+    """
+    def make(**overrides):
+        return create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"],
+            "WTF_CSRF_ENABLED": False,
+            **overrides,
+        })
+    return make
+
+
+def seed_schedule(app, name="Today", items=({"name": "Briefing", "start_time": time(8)},),
+                  settings=None, **columns):
+    """Add a schedule with ``items`` (ScheduleItem columns) and, if given, site ``settings``.
+
+    Returns the schedule's id.
+    """
+    from app.models import Schedule, ScheduleItem, SiteSettings
+
+    with app.app_context():
+        if settings is not None:
+            db.session.add(SiteSettings(**settings))
+        schedule = Schedule(name=name, **columns)
+        db.session.add(schedule)
+        db.session.flush()
+        db.session.add_all(ScheduleItem(schedule_id=schedule.id, **item) for item in items)
+        db.session.commit()
+        return schedule.id
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    client.post("/auth/login", data={"email": "admin@example.com", "password": "password"})
+    return client
+
+
+def seed_large_dataset(app, schedules=1500, items_per_schedule=12):
+    """Bulk-insert a realistically sized dataset: years of dated schedules plus undated ones."""
+    from app.models import SiteSettings
+    from app.seed import seed_database
+
+    with app.app_context():
+        # No location, so rendering the sign never reaches the weather API
+        db.session.add(SiteSettings(timezone="UTC"))
+        counts = seed_database(
+            schedules=schedules,
+            undated_share=0.2,
+            items_per_schedule=items_per_schedule,
+            icons=50,
+            users=5,
+            weather_rows=100,
+            seed=1234,
+        )
+        return counts["schedule_ids"]
+
+
+@pytest.fixture
+def large_app(app):
+    app.config["SEEDED_SCHEDULE_IDS"] = seed_large_dataset(app)
+    return app
+
+
+class QueryCounter:
+    """Collects the SQL statements issued while active (see the query_counter fixture)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@pytest.fixture
+def query_counter(app):
+    """Usage: ``with query_counter() as queries: client.get(...)``, then check ``queries.count``."""
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryCounter(engine)
@@ -0,0 +1,24 @@
+import json
+
+from benchmarks.bench_hot_paths import compare, main
+
+
+def test_quick_run_writes_comparable_json(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--quick", "--only", "check_updates", "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert set(report["results"]) == {"check_updates"}
+    assert report["results"]["check_updates"]["median_ms"] > 0
+    assert (
+        main(["--quick", "--only", "check_updates", "--compare", str(output), "--threshold", "100"])
+        == 0
+    )
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"results": {"a": {"median_ms": 10.0}, "b": {"median_ms": 10.0}}}
+    current = {
+        "results": {"a": {"median_ms": 13.0}, "b": {"median_ms": 11.0}, "new": {"median_ms": 1.0}}
+    }
+    regressions = compare(baseline, current, threshold=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("a:")
@@ -0,0 +1,118 @@
+import shutil
+import time
+import uuid
+from datetime import date, datetime
+from datetime import time as clock
+
+import pytest
+from conftest import seed_schedule
+
+from app.cache import SharedCache, get_cache
+from app.extensions import db
+from app.models import SiteSettings
+
+
+@pytest.fixture(params=["memory", "file"])
+def workers(request, make_app, tmp_path):
+    url = f"file://{tmp_path / 'cache'}"
+    if request.param == "memory":
+        url = f"memory://{uuid.uuid4().hex}"
+    first, second = make_app(CACHE_URL=url), make_app(CACHE_URL=url)
+    seed_schedule(first, settings={"timezone": "UTC", "bg_color": "#000000"}, is_active=True)
+    return first, second
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_a_write_in_one_worker_reaches_the_others(workers):
+    first, second = workers
+    for worker in workers:
+        assert "#000000" in worker.test_client().get("/display/").get_data(as_text=True)
+    cache = get_cache(second)
+    hits, received = cache.hits, cache.invalidations_received
+    second.test_client().get("/display/")
+    assert cache.hits > hits  # settings and the icon stamp came from the cache
+    assert len(second.extensions["sign_views"]) == 1
+
+    with first.app_context():
+        SiteSettings.query.first().bg_color = "#abcdef"
+        db.session.commit()
+    assert _wait_for(lambda: cache.invalidations_received == received + 1)
+    assert not second.extensions["sign_views"]
+    assert "#abcdef" in second.test_client().get("/display/").get_data(as_text=True)
+
+
+def test_values_are_shared_between_workers(workers):
+    first, second = workers
+    get_cache(first).set("weather", "today", {"noon": {"temp_f": 70}})
+    assert get_cache(second).get("weather", "today") == {"noon": {"temp_f": 70}}
+    get_cache(first).invalidate({"weather_cache"})  # what a weather refresh commit does
+    assert _wait_for(lambda: get_cache(second).get("weather", "today") is None)
+
+
+def test_no_cache_url_leaves_lookups_uncached(app):
+    cache = get_cache(app)
+    assert not cache.enabled
+    calls = []
+    assert cache.remember("settings", "site", lambda: calls.append(1) or "row") == "row"
+    assert cache.remember("settings", "site", lambda: calls.append(1) or "row") == "row"
+    assert len(calls) == 2
+
+
+def test_a_value_built_before_an_invalidation_is_not_stored(workers):
+    first, second = workers
+    cache = get_cache(first)
+    received = cache.invalidations_received
+
+    def build():
+        # Another worker commits while this one is still loading the old row
+        get_cache(second).invalidate({"site_settings"})
+        return {"bg_color": "#000000"}
+
+    assert cache.remember("settings", "site", build) == {"bg_color": "#000000"}
+    assert get_cache(second).get("settings", "site") is None  # stored under the old generation
+    assert _wait_for(lambda: cache.invalidations_received > received)
+    assert cache.get("settings", "site") is None
+
+
+def test_values_round_trip_as_json(workers):
+    first, second = workers
+    stamp = (3, datetime(2026, 1, 14, 9, 30))
+    row = {"day": date(2026, 1, 14), "start": clock(8, 15), "opacity": 0.5}
+    get_cache(first).set("icons", "stamp", stamp)
+    get_cache(first).set("settings", "site", row)
+    assert get_cache(second).get("icons", "stamp") == stamp
+    assert get_cache(second).get("settings", "site") == row
+
+
+def test_file_backend_recreates_a_cleared_directory(make_app, tmp_path):
+    directory = tmp_path / "cache"
+    worker = make_app(CACHE_URL=f"file://{directory}")
+    cache = get_cache(worker)
+    # gunicorn's master clears the directory after a preloaded app built the backend
+    shutil.rmtree(directory)
+    cache.backend._pid = None  # as in a freshly forked worker
+    assert cache.remember("icons", "stamp", lambda: (1, None)) == (1, None)
+    assert (directory / "bus").is_dir()
+    cache.clear()
+    assert cache.get("icons", "stamp") == (1, None)
+
+
+def test_backend_errors_fall_back_to_the_database(app):
+    class Broken:
+        def subscribe(self, callback):
+            pass
+
+        def listen(self):
+            raise OSError("no such directory")
+
+    cache = SharedCache(app, Broken())
+    assert cache.remember("settings", "site", lambda: "row") == "row"
+    assert cache.get("settings", "site", "default") == "default"
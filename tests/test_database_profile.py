@@ -0,0 +1,23 @@
+from flask import Flask
+from sqlalchemy import text
+
+from app.database import detect_profile
+from app.extensions import db
+
+
+def test_sqlite_connections_get_wal_and_pragmas(app):
+    assert app.extensions["db_profile"].name == "sqlite"
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_postgres_profile_tunes_the_pool():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="postgresql://app:app@db/app", DB_POOL_SIZE=8)
+    profile = detect_profile(app)
+    assert profile.name == "postgresql"
+    assert profile.engine_options["pool_size"] == 8
+    assert profile.engine_options["pool_pre_ping"] is False
+    assert not profile.pragmas
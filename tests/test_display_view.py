@@ -0,0 +1,118 @@
+from datetime import time
+
+from app.content import content_changed
+from app.extensions import db
+from app.models import Icon, Schedule, ScheduleItem, SiteSettings
+
+
+def _seed(app):
+    with app.app_context():
+        db.session.add(SiteSettings(timezone="UTC", box_color="#102030", box_opacity=0.5))
+        db.session.add_all([
+            Icon(name="logo-img", image_path="uploads/logo.png"),
+            Icon(name="glyph", characters="★", font="Georgia"),
+        ])
+        schedule = Schedule(name="Today", is_active=True)
+        db.session.add(schedule)
+        db.session.flush()
+        db.session.add_all(
+            [
+                ScheduleItem(
+                    schedule_id=schedule.id,
+                    name="Briefing",
+                    start_time=time(8),
+                    end_time=time(8, 30),
+                    icon="logo-img",
+                ),
+                ScheduleItem(
+                    schedule_id=schedule.id, name="Lunch", start_time=time(12), icon="glyph"
+                ),
+                ScheduleItem(
+                    schedule_id=schedule.id, name="Drill", start_time=time(14), icon="fire"
+                ),
+            ]
+        )
+        db.session.commit()
+        return schedule.id
+
+
+def test_sign_prints_precomputed_values_and_reuses_the_view(app, client):
+    _seed(app)
+    html = client.get("/display/").get_data(as_text=True)
+    assert "08:00 - 08:30" in html
+    assert "/static/uploads/logo.png" in html
+    assert "font-family: 'Georgia'" in html and "★" in html
+    assert "bi-fire" in html
+    assert "--display-box: rgba(16, 32, 48, 0.5);" in html
+
+    views = app.extensions["sign_views"]
+    (first,) = views.values()
+    client.get("/display/")
+    assert list(views.values()) == [first]
+
+    # Editing an icon changes the icon stamp, so the next render builds a new view
+    with app.app_context():
+        Icon.query.filter_by(name="glyph").one().characters = "☀"
+        db.session.commit()
+    assert "☀" in client.get("/display/").get_data(as_text=True)
+
+
+def test_item_edits_touch_the_schedule_and_signal_content_change(app, admin_client):
+    schedule_id = _seed(app)
+    before = admin_client.get("/display/check-updates").get_json()["schedule_updated_at"]
+    received = []
+
+    def receiver(sender, tables, **extra):
+        received.append(tables)
+
+    content_changed.connect(receiver)
+    try:
+        with app.app_context():
+            item_id = ScheduleItem.query.filter_by(schedule_id=schedule_id, name="Lunch").one().id
+        admin_client.post(f"/schedules/items/{item_id}/delete")
+    finally:
+        content_changed.disconnect(receiver)
+
+    assert admin_client.get("/display/check-updates").get_json()["schedule_updated_at"] != before
+    assert any({"schedule_items", "schedules"} <= tables for tables in received)
+    assert "Lunch" not in admin_client.get("/display/").get_data(as_text=True)
+
+
+def test_long_schedules_render_a_window_and_fetch_the_rest(app, client):
+    from datetime import datetime, timezone
+
+    from app.display.routes import render_sign
+
+    app.config["SIGN_WINDOW_ITEMS"] = 2
+    with app.app_context():
+        db.session.add(SiteSettings(timezone="UTC"))
+        schedule = Schedule(name="Event day", is_active=True)
+        db.session.add(schedule)
+        db.session.flush()
+        db.session.add_all(
+            ScheduleItem(
+                schedule_id=schedule.id,
+                name=f"Heat {hour}",
+                start_time=time(hour),
+                duration_minutes=60,
+            )
+            for hour in range(8, 14)
+        )
+        db.session.commit()
+        stamp = schedule.updated_at.isoformat()
+
+        with app.test_request_context("/display/"):
+            html = render_sign(now=datetime(2026, 1, 14, 9, 30, tzinfo=timezone.utc))
+        # Heat 9 is running; Heats 10 and 11 are next; 12 and 13 come from /display/items
+        heats = ("Heat 8", "Heat 9", "Heat 10", "Heat 11", "Heat 12")
+        assert [name for name in heats if name in html] == ["Heat 9", "Heat 10", "Heat 11"]
+        assert "+ 2 more later today" in html
+
+    fragment = client.get(f"/display/items?start=4&count=5&v={stamp}").get_data(as_text=True)
+    assert 'data-i="4"' in fragment and 'data-i="5"' in fragment and "Heat 13" in fragment
+    assert "Heat 11" not in fragment
+    assert client.get("/display/items?start=4&count=5&v=stale").status_code == 409
+
+    app.config["SIGN_WINDOW_ITEMS"] = 0
+    html = client.get("/display/").get_data(as_text=True)
+    assert "Heat 8" in html and "Heat 13" in html and 'id="schedule-later"' not in html
@@ -0,0 +1,81 @@
+from datetime import time
+
+from app.extensions import db
+from app.models import Display, Schedule, ScheduleItem, SiteSettings
+
+
+def _seed(app):
+    with app.app_context():
+        db.session.add(SiteSettings(timezone="UTC", bg_color="#000000"))
+        ids = {}
+        for name, item in (("Lobby", "Welcome"), ("Room A", "Lecture"), ("Room B", "Workshop")):
+            schedule = Schedule(name=name, is_active=name == "Lobby")
+            db.session.add(schedule)
+            db.session.flush()
+            db.session.add(ScheduleItem(schedule_id=schedule.id, name=item, start_time=time(9)))
+            ids[name] = schedule.id
+        db.session.commit()
+        return ids
+
+
+def test_named_display_shows_its_schedule_and_overrides(app, admin_client):
+    ids = _seed(app)
+    response = admin_client.post(
+        "/displays/new",
+        data={
+            "name": "Room A door",
+            "slug": "room-a",
+            "schedule_id": ids["Room A"],
+            "bg_color": "#112233",
+        },
+    )
+    assert response.status_code == 302
+
+    html = admin_client.get("/display/room-a/").get_data(as_text=True)
+    assert "Lecture" in html and "#112233" in html
+    assert "/display/room-a/check-updates" in html
+    assert (
+        admin_client.get("/display/room-a/check-updates").get_json()["schedule_id"] == ids["Room A"]
+    )
+    # The main sign is unchanged
+    html = admin_client.get("/display/").get_data(as_text=True)
+    assert "Welcome" in html and "#112233" not in html
+    assert admin_client.get("/display/nowhere/").status_code == 404
+    duplicate = admin_client.post("/displays/new", data={"name": "x", "slug": "room-a"})
+    assert duplicate.status_code == 200
+
+
+def test_writes_drop_only_the_affected_displays_views(app, client):
+    ids = _seed(app)
+    with app.app_context():
+        db.session.add_all([
+            Display(slug="a1", name="A1", schedule_id=ids["Room A"]),
+            Display(slug="a2", name="A2", schedule_id=ids["Room A"]),
+            Display(slug="b1", name="B1", schedule_id=ids["Room B"], text_color="#abcdef"),
+        ])
+        db.session.commit()
+    for slug in ("a1", "a2", "b1"):
+        client.get(f"/display/{slug}/")
+    views = app.extensions["sign_views"]
+    assert len(views) == 2  # a1 and a2 share one view
+
+    b_view = next(view for view, deps in views.values() if ("schedules", ids["Room B"]) in deps)
+    with app.app_context():
+        ScheduleItem.query.filter_by(name="Lecture").one().name = "Seminar"
+        db.session.commit()
+    assert [view for view, _deps in views.values()] == [b_view]
+    assert "Seminar" in client.get("/display/a2/").get_data(as_text=True)
+    assert "Workshop" in client.get("/display/b1/").get_data(as_text=True)
+    assert len(views) == 2
+
+
+def test_deleting_a_schedule_unassigns_its_displays(app, admin_client):
+    ids = _seed(app)
+    with app.app_context():
+        db.session.add(Display(slug="b", name="B", schedule_id=ids["Room B"]))
+        db.session.commit()
+    admin_client.post(f"/schedules/{ids['Room B']}/delete")
+    with app.app_context():
+        assert Display.query.filter_by(slug="b").one().schedule_id is None
+    # Falls back to the active schedule
+    assert "Welcome" in admin_client.get("/display/b/").get_data(as_text=True)
@@ -0,0 +1,128 @@
+from datetime import time
+
+import pytest
+from conftest import seed_schedule
+
+from app.extensions import db
+from app.models import Display, Icon, Schedule, ScheduleItem, SiteSettings
+
+
+def _talk(name):
+    return [{"name": f"{name} talk", "start_time": time(9)}]
+
+
+@pytest.fixture
+def cached_app(make_app):
+    cached = make_app(EDGE_CACHE_TTL=300, EDGE_CACHE_PURGER="stub")
+    ids = {
+        "Lobby": seed_schedule(
+            cached, "Lobby", items=_talk("Lobby"), settings={"timezone": "UTC"}, is_active=True
+        )
+    }
+    for name in ("Room A", "Room B"):
+        ids[name] = seed_schedule(cached, name, items=_talk(name))
+    with cached.app_context():
+        db.session.add_all([
+            Display(slug="room-a", name="Room A door", schedule_id=ids["Room A"]),
+            Display(slug="room-b", name="Room B door", schedule_id=ids["Room B"]),
+            Display(slug="hall", name="Hall"),
+        ])
+        db.session.commit()
+    cached.config["SCHEDULE_IDS"] = ids
+    cached.extensions["edge_cache"].wait()
+    cached.extensions["edge_cache"].purger.purged.clear()
+    return cached
+
+
+def _purges(app):
+    app.extensions["edge_cache"].wait()
+    purger = app.extensions["edge_cache"].purger
+    purged, purger.purged = purger.purged, []
+    return purged
+
+
+def test_display_responses_carry_cache_headers_and_revalidate(cached_app):
+    ids = cached_app.config["SCHEDULE_IDS"]
+    client = cached_app.test_client()
+
+    response = client.get("/display/room-a/")
+    keys = response.headers["Surrogate-Key"].split()
+    assert {f"schedule-{ids['Room A']}", "settings", "icons", "weather"} <= set(keys)
+    assert "active-schedule" not in keys
+    assert (
+        "public" in response.headers["Cache-Control"]
+        and "s-maxage=" in response.headers["Cache-Control"]
+    )
+    max_age = int(response.headers["Cache-Control"].rsplit("s-maxage=", 1)[1])
+    assert 0 <= max_age <= 300
+
+    etag = response.headers["ETag"]
+    assert client.get("/display/room-a/", headers={"If-None-Match": etag}).status_code == 304
+
+    state = client.get("/display/check-updates")
+    keys = {"settings", "active-schedule", f"schedule-{ids['Lobby']}"}
+    assert set(state.headers["Surrogate-Key"].split()) == keys
+    etag = {"If-None-Match": state.headers["ETag"]}
+    assert client.get("/display/check-updates", headers=etag).status_code == 304
+    assert "Surrogate-Key" not in client.get("/display/nowhere/").headers
+
+
+def test_writes_purge_only_the_affected_urls(cached_app):
+    ids = cached_app.config["SCHEDULE_IDS"]
+    with cached_app.app_context():
+        ScheduleItem.query.filter_by(name="Room A talk").one().name = "Seminar"
+        db.session.commit()
+    [(keys, paths)] = _purges(cached_app)
+    assert f"schedule-{ids['Room A']}" in keys
+    # Followers of the active schedule are purged too: a schedule edit can change which is active
+    assert set(paths) == {
+        "/display/", "/display/check-updates",
+        "/display/room-a/", "/display/room-a/check-updates",
+        "/display/hall/", "/display/hall/check-updates",
+    }
+
+    with cached_app.app_context():
+        db.session.add(Icon(name="Coffee", characters="C"))
+        db.session.commit()
+    [(keys, paths)] = _purges(cached_app)
+    assert keys == {"icons"} and "/display/room-b/" in paths
+
+    with cached_app.app_context():
+        Display.query.filter_by(slug="room-b").one().bg_color = "#123456"
+        db.session.commit()
+    [(keys, paths)] = _purges(cached_app)
+    assert paths == ("/display/room-b/", "/display/room-b/check-updates")
+
+
+def test_caching_is_off_for_shared_caches_by_default(client):
+    with client.application.app_context():
+        db.session.add(SiteSettings(timezone="UTC"))
+        db.session.commit()
+    response = client.get("/display/")
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert "ETag" in response.headers
+
+
+def test_shared_caches_keep_signs_until_the_sites_midnight_at_most(cached_app):
+    from datetime import datetime, timezone
+
+    from app.transitions import next_midnight
+
+    cached_app.extensions["edge_cache"].ttl = 10 ** 6
+    with cached_app.app_context():
+        SiteSettings.query.first().timezone = "Pacific/Kiritimati"  # UTC+14
+        db.session.commit()
+        settings = SiteSettings.query.first()
+        expected = (next_midnight(settings) - datetime.now(timezone.utc)).total_seconds()
+    response = cached_app.test_client().get("/display/")
+    max_age = int(response.headers["Cache-Control"].rsplit("s-maxage=", 1)[1])
+    assert expected - 5 <= max_age <= expected
+
+
+def test_item_fragments_are_not_kept_by_shared_caches(cached_app):
+    with cached_app.app_context():
+        stamp = Schedule.query.filter_by(name="Room A").one().updated_at.isoformat()
+    response = cached_app.test_client().get(f"/display/room-a/items?start=0&count=5&v={stamp}")
+    assert response.status_code == 200 and "Room A talk" in response.get_data(as_text=True)
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert "Surrogate-Key" not in response.headers
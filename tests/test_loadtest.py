@@ -0,0 +1,54 @@
+import threading
+from datetime import time
+
+from werkzeug.serving import make_server
+
+from app.extensions import db
+from app.models import Schedule, ScheduleItem, SiteSettings
+from benchmarks.loadtest import StubWeatherServer, run_scenario
+
+
+def test_scenario_reports_every_request_kind_against_a_live_server(app):
+    with StubWeatherServer() as weather:
+        app.config["WEATHER_API_URL"] = weather.url
+        with app.app_context():
+            db.session.add(SiteSettings(latitude=38.9, longitude=-77.0, timezone="UTC"))
+            schedule = Schedule(name="Fleet", is_active=True)
+            db.session.add(schedule)
+            db.session.flush()
+            db.session.add_all(
+                ScheduleItem(schedule_id=schedule.id, start_time=time(9 + n), duration_minutes=30)
+                for n in range(4)
+            )
+            db.session.commit()
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            report = run_scenario(
+                f"http://127.0.0.1:{server.server_port}",
+                displays=4,
+                admins=1,
+                seconds=2,
+                admin_email="admin@example.com",
+                admin_password="password",
+                poll_interval=0.2,
+                think_time=0.3,
+            )
+        finally:
+            server.shutdown()
+        # kiosks booting together may race the first cache fill; later renders hit the cache
+        assert 1 <= weather.calls <= 4
+
+    requests = report["requests"]
+    assert {
+        "display",
+        "check_updates",
+        "admin_check_updates",
+        "admin_login",
+        "admin_edit_page",
+        "admin_batch",
+    } <= set(requests)
+    assert all(row["error_rate"] == 0 for row in requests.values())
+    # admin saves bump the schedule, so kiosks reload the sign beyond their first load
+    assert requests["display"]["requests"] > 4
+    assert requests["check_updates"]["p99_ms"] is not None
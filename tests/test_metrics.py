@@ -0,0 +1,58 @@
+import json
+
+from app.extensions import db
+from app.metrics import get_metrics
+from app.models import User
+
+
+def test_metrics_report_per_endpoint_latency_and_sql(app, admin_client):
+    admin_client.get("/display/")
+    body = admin_client.get("/metrics").get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="display.sign"}' in body
+    assert 'http_request_sql_statements_bucket{endpoint="display.sign",le="+Inf"}' in body
+    assert 'http_request_template_seconds_sum{endpoint="display.sign"}' in body
+    assert "# TYPE user_cache_hits_total counter" in body
+
+
+def test_metrics_sum_snapshots_from_other_workers(app, client, tmp_path):
+    metrics = get_metrics(app)
+    metrics.directory = str(tmp_path / "metrics")
+    try:
+        client.get("/display/check-updates")
+        metrics.flush(force=True)
+        own = json.loads(next((tmp_path / "metrics").iterdir()).read_text())
+        # Pretend a second worker served the same traffic
+        (tmp_path / "metrics" / "99999.json").write_text(json.dumps(own))
+        merged = metrics.collect()["http_requests_total"]
+        single = own["http_requests_total"]
+        key = next(k for k in single if "display.check_updates" in k)
+        assert merged[key] == 2 * single[key]
+    finally:
+        metrics.directory = None
+
+
+def test_metrics_need_a_token_or_a_login_unless_public(app, client):
+    assert client.get("/metrics").status_code == 401
+    app.config["METRICS_TOKEN"] = "scrape"
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape"}).status_code == 200
+    app.config.update(METRICS_TOKEN=None, METRICS_PUBLIC=True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_are_for_admins_only(app, client):
+    with app.app_context():
+        viewer = User(email="viewer@example.com", is_admin=False)
+        viewer.set_password("password")
+        db.session.add(viewer)
+        db.session.commit()
+    client.post("/auth/login", data={"email": "viewer@example.com", "password": "password"})
+    assert client.get("/metrics").status_code == 403
+
+
+def test_each_app_keeps_its_own_metrics(app, client, make_app):
+    other = make_app()
+    client.get("/display/check-updates")
+    requests = get_metrics(other).snapshot()["http_requests_total"]
+    assert not any("display.check_updates" in key for key in requests)
+    assert get_metrics(app) is not get_metrics(other)
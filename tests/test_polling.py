@@ -0,0 +1,53 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.display.polling import poll_delay
+from app.extensions import db
+from app.models import Schedule, SiteSettings
+
+
+def _seed(app, age=timedelta(0)):
+    with app.app_context():
+        db.session.add(SiteSettings(timezone="UTC"))
+        db.session.add(Schedule(name="Today", is_active=True))
+        db.session.commit()
+        stamp = datetime.utcnow() - age  # as if nothing was edited since
+        for model in (SiteSettings, Schedule):
+            db.session.execute(update(model).values(updated_at=stamp))
+        db.session.commit()
+
+
+def test_recently_edited_signs_poll_at_the_base_interval(app, client):
+    _seed(app)
+    assert client.get("/display/check-updates").get_json()["poll_after"] == 5
+
+
+def test_idle_signs_back_off(app, client):
+    _seed(app, age=timedelta(hours=3, minutes=5))
+    poll_after = client.get("/display/check-updates").get_json()["poll_after"]
+    assert poll_after == 40
+    with app.app_context():
+        assert poll_delay([datetime.utcnow() - timedelta(days=2)]) == 60
+
+
+def test_poll_interval_doubles_per_idle_hour(app):
+    with app.app_context():
+        assert poll_delay([datetime.utcnow()]) == 5
+        assert poll_delay([datetime.utcnow() - timedelta(hours=1, minutes=1)]) == 10
+        assert poll_delay([None]) == 5
+
+
+def test_busy_server_sheds_polls_with_retry_after(app, client):
+    _seed(app)
+    response = client.get(
+        "/display/check-updates", headers={"X-Request-Start": f"t={time.time() - 2:.3f}"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert response.get_json() == {"poll_after": 30}
+    fresh = client.get(
+        "/display/check-updates", headers={"X-Request-Start": f"t={time.time():.3f}"}
+    )
+    assert fresh.status_code == 200
@@ -0,0 +1,51 @@
+import os
+
+from app.profiling import RequestProfiler, profile_token
+
+
+def test_signed_parameter_profiles_one_request(app, client, tmp_path):
+    app.config["PROFILER_DIR"] = str(tmp_path / "profiles")
+    with app.test_request_context():
+        token = profile_token(1)
+    assert client.get(f"/display/?_profile={token}").status_code == 200
+    files = os.listdir(tmp_path / "profiles")
+    assert len(files) == 1 and files[0].endswith(".prof") and "display.sign" in files[0]
+
+
+def test_forged_token_and_zero_rate_do_not_profile(app, client, tmp_path):
+    app.config.update(
+        PROFILER_DIR=str(tmp_path / "profiles"), PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=0
+    )
+    client.get("/display/?_profile=forged")
+    client.get("/display/")
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_sampling_mode_writes_collapsed_stacks(app, client, tmp_path):
+    app.config.update(
+        PROFILER_DIR=str(tmp_path / "profiles"),
+        PROFILER_ENABLED=True,
+        PROFILER_SAMPLE_RATE=1,
+        PROFILER_MODE="sample",
+        PROFILER_INTERVAL_MS=0.5,
+    )
+    client.get("/display/")
+    (collapsed,) = (tmp_path / "profiles").iterdir()
+    assert collapsed.suffix == ".collapsed"
+
+
+def test_admin_page_offers_signed_link(app, admin_client):
+    body = admin_client.get("/diagnostics/profiles").get_data(as_text=True)
+    assert "_profile=" in body
+
+
+def test_pruning_skips_profiles_another_worker_removed(tmp_path, monkeypatch):
+    for age, name in enumerate(("a.prof", "b.prof", "c.prof")):
+        (tmp_path / name).write_text("")
+        os.utime(tmp_path / name, (age + 1, age + 1))
+    # Listed, then pruned by another worker before its mtime is read
+    listed = sorted(os.listdir(tmp_path)) + ["gone.prof"]
+    monkeypatch.setattr("app.profiling.os.listdir", lambda directory: listed)
+    RequestProfiler._prune(str(tmp_path), 2)
+    monkeypatch.undo()
+    assert sorted(os.listdir(tmp_path)) == ["b.prof", "c.prof"]
@@ -0,0 +1,227 @@
+"""Per-request SQL statement budgets.
+
+Every admin and display route is requested against the large seeded database and the number
+of statements it issues is compared with a declared budget. A lazy load in a loop (an N+1)
+multiplies the count by the number of rows and fails here long before it shows up in
+production latency. Raise a budget only when the extra statements are deliberate.
+"""
+from datetime import date
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+
+from app.extensions import db
+from app.models import Display, Icon, Schedule, ScheduleItem, User
+
+
+@pytest.fixture
+def budget_client(large_app, admin_client):
+    with large_app.app_context():
+        other = User(email="viewer@example.com", is_admin=False)
+        other.set_password("password")
+        db.session.add(other)
+        room = Display(slug="room", name="Room", bg_color="#101010",
+                       schedule_id=Schedule.query.filter(Schedule.date == None).first().id)  # noqa: E711
+        db.session.add(room)
+        db.session.commit()
+        schedule = Schedule.active_on(date.today())
+        large_app.config["BUDGET_IDS"] = {
+            "schedule": schedule.id,
+            "item": ScheduleItem.query.filter_by(schedule_id=schedule.id).first().id,
+            "icon": Icon.query.first().id,
+            "user": other.id,
+            "display": room.id,
+            "slug": room.slug,
+        }
+    large_app.config["SYNC_TOKEN"] = "sync-token"
+    # warm the per-worker caches (logged-in user, weather, item transition times)
+    # so counts are steady-state
+    admin_client.get("/")
+    for url in (
+        "/display/",
+        "/display/check-updates",
+        "/display/room/",
+        "/display/room/check-updates",
+    ):
+        admin_client.get(url)
+    state = admin_client.get("/display/check-updates").json
+    large_app.config["BUDGET_IDS"]["stamp"] = state["schedule_updated_at"]
+    return admin_client
+
+
+def form(**fields):
+    return lambda ids: {"data": {name: value.format(**ids) for name, value in fields.items()}}
+
+
+def batch(ids):
+    return {
+        "json": {
+            "create": [
+                {"client_id": "c1", "name": "Added", "start_time": "06:15", "duration_minutes": 15}
+            ],
+            "update": [{"id": ids["item"], "name": "Renamed", "duration_minutes": 45}],
+        }
+    }
+
+
+def workbook(ids):
+    wb = Workbook()
+    ws = wb.active
+    for row, (label, value) in enumerate(
+        [("Name", "Imported"), ("Date", "Not specified"), ("Active", "No"), ("Show Name", "Yes")],
+        start=1,
+    ):
+        ws.cell(row=row, column=1, value=label)
+        ws.cell(row=row, column=2, value=value)
+    ws.append([])
+    ws.append(
+        [
+            "Name",
+            "Start Time",
+            "End Time",
+            "Duration (min)",
+            "Location",
+            "Uniform",
+            "Lead",
+            "Notes",
+            "Icon",
+        ]
+    )
+    for hour in range(8, 20):
+        ws.append([f"Session {hour}", f"{hour:02d}:00", None, 45, "Hall", None, None, None, None])
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return {"data": {"file": (buffer, "schedule.xlsx")}, "content_type": "multipart/form-data"}
+
+
+def sync_token(ids):
+    return {"headers": {"Authorization": "Bearer sync-token"}}
+
+
+# (method, url template, request arguments built from BUDGET_IDS, budget)
+# Content writes include one content_changes INSERT per flush (the edge sync revision log);
+# deleting a schedule also loads the displays assigned to it, to unassign them. A full sync
+# reset loads every current row in a fixed number of IN batches; each page first finds the
+# newest revision with no gap below it (three statements without gaps). Form posts
+# must redirect: a 200 means validation failed and nothing was written.
+SCHEDULE_FORM = form(name="Budget day", date="2030-01-02", show_name="y")
+ITEM_FORM = form(name="Budget item", start_time="10:30", duration_minutes="30", location="Hall")
+SETTINGS_FORM = form(
+    timezone="UTC",
+    background_image_size="fit",
+    bg_color="#000000",
+    text_color="#ffffff",
+    box_color="#212529",
+    box_opacity="1",
+    schedule_color="#212529",
+    schedule_opacity="1",
+)
+ICON_FORM = form(name="Budget icon", use_text="y", characters="B", font="Arial")
+DISPLAY_FORM = form(name="Lobby", slug="lobby", schedule_id="0", bg_color="#101010")
+BUDGETS = [
+    ("GET", "/display/", None, 4),
+    ("GET", "/display/check-updates", None, 3),
+    ("GET", "/display/{slug}/", None, 5),
+    ("GET", "/display/{slug}/check-updates", None, 3),
+    ("GET", "/display/items?v={stamp}&start=0&count=20", None, 4),
+    ("GET", "/sync/changes", sync_token, 15),
+    ("GET", "/sync/changes?since=0", sync_token, 7),
+    ("GET", "/schedules/", None, 1),
+    ("GET", "/schedules/new", None, 0),
+    ("GET", "/schedules/{schedule}/edit", None, 3),
+    ("GET", "/schedules/{schedule}/items/new", None, 2),
+    ("GET", "/schedules/items/{item}/edit", None, 3),
+    ("GET", "/schedules/{schedule}/export", None, 2),
+    ("GET", "/schedules/settings", None, 1),
+    ("GET", "/schedules/import", None, 0),
+    ("POST", "/schedules/new", SCHEDULE_FORM, 3),
+    ("POST", "/schedules/{schedule}/edit", SCHEDULE_FORM, 3),
+    ("POST", "/schedules/{schedule}/items/new", ITEM_FORM, 5),
+    ("POST", "/schedules/items/{item}/edit", ITEM_FORM, 7),
+    ("POST", "/schedules/{schedule}/items/batch", batch, 9),
+    ("POST", "/schedules/settings", SETTINGS_FORM, 3),
+    ("POST", "/schedules/import", workbook, 4),
+    ("POST", "/schedules/{schedule}/duplicate", form(), 6),
+    ("POST", "/schedules/items/{item}/delete", form(), 5),
+    ("POST", "/schedules/{schedule}/delete", form(), 6),
+    ("GET", "/icons/", None, 1),
+    ("GET", "/icons/new", None, 0),
+    ("GET", "/icons/{icon}/edit", None, 1),
+    ("POST", "/icons/new", ICON_FORM, 3),
+    ("POST", "/icons/{icon}/edit", ICON_FORM, 4),
+    ("POST", "/icons/{icon}/delete", form(), 3),
+    ("GET", "/displays/", None, 1),
+    ("GET", "/displays/new", None, 1),
+    ("GET", "/displays/{display}/edit", None, 2),
+    ("POST", "/displays/new", DISPLAY_FORM, 4),
+    ("POST", "/displays/{display}/edit", DISPLAY_FORM, 5),
+    ("POST", "/displays/{display}/delete", form(), 3),
+    ("GET", "/users/", None, 1),
+    ("GET", "/users/new", None, 0),
+    ("GET", "/users/{user}/edit", None, 1),
+    ("POST", "/users/new", form(email="budget@example.com", password="password"), 3),
+    ("POST", "/users/{user}/edit", form(email="viewer@example.com", password="changed"), 4),
+    ("POST", "/users/{user}/delete", form(), 3),
+]
+
+
+@pytest.mark.parametrize(
+    "method,url,data,budget", BUDGETS, ids=[f"{m} {u}" for m, u, _d, _b in BUDGETS]
+)
+def test_route_stays_within_query_budget(
+    large_app, budget_client, query_counter, method, url, data, budget
+):
+    ids = large_app.config["BUDGET_IDS"]
+    url = url.format(**ids)
+    arguments = data(ids) if data else {}
+    with query_counter() as queries:
+        response = budget_client.open(url, method=method, **arguments)
+    assert response.status_code < 400, response.status_code
+    if "data" in arguments:
+        assert response.status_code == 302, response.get_data(as_text=True)
+    assert queries.count <= budget, (
+        f"{method} {url} issued {queries.count} statements (budget {budget}):\n"
+        + "\n".join(queries.statements)
+    )
+
+
+def test_duplicate_copies_every_item(large_app, budget_client):
+    schedule_id = large_app.config["BUDGET_IDS"]["schedule"]
+    response = budget_client.post(f"/schedules/{schedule_id}/duplicate")
+    copy_id = int(response.headers["Location"].split("/")[-2])
+    with large_app.app_context():
+        def fields(sid):
+            items = (
+                ScheduleItem.query.filter_by(schedule_id=sid)
+                .order_by(ScheduleItem.start_time)
+                .all()
+            )
+            return [(i.name, i.start_time, i.end_time, i.icon) for i in items]
+        assert fields(copy_id) == fields(schedule_id)
+        assert fields(copy_id)
+
+
+def test_duplicate_numbers_repeated_copies(large_app, budget_client):
+    schedule_id = large_app.config["BUDGET_IDS"]["schedule"]
+    for _ in range(3):
+        budget_client.post(f"/schedules/{schedule_id}/duplicate")
+    with large_app.app_context():
+        name = db.session.get(Schedule, schedule_id).name
+        copies = {s.name for s in Schedule.query.filter(Schedule.name.startswith(f"{name} (Copy"))}
+    assert copies == {f"{name} (Copy)", f"{name} (Copy 2)", f"{name} (Copy 3)"}
+
+
+def test_import_writes_every_item(large_app, budget_client):
+    response = budget_client.post("/schedules/import", **workbook(large_app.config["BUDGET_IDS"]))
+    schedule_id = int(response.headers["Location"].split("/")[-2])
+    with large_app.app_context():
+        items = (
+            ScheduleItem.query.filter_by(schedule_id=schedule_id)
+            .order_by(ScheduleItem.start_time)
+            .all()
+        )
+        assert [(i.name, i.start_time.hour, i.end_time.minute) for i in items] == [
+            (f"Session {hour}", hour, 45) for hour in range(8, 20)
+        ]
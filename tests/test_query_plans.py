@@ -0,0 +1,97 @@
+"""Query-plan regression suite.
+
+Every SELECT issued by the hot endpoints is captured against a large seeded database and
+re-run under EXPLAIN. The suite fails when a hot table is read with a full table scan or
+when the database has to sort rows that an index should already deliver in order.
+"""
+import json
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+
+HOT_TABLES = ("schedules", "schedule_items", "weather_cache")
+
+
+@contextmanager
+def captured_selects(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def plan_problems(conn, statement, parameters):
+    """Return human-readable plan problems for one statement on SQLite or Postgres."""
+    problems = []
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        stack = [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+                problems.append(f"Seq Scan on {node['Relation Name']}")
+            if node["Node Type"] in ("Sort", "Incremental Sort"):
+                problems.append(f"{node['Node Type']} on {node.get('Sort Key')}")
+            stack.extend(node.get("Plans", []))
+        return problems
+    for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+        detail = row[-1]
+        if detail.startswith("USE TEMP B-TREE"):
+            problems.append(detail)
+        words = detail.split()
+        if (
+            words[:1] == ["SCAN"]
+            and len(words) > 1
+            and words[1] in HOT_TABLES
+            and "USING" not in detail
+        ):
+            problems.append(detail)
+    return problems
+
+
+def assert_plans_clean(app, statements):
+    assert statements, "no SELECT statements were captured"
+    with app.app_context():
+        with db.engine.connect() as conn:
+            failures = {}
+            for statement, parameters in statements:
+                problems = plan_problems(conn, statement, parameters)
+                if problems:
+                    failures[" ".join(statement.split())] = problems
+    assert not failures, json.dumps(failures, indent=2)
+
+
+@pytest.mark.parametrize("path", ["/display/", "/display/check-updates"])
+def test_display_queries_use_indexes(large_app, client, path):
+    with captured_selects(large_app) as statements:
+        assert client.get(path).status_code == 200
+    assert_plans_clean(large_app, statements)
+
+
+def test_schedule_list_and_edit_use_indexes(large_app, admin_client):
+    schedule_id = large_app.config["SEEDED_SCHEDULE_IDS"][7]
+    with captured_selects(large_app) as statements:
+        assert admin_client.get("/schedules/").status_code == 200
+        assert admin_client.get(f"/schedules/{schedule_id}/edit").status_code == 200
+        assert admin_client.get(f"/schedules/{schedule_id}/export").status_code == 200
+    assert_plans_clean(large_app, statements)
+
+
+def test_duplicate_schedule_uses_indexes(large_app, admin_client):
+    schedule_id = large_app.config["SEEDED_SCHEDULE_IDS"][3]
+    with captured_selects(large_app) as statements:
+        assert admin_client.post(f"/schedules/{schedule_id}/duplicate").status_code == 302
+    assert_plans_clean(large_app, statements)
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Schedule
+
+
+def _make_schedules(app, count):
+    old = datetime.utcnow() - timedelta(days=1)
+    with app.app_context():
+        schedules = [
+            Schedule(name=f"S{n}", is_active=(n == 0), created_at=old, updated_at=old)
+            for n in range(count)
+        ]
+        db.session.add_all(schedules)
+        db.session.commit()
+        return [s.id for s in schedules]
+
+
+def test_activation_only_touches_previous_and_new_rows(app, admin_client):
+    ids = _make_schedules(app, 5)
+    with app.app_context():
+        before = {s.id: s.updated_at for s in Schedule.query}
+    resp = admin_client.post(
+        f"/schedules/{ids[3]}/edit", data={"name": "S3", "is_active": "y", "show_name": "y"}
+    )
+    assert resp.status_code == 302
+    with app.app_context():
+        after = {s.id: (s.updated_at, s.is_active) for s in Schedule.query}
+    assert {sid for sid in ids if after[sid][0] != before[sid]} == {ids[0], ids[3]}
+    assert [sid for sid in ids if after[sid][1]] == [ids[3]]
+
+
+def test_new_active_schedule_replaces_current(app, admin_client):
+    ids = _make_schedules(app, 2)
+    admin_client.post("/schedules/new", data={"name": "Fresh", "is_active": "y"})
+    with app.app_context():
+        active = Schedule.query.filter_by(is_active=True).all()
+        assert [s.name for s in active] == ["Fresh"]
+        assert db.session.get(Schedule, ids[0]).is_active is False
+
+
+def test_second_active_row_is_rejected_by_the_database(app):
+    _make_schedules(app, 1)
+    with app.app_context():
+        db.session.add(Schedule(name="Rogue", is_active=True))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
@@ -0,0 +1,70 @@
+from datetime import datetime, time, timezone
+
+from app.display.routes import render_sign
+from app.extensions import db
+from app.models import Schedule, ScheduleItem, SiteSettings
+from app.services.schedule_index import ScheduleIndex, schedule_index
+
+
+def test_index_answers_current_next_and_window():
+    index = ScheduleIndex.from_rows([
+        (time(8), time(12), None),  # long session overlapping the next two
+        (time(9), None, 30),
+        (time(9, 15), None, None),  # runs until the next start
+        (time(13), time(13), None),  # zero-length end wraps to midnight
+        (time(23), time(1), None),  # past midnight, cut off there
+    ])
+    assert index.ends == [720, 570, 780, 1440, 1440]
+    assert index.current(555) == [0, 1, 2]
+    assert index.current(600) == [0, 2]
+    assert index.current(720) == [2]
+    assert index.next(550) == 2 and index.next(555) == 3 and index.next(1380) is None
+    assert list(index.window(600, 1)) == [0, 1, 2, 3]
+    assert index.past_count(600) == 1
+    assert index.next_boundary(570) == 720
+    assert index.boundaries()[-1] == 1380
+
+    now = index.at(600)
+    assert [now.css(i) for i in range(5)] == ["is-now", "is-past", "is-now", "is-next", ""]
+    assert index.compact() == {"s": index.starts, "e": index.ends, "r": [720, 720, 780, 1440, 1440]}
+
+
+def test_current_matches_a_scan_of_every_item():
+    rows = [(time(h, m), None, d) for h in range(6, 22) for m, d in ((0, 50), (20, 90), (40, None))]
+    index = ScheduleIndex.from_rows(rows)
+    for minute in range(0, 1440, 7):
+        scan = [i for i, (s, e) in enumerate(zip(index.starts, index.ends)) if s <= minute < e]
+        assert index.current(minute) == scan
+
+
+def test_sign_marks_items_from_the_shared_index(app, client):
+    with app.app_context():
+        db.session.add(SiteSettings(timezone="America/New_York"))
+        schedule = Schedule(name="Event day", is_active=True)
+        db.session.add(schedule)
+        db.session.flush()
+        db.session.add_all(
+            [
+                ScheduleItem(
+                    schedule_id=schedule.id, name="Breakfast", start_time=time(7), end_time=time(8)
+                ),
+                ScheduleItem(
+                    schedule_id=schedule.id, name="Keynote", start_time=time(9), duration_minutes=60
+                ),
+                ScheduleItem(schedule_id=schedule.id, name="Lunch", start_time=time(12)),
+            ]
+        )
+        db.session.commit()
+
+        with app.test_request_context("/display/"):
+            # 09:30 in New York
+            html = render_sign(now=datetime(2026, 1, 14, 14, 30, tzinfo=timezone.utc))
+        assert html.count("border-secondary is-past") == 1
+        assert "border-secondary is-now" in html
+        assert "border-secondary is-next" in html
+        assert '"America/New_York"' in html
+
+        schedule = db.session.get(Schedule, schedule.id)
+        index = schedule_index(schedule)
+        assert index.starts == [420, 540, 720]
+        assert app.extensions["schedule_indexes"] == {(schedule.id, schedule.updated_at): index}
@@ -0,0 +1,89 @@
+from datetime import time
+
+from app.extensions import db
+from app.models import Schedule, ScheduleItem
+
+
+def _schedule_with_items(app, *starts):
+    with app.app_context():
+        sched = Schedule(name="Event Day")
+        db.session.add(sched)
+        db.session.flush()
+        for start in starts:
+            hour, minute = map(int, start.split(":"))
+            item = ScheduleItem(
+                schedule_id=sched.id, start_time=time(hour, minute), duration_minutes=30
+            )
+            item.compute_end_time()
+            db.session.add(item)
+        db.session.commit()
+        return sched.id, [item.id for item in ScheduleItem.query.order_by(ScheduleItem.start_time)]
+
+
+def test_batch_applies_all_operations_in_one_commit(app, admin_client):
+    schedule_id, (first, second, third) = _schedule_with_items(app, "09:00", "10:00", "11:00")
+    resp = admin_client.post(
+        f"/schedules/{schedule_id}/items/batch",
+        json={
+            "create": [
+                {"client_id": "a", "start_time": "12:00", "duration_minutes": 45, "name": "Lunch"}
+            ],
+            "update": [{"id": first, "location": "Hall A", "duration_minutes": 90}],
+            "delete": [third],
+            "reorder": [second, first],
+        },
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["deleted"] == [third]
+    items = {item["id"]: item for item in body["items"]}
+    assert items[second]["start_time"] == "09:00"
+    assert items[first]["start_time"] == "10:00"
+    assert items[first]["end_time"] == "11:30"
+    assert items[first]["location"] == "Hall A"
+    assert items[body["created"]["a"]]["end_time"] == "12:45"
+
+
+def test_batch_rejects_everything_when_any_entry_is_invalid(app, admin_client):
+    schedule_id, (first,) = _schedule_with_items(app, "09:00")
+    resp = admin_client.post(f"/schedules/{schedule_id}/items/batch", json={
+        "create": [{"client_id": "a", "start_time": "25:00"}],
+        "update": [{"id": first, "name": "Renamed"}],
+        "delete": [9999],
+    })
+    assert resp.status_code == 400
+    fields = {(err["op"], err.get("field")) for err in resp.get_json()["errors"]}
+    assert ("create", "start_time") in fields
+    assert ("delete", None) in fields
+    with app.app_context():
+        assert db.session.get(ScheduleItem, first).name is None
+        assert ScheduleItem.query.count() == 1
+
+
+def test_edit_page_embeds_grid_data(app, admin_client):
+    schedule_id, _ = _schedule_with_items(app, "09:00")
+    resp = admin_client.get(f"/schedules/{schedule_id}/edit")
+    assert resp.status_code == 200
+    assert b"items-grid" in resp.data
+    assert f"/schedules/{schedule_id}/items/batch".encode() in resp.data
+
+
+def test_batch_that_changes_nothing_does_not_touch_the_schedule(app, admin_client):
+    schedule_id, (first,) = _schedule_with_items(app, "09:00")
+    with app.app_context():
+        stamp = db.session.get(Schedule, schedule_id).updated_at
+    for payload in ({}, {"update": [{"id": first, "start_time": "09:00"}]}, {"reorder": [first]}):
+        resp = admin_client.post(f"/schedules/{schedule_id}/items/batch", json=payload)
+        assert resp.status_code == 200
+    with app.app_context():
+        assert db.session.get(Schedule, schedule_id).updated_at == stamp
+        assert db.session.get(ScheduleItem, first).end_time == time(9, 30)
+
+
+def test_clearing_the_duration_clears_the_end_time(app, admin_client):
+    schedule_id, (first,) = _schedule_with_items(app, "09:00")
+    resp = admin_client.post(f"/schedules/{schedule_id}/items/batch", json={
+        "update": [{"id": first, "duration_minutes": None}],
+    })
+    (item,) = resp.get_json()["items"]
+    assert item["duration_minutes"] is None and item["end_time"] is None
@@ -0,0 +1,34 @@
+from datetime import date
+
+from app.extensions import db
+from app.models import Icon, Schedule, ScheduleItem, User, WeatherCache
+
+
+def test_seed_command_generates_requested_volumes_and_can_run_twice(app):
+    runner = app.test_cli_runner()
+    args = "seed --schedules 200 --items 10 --icons 20 --users 4 --weather 7 --seed 7".split()
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+    assert "Seeded" in result.output
+    with app.app_context():
+        # Deleting rows must not make the next run reuse a name
+        db.session.delete(Icon.query.order_by(Icon.id).first())
+        db.session.delete(User.query.filter_by(is_admin=False).order_by(User.id).first())
+        db.session.commit()
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        assert Schedule.query.count() == 400
+        assert Icon.query.filter(Icon.image_path.isnot(None)).count() == 10 - 1
+        assert User.query.count() == 1 + 8 - 1
+        dates = [d for (d,) in db.session.query(Schedule.date).filter(Schedule.date.isnot(None))]
+        # the second run skips days already taken
+        assert len(dates) == 380 and len(set(dates)) == 380
+        assert WeatherCache.query.count() == 14
+        assert 5 * 400 <= ScheduleItem.query.count() <= 15 * 400
+        assert Schedule.query.filter_by(is_active=True).count() == 1
+        assert Schedule.query.filter(Schedule.date.is_(None)).count() == 20
+        assert Schedule.active_on(date.today()) is not None
+        durations = {d for (d,) in db.session.query(ScheduleItem.duration_minutes).distinct()}
+        assert None in durations and len(durations) > 4
@@ -0,0 +1,43 @@
+from app.slow_queries import SlowQueryLog, get_slow_queries, statement_shape
+
+
+def test_slow_statements_are_recorded_with_plan_and_endpoint(app, client, admin_client):
+    slow_queries = get_slow_queries(app)
+    slow_queries.threshold_ms = 0.0001
+    try:
+        client.get("/display/check-updates")
+    finally:
+        slow_queries.threshold_ms = 100
+    entries = [e for e in slow_queries.recent() if e["endpoint"] == "display.check_updates"]
+    assert entries
+    assert all(e["plan"] for e in entries if e["statement"].startswith("SELECT"))
+    page = admin_client.get("/diagnostics/slow-queries").get_data(as_text=True)
+    assert "display.check_updates" in page and "Query plan" in page
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?,  ?)") == statement_shape(
+        "SELECT * FROM t WHERE id IN (?, ?)"
+    )
+
+
+def test_a_failed_explain_is_rolled_back_to_a_savepoint():
+    from types import SimpleNamespace
+
+    executed = []
+
+    class Cursor:
+        def execute(self, sql, parameters=None):
+            executed.append(sql.split(" ")[0] if not sql.startswith("ROLLBACK") else "ROLLBACK TO")
+            if sql.startswith("EXPLAIN"):
+                raise RuntimeError("permission denied")
+
+        def close(self):
+            pass
+
+    conn = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+    cursor = SimpleNamespace(connection=SimpleNamespace(cursor=Cursor))
+    plan = SlowQueryLog._explain(conn, cursor, "SELECT 1", ())
+    assert plan.startswith("(EXPLAIN failed")
+    # The request's transaction is left as it was, not aborted
+    assert executed == ["SAVEPOINT", "EXPLAIN", "ROLLBACK TO", "RELEASE"]
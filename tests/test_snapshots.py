@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+from conftest import seed_schedule
+
+from app.extensions import db
+from app.models import ScheduleItem
+from app.snapshots import get_snapshots
+
+
+@pytest.fixture
+def publishing_app(make_app, tmp_path):
+    published = make_app(SNAPSHOT_DIR=str(tmp_path / "snapshots"), SNAPSHOT_KEEP=2)
+    seed_schedule(published, settings={"timezone": "UTC"}, is_active=True)
+    yield published
+    get_snapshots(published).wait()
+
+
+def _current(app, name):
+    with open(os.path.join(app.config["SNAPSHOT_DIR"], "current", name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_publish_writes_the_page_and_state_the_routes_serve(publishing_app):
+    snapshots = get_snapshots(publishing_app)
+    with publishing_app.app_context():
+        version = snapshots.publish()
+        assert snapshots.publish() == version  # unchanged content is not republished
+    client = publishing_app.test_client()
+    assert "Briefing" in _current(publishing_app, "index.html")
+    state = client.get("/display/check-updates").get_json()
+    published = json.loads(_current(publishing_app, "check-updates.json"))
+    # Worked out per request, so stale in a file that lives until the next publish
+    assert published == {
+        key: value for key, value in state.items() if key not in ("poll_after", "next_transition")
+    }
+    assert snapshots.published == 1
+
+
+def test_admin_edits_republish_in_the_background(publishing_app):
+    snapshots = get_snapshots(publishing_app)
+    client = publishing_app.test_client()
+    client.post("/auth/login", data={"email": "admin@example.com", "password": "password"})
+    with publishing_app.app_context():
+        first = snapshots.publish()
+        item_id = ScheduleItem.query.filter_by(name="Briefing").one().id
+    for name in ("Roll Call", "Muster"):
+        data = {"name": name, "start_time": "08:00", "duration_minutes": "30"}
+        client.post(f"/schedules/items/{item_id}/edit", data=data)
+        assert snapshots.wait()
+        assert name in _current(publishing_app, "index.html")
+    assert snapshots.current_version() != first
+    # SNAPSHOT_KEEP bounds the versions left on disk
+    versions = os.listdir(os.path.join(publishing_app.config["SNAPSHOT_DIR"], "versions"))
+    assert len(versions) == 2 and snapshots.current_version() in versions
+
+
+def test_snapshot_command(publishing_app):
+    snapshots = get_snapshots(publishing_app)
+    result = publishing_app.test_cli_runner().invoke(args=["snapshot"])
+    assert result.exit_code == 0, result.output
+    assert snapshots.current_version() in result.output
+
+
+def test_a_render_older_than_the_published_one_is_not_switched_to(publishing_app):
+    from app.sync.feed import latest_revision
+
+    snapshots = get_snapshots(publishing_app)
+    with publishing_app.app_context():
+        # A slow worker reads the revision and renders, then another worker publishes an edit
+        stale_revision = latest_revision()
+        stale = snapshots._write(*snapshots.render(publishing_app))
+        ScheduleItem.query.filter_by(name="Briefing").one().name = "Roll Call"
+        db.session.commit()
+        assert snapshots.wait()
+        assert snapshots.published_revision() == latest_revision() > stale_revision
+
+        assert not snapshots._switch(stale, stale_revision)
+    assert snapshots.current_version() != stale
+    assert "Roll Call" in _current(publishing_app, "index.html")
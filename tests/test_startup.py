@@ -0,0 +1,58 @@
+import gc
+import subprocess
+import sys
+from pathlib import Path
+
+from app.startup import warm
+from benchmarks.bench_startup import main as bench_startup
+
+
+def test_heavy_modules_are_not_imported_at_startup(tmp_path):
+    code = (
+        "import sys; from app import create_app; "
+        f"create_app({{'SQLALCHEMY_DATABASE_URI': 'sqlite:///{tmp_path / 'x.db'}'}}); "
+        "print([m for m in ('openpyxl', 'requests') if m in sys.modules])"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+
+
+def test_bytecode_cache_and_warm_compile_every_template(make_app, tmp_path):
+    cache_dir = tmp_path / "jinja"
+    cached = make_app(JINJA_BYTECODE_CACHE_DIR=str(cache_dir))
+    try:
+        timings = warm(cached)
+    finally:
+        gc.unfreeze()
+    assert set(timings) == {"imports", "templates", "sign_view"}
+    templates = cached.jinja_env.list_templates(filter_func=lambda n: n.endswith(".html"))
+    assert len(list(cache_dir.iterdir())) == len(templates)
+    assert "requests" in sys.modules
+    assert cached.extensions.get("sign_views")
+
+
+def test_startup_benchmark_meets_its_budget(tmp_path):
+    output = str(tmp_path / "startup.json")
+    assert bench_startup(["--trials", "1", "--budget-ms", "5000", "--output", output]) == 0
+
+
+def test_display_profile_serves_only_the_sign(make_app):
+    client = make_app(APP_PROFILE="display").test_client()
+    assert client.get("/display/").status_code == 200
+    assert client.get("/display/check-updates").status_code == 200
+    assert client.get("/").headers["Location"].endswith("/display/")
+    assert client.get("/schedules/").status_code == 404
+    assert client.get("/auth/login").status_code == 404
+
+
+def test_display_profile_skips_admin_modules(tmp_path):
+    config = {"APP_PROFILE": "display", "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'x.db'}"}
+    admin = ("flask_migrate", "alembic", "flask_wtf", "wtforms", "openpyxl")
+    code = (
+        f"import sys; from app import create_app; create_app({config!r}); "
+        f"print([m for m in {admin!r} if m in sys.modules])"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,194 @@
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from conftest import seed_schedule
+
+from app.extensions import db
+from app.models import ContentChange, Icon, Schedule, ScheduleItem, SiteSettings
+from app.sync.feed import changes_since, prune_changes, visible_revision
+from app.sync.replica import Replica
+
+TOKEN = "edge-secret"
+
+
+class ClientTransport:
+    """Routes the replica's HTTP calls to the central app's test client."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        response = self.client.get(
+            url.replace("http://central", ""), query_string=params, headers=headers
+        )
+        assert response.status_code in (200, 404), response.status_code
+        return SimpleNamespace(
+            status_code=response.status_code,
+            content=response.data,
+            json=response.get_json,
+            raise_for_status=lambda: None,
+        )
+
+
+@pytest.fixture
+def central(app):
+    app.config.update(SYNC_TOKEN=TOKEN)
+    with app.app_context():
+        db.session.add(Icon(name="glyph", characters="★"))
+        db.session.commit()
+    seed_schedule(
+        app, "Today", items=[{"name": "Briefing", "start_time": time(8), "icon": "glyph"}],
+        settings={"timezone": "UTC", "bg_color": "#123456"}, date=date.today(),
+    )
+    seed_schedule(app, "Last year", items=(), date=date.today() - timedelta(days=365))
+    return app
+
+
+@pytest.fixture
+def replica(central, make_app, tmp_path):
+    edge = make_app(
+        APP_PROFILE="display", SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'edge.db'}"
+    )
+    with edge.app_context():
+        db.create_all()
+    transport = ClientTransport(central.test_client())
+    return edge, Replica(edge, "http://central", TOKEN, str(tmp_path / "revision"), http=transport)
+
+
+def test_feed_requires_the_sync_token(central, client):
+    assert client.get("/sync/changes").status_code == 401
+    assert client.get("/sync/changes", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    central.config["SYNC_TOKEN"] = None
+    assert client.get("/sync/changes").status_code == 404
+
+
+def test_writes_are_logged_and_paged_by_revision(central, admin_client):
+    with central.app_context():
+        start = changes_since(None)["revision"]
+        schedule_id = Schedule.query.filter_by(name="Today").one().id
+        item_id = ScheduleItem.query.filter_by(name="Briefing").one().id
+    admin_client.post(f"/schedules/items/{item_id}/delete")
+    admin_client.post(
+        "/icons/new",
+        data={"name": "star", "use_text": "y", "characters": "☆", "font": "Arial", "enabled": "y"},
+    )
+
+    with central.app_context():
+        page = changes_since(start, limit=1)
+        assert page["more"]
+        assert [(c["entity"], c["id"]) for c in page["changes"]] == [("schedule", schedule_id)]
+        # the deleted item is gone from its schedule
+        assert page["changes"][0]["data"]["items"] == []
+        rest = changes_since(page["revision"])
+        assert not rest["more"] and [c["entity"] for c in rest["changes"]] == ["icon"]
+        assert changes_since(rest["revision"])["changes"] == []
+        assert ContentChange.query.count() >= 2
+
+
+def test_replica_bootstraps_then_pulls_only_deltas(central, replica, admin_client):
+    edge, puller = replica
+    assert puller.pull() == 3  # settings, icon and today's schedule; last year's is left out
+    html = edge.test_client().get("/display/").get_data(as_text=True)
+    assert "Briefing" in html and "★" in html and "#123456" in html
+    with edge.app_context():
+        assert Schedule.query.filter_by(name="Last year").first() is None
+
+    with central.app_context():
+        schedule_id = Schedule.query.filter_by(name="Today").one().id
+        item_id = ScheduleItem.query.filter_by(name="Briefing").one().id
+    admin_client.post(
+        f"/schedules/items/{item_id}/edit", data={"name": "Roll Call", "start_time": "07:30"}
+    )
+    assert puller.pull() == 1
+    html = edge.test_client().get("/display/").get_data(as_text=True)
+    assert "Roll Call" in html and "Briefing" not in html
+    with central.app_context():
+        stamp = db.session.get(Schedule, schedule_id).updated_at
+    with edge.app_context():
+        assert db.session.get(Schedule, schedule_id).updated_at == stamp
+
+    admin_client.post(f"/schedules/{schedule_id}/delete")
+    assert puller.pull() == 1
+    with edge.app_context():
+        assert Schedule.query.count() == 0 and ScheduleItem.query.count() == 0
+    assert puller.pull() == 0
+
+
+def _log(*rows):
+    """Add content_changes rows as ``(id, age in seconds)``."""
+    from datetime import datetime
+
+    now = datetime.utcnow()
+    db.session.add_all(
+        ContentChange(id=i, entity="icon", entity_id=i, changed_at=now - timedelta(seconds=age))
+        for i, age in rows
+    )
+    db.session.commit()
+
+
+def test_pages_stop_below_a_revision_that_may_still_commit(app):
+    with app.app_context():
+        _log((1, 900), (2, 900), (4, 10), (5, 5))
+        # 3 is missing and 4 is recent, so 3 may be a transaction that has not committed yet
+        assert visible_revision(0, gap_seconds=300) == 2
+        page = changes_since(0, gap_seconds=300)
+        assert [c["id"] for c in page["changes"]] == [1, 2] and page["revision"] == 2
+        assert changes_since(2, gap_seconds=300)["changes"] == []
+        # Once the row after the gap is old, 3 was rolled back
+        assert visible_revision(0, gap_seconds=5) == 5
+        _log((3, 0))
+        assert [c["id"] for c in changes_since(2, gap_seconds=300)["changes"]] == [3, 4, 5]
+
+
+def test_old_changes_are_pruned_and_replicas_behind_them_reset(central):
+    with central.app_context():
+        newest = changes_since(None)["revision"]
+        _log((newest + 1, 40 * 86400), (newest + 2, 31 * 86400), (newest + 3, 86400))
+        ContentChange.query.filter(ContentChange.id <= newest).update(
+            {"changed_at": date.today() - timedelta(days=90)}
+        )
+        db.session.commit()
+        assert prune_changes(30) == newest + 2
+        assert [c.id for c in ContentChange.query.order_by(ContentChange.id)] == [newest + 3]
+        assert changes_since(newest + 1)["reset"]
+        assert not changes_since(newest + 2)["reset"]
+
+        ContentChange.query.update({"changed_at": date.today() - timedelta(days=90)})
+        db.session.commit()
+        # the newest row is kept, so replicas are not reset every time
+        assert prune_changes(30) == 0
+        assert not changes_since(newest + 3)["reset"]
+
+
+@pytest.mark.parametrize("zone, offset", [("Etc/GMT+12", -12), ("Etc/GMT-14", 14)])
+def test_the_feed_window_follows_the_sites_date(app, zone, offset):
+    from datetime import datetime, timezone
+
+    from app.sync.feed import horizon
+
+    with app.app_context():
+        db.session.add(SiteSettings(timezone=zone))
+        db.session.commit()
+        site_now = datetime.now(timezone.utc) + timedelta(hours=offset)
+        assert horizon() == site_now.date() - timedelta(days=1)
+
+
+def test_replica_only_writes_assets_inside_its_static_folder(tmp_path):
+    requested = []
+
+    def get(url, timeout=None):
+        requested.append(url)
+        return SimpleNamespace(status_code=200, content=b"png")
+
+    http = SimpleNamespace(get=get)
+    app = SimpleNamespace(static_folder=str(tmp_path / "static"))
+    puller = Replica(app, "http://central", TOKEN, str(tmp_path / "revision"), http=http)
+    puller._fetch_assets(
+        {"uploads/ok.png", "../escape.png", "/etc/escape.png", "uploads/../../escape.png"}
+    )
+    assert requested == ["http://central/static/uploads/ok.png"]
+    assert (tmp_path / "static" / "uploads" / "ok.png").read_bytes() == b"png"
+    assert not list(tmp_path.glob("**/escape.png"))
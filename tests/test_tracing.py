@@ -0,0 +1,49 @@
+import json
+
+from app.tracing import BatchProcessor, Span, get_tracer
+
+
+def _spans(app, path):
+    get_tracer(app).processor.flush()
+    with open(path) as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_sign_spans_continue_incoming_trace(make_app, tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    traced = make_app(TRACING_ENABLED=True, TRACING_FILE=str(trace_file))
+    parent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    resp = traced.test_client().get("/display/", headers={"traceparent": parent})
+    spans = _spans(traced, trace_file)
+    assert resp.headers["traceparent"].startswith("00-0af7651916cd43dd8448eb211c80319c-")
+    by_name = {span["name"]: span for span in spans}
+    root = by_name["GET /display/"]
+    assert root["parent_id"] == "b7ad6b7169203331"
+    assert {
+        "sign.settings",
+        "sign.schedule",
+        "sign.weather",
+        "weather.cache_lookup",
+        "render display/sign.html",
+    } <= set(by_name)
+    assert by_name["sign.schedule"]["parent_id"] == root["span_id"]
+    assert any(
+        span["name"] == "db.query" and span["parent_id"] == by_name["sign.schedule"]["span_id"]
+        for span in spans
+    )
+    assert {span["trace_id"] for span in spans} == {"0af7651916cd43dd8448eb211c80319c"}
+
+
+def test_shutdown_exports_the_spans_still_queued():
+    exported = []
+
+    class Exporter:
+        def export(self, spans):
+            exported.extend(spans)
+
+    processor = BatchProcessor(Exporter(), interval=60)
+    span = Span(None, "last", "0af7651916cd43dd8448eb211c80319c", None, {})
+    processor.submit(span)
+    assert not exported  # the next batch is a minute away
+    processor.shutdown()
+    assert exported == [span] and not processor._thread.is_alive()
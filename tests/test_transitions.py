@@ -0,0 +1,145 @@
+import os
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from conftest import seed_schedule
+
+from app.extensions import db
+from app.models import Display, Schedule, ScheduleItem, SiteSettings
+from app.snapshots import get_snapshots
+from app.transitions import (
+    Transition,
+    get_transitions,
+    next_midnight,
+    next_transition,
+    site_today,
+    transition_reached,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def scheduled_app(make_app, tmp_path):
+    scheduled = make_app(SNAPSHOT_DIR=str(tmp_path / "snapshots"), EDGE_CACHE_PURGER="stub")
+    seed_schedule(
+        scheduled, "Every day",
+        items=[
+            {"name": "Standup", "start_time": time(9), "end_time": time(10)},
+            {"name": "Review", "start_time": time(14)},
+        ],
+        settings={"timezone": "America/New_York"}, is_active=True,
+    )
+    yield scheduled
+    get_snapshots(scheduled).wait()
+
+
+def test_transitions_follow_items_and_local_midnight(scheduled_app):
+    with scheduled_app.app_context():
+        settings = SiteSettings.query.first()
+        schedule = Schedule.query.one()
+        # 10:00 in New York: the standup just ended, the review starts at 14:00
+        assert next_transition(settings, schedule, _utc(2026, 1, 14, 15)) == _utc(2026, 1, 14, 19)
+        # After the last item, the next change is local midnight (05:00 UTC in winter)
+        assert next_transition(settings, schedule, _utc(2026, 1, 14, 20)) == _utc(2026, 1, 15, 5)
+        # daylight saving
+        assert next_midnight(settings, _utc(2026, 7, 14, 20)) == _utc(2026, 7, 15, 4)
+        assert site_today(settings, _utc(2026, 1, 15, 3)) == date(2026, 1, 14)
+
+        state = scheduled_app.test_client().get("/display/check-updates").get_json()
+        assert "next_transition" in state
+
+
+def test_plan_covers_the_active_and_assigned_schedules(scheduled_app):
+    with scheduled_app.app_context():
+        other = Schedule(name="Room A")
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(ScheduleItem(schedule_id=other.id, name="Talk", start_time=time(13)))
+        db.session.add(Display(slug="room-a", name="Room A", schedule_id=other.id))
+        db.session.commit()
+        every_day = Schedule.query.filter_by(name="Every day").one().id
+        plan = get_transitions(scheduled_app).plan(_utc(2026, 1, 14, 15))
+    assert [(event.kind, event.schedule_id) for event in plan] == [
+        ("item", other.id), ("item", every_day), ("prerender", None), ("midnight", None),
+    ]
+    assert plan[0].at == _utc(2026, 1, 14, 18) and plan[1].at == _utc(2026, 1, 14, 19)
+    assert plan[2].at == _utc(2026, 1, 15, 4, 59)
+
+
+def test_tomorrow_is_prepared_before_midnight_and_published_at_it(scheduled_app):
+    snapshots, transitions = get_snapshots(scheduled_app), get_transitions(scheduled_app)
+    with scheduled_app.app_context():
+        settings = SiteSettings.query.first()
+        tomorrow = site_today(settings) + timedelta(days=1)
+        dated = Schedule(name="Launch day", date=tomorrow)
+        db.session.add(dated)
+        db.session.flush()
+        db.session.add(ScheduleItem(schedule_id=dated.id, name="Launch", start_time=time(8)))
+        db.session.commit()
+        snapshots.wait()
+        today_version = snapshots.publish()
+
+        midnight = next_midnight(settings)
+        transitions.prerender(scheduled_app, midnight - timedelta(seconds=60))
+        assert snapshots.current_version() == today_version  # not published yet
+        assert snapshots.activate_prepared(tomorrow)
+        current = os.path.join(scheduled_app.config["SNAPSHOT_DIR"], "current", "index.html")
+        with open(current, encoding="utf-8") as f:
+            assert "Launch" in f.read()
+
+        # An edit after preparing makes the prepared version stale
+        transitions.prerender(scheduled_app, midnight - timedelta(seconds=60))
+        Schedule.query.filter_by(name="Launch day").one().name = "Launch day (moved)"
+        db.session.commit()
+        assert not snapshots.activate_prepared(tomorrow)
+
+
+def test_item_transitions_purge_that_schedules_signs(scheduled_app):
+    reached = []
+    edge = scheduled_app.extensions["edge_cache"]
+    edge.wait()
+    edge.purger.purged.clear()
+    with scheduled_app.app_context(), transition_reached.connected_to(
+        lambda sender, **kw: reached.append(kw), scheduled_app
+    ):
+        schedule_id = Schedule.query.one().id
+        get_transitions(scheduled_app).fire(Transition(_utc(2026, 1, 14, 19), "item", schedule_id))
+    edge.wait()
+    [(keys, paths)] = edge.purger.purged
+    assert keys == {f"schedule-{schedule_id}"} and "/display/" not in paths
+    assert reached[-1]["kind"] == "item" and reached[-1]["schedule_id"] == schedule_id
+
+
+def test_midnight_publishes_the_prepared_snapshot_and_purges_the_active_signs(
+    scheduled_app, monkeypatch
+):
+    snapshots, transitions = get_snapshots(scheduled_app), get_transitions(scheduled_app)
+    edge = scheduled_app.extensions["edge_cache"]
+    with scheduled_app.app_context():
+        settings = SiteSettings.query.first()
+        tomorrow = site_today(settings) + timedelta(days=1)
+        dated = Schedule(name="Launch day", date=tomorrow)
+        db.session.add(dated)
+        db.session.flush()
+        db.session.add(ScheduleItem(schedule_id=dated.id, name="Launch", start_time=time(8)))
+        db.session.commit()
+        snapshots.wait()
+        snapshots.publish()
+        edge.wait()
+        edge.purger.purged.clear()
+
+        midnight = next_midnight(settings)
+        transitions.fire(Transition(midnight - timedelta(seconds=60), "prerender"))
+        # The fresh render that follows would be of today here, where it is not yet midnight
+        requested = []
+        monkeypatch.setattr(snapshots, "request", lambda: requested.append(True))
+        transitions.fire(Transition(midnight, "midnight"))
+    current = os.path.join(scheduled_app.config["SNAPSHOT_DIR"], "current", "index.html")
+    with open(current, encoding="utf-8") as f:
+        assert "Launch" in f.read()
+    assert requested
+    edge.wait()
+    assert [keys for keys, paths in edge.purger.purged] == [{"active-schedule"}]
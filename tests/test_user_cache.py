@@ -0,0 +1,52 @@
+import uuid
+
+from app.auth.identity import get_user_cache
+from app.extensions import db
+from app.models import User
+
+
+def _add_user(app, email, is_admin=False):
+    with app.app_context():
+        user = User(email=email, is_admin=is_admin)
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def test_authenticated_requests_reuse_cached_user(app, admin_client):
+    user_cache = get_user_cache(app)
+    user_cache.clear()
+    admin_client.get("/schedules/")
+    before = user_cache.stats()
+    admin_client.get("/schedules/")
+    after = user_cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+
+def test_editing_a_user_invalidates_its_entry(app, admin_client):
+    user_cache = get_user_cache(app)
+    other_id = _add_user(app, "editor@example.com")
+    with app.app_context():
+        user_cache.load(str(other_id))
+    assert user_cache.stats()["size"] >= 1
+    admin_client.post(f"/users/{other_id}/edit", data={"email": "renamed@example.com"})
+    with app.app_context():
+        assert user_cache.load(str(other_id)).email == "renamed@example.com"
+
+
+def test_a_demotion_reaches_the_other_workers(make_app):
+    url = f"memory://{uuid.uuid4().hex}"
+    first, second = make_app(CACHE_URL=url), make_app(CACHE_URL=url)
+    deputy_id = _add_user(first, "deputy@example.com", is_admin=True)
+    admin = first.test_client()
+    admin.post("/auth/login", data={"email": "admin@example.com", "password": "password"})
+    deputy = second.test_client()
+    deputy.post("/auth/login", data={"email": "deputy@example.com", "password": "password"})
+    assert deputy.get("/users/").status_code == 200
+    assert get_user_cache(second).stats()["size"] == 1
+
+    admin.post(f"/users/{deputy_id}/edit", data={"email": "deputy@example.com"})
+    assert get_user_cache(second).stats()["size"] == 0
+    assert deputy.get("/users/").status_code == 302